@@ -0,0 +1,258 @@
+# --- Autenticação do Painel Administrativo ---
+# As senhas ficam em CREDENTIALS_FILE como hash scrypt (hashlib, com sal por usuário) e
+# são conferidas só no login. O login devolve um token de sessão assinado com HMAC
+# (usuário, validade, versão da credencial e o id da sessão): conferir o token custa
+# microssegundos, não refaz o scrypt e vale em qualquer réplica que compartilhe o DATA_DIR
+# (o segredo de assinatura fica em SECRET_FILE, ou em CHECKLIST_SESSION_SECRET). Cada sessão
+# aberta tem um arquivo em SESSIONS_DIR: o logout o apaga e o token deixa de valer na hora,
+# em todas as réplicas. Trocar a senha muda a versão da credencial e invalida os tokens
+# emitidos antes. O token nunca vai na URL: fica no estado da sessão do Streamlit e, com o
+# app servido por serve.py, também num cookie HttpOnly (SESSION_COOKIE), que o navegador
+# reapresenta ao reconectar em qualquer réplica. O cookie é gravado pela rota
+# /admin/session do serve.py em troca de um código de uso único (HANDOFF_SECONDS).
+#
+# Sem arquivo de credenciais, o usuário inicial é CHECKLIST_ADMIN_USER/CHECKLIST_ADMIN_PASSWORD
+# (padrão admin/admin, como antes); troque a senha com `python cli.py admin-user admin`.
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+import re
+import secrets
+import threading
+import time
+
+DATA_DIR = os.environ.get("CHECKLIST_DATA_DIR", ".")
+CREDENTIALS_FILE = os.path.join(DATA_DIR, "admin_credentials.json")
+SECRET_FILE = os.path.join(DATA_DIR, "admin_session.key")
+SESSIONS_DIR = os.path.join(DATA_DIR, "admin_sessions")
+HANDOFF_DIR = os.path.join(DATA_DIR, "admin_handoffs")
+HANDOFF_SECONDS = 60
+SESSION_COOKIE = "checklist_admin"
+COOKIE_SESSIONS = os.environ.get("CHECKLIST_ADMIN_COOKIE") == "1"  # ligado pelo serve.py
+SESSION_HOURS = float(os.environ.get("CHECKLIST_SESSION_HOURS", "8"))
+DEFAULT_ADMIN = (os.environ.get("CHECKLIST_ADMIN_USER", "admin"), os.environ.get("CHECKLIST_ADMIN_PASSWORD", "admin"))
+
+# Custo do scrypt: n=2**14, r=8 (16 MiB e cerca de 0,1 s por verificação).
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+
+_lock = threading.Lock()
+_credentials_cache = {'mtime': None, 'users': None}
+_secret_cache = {}
+
+# --- Armazenamento das Credenciais ---
+def _scrypt(password, salt, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P):
+    return hashlib.scrypt(password.encode('utf-8'), salt=salt, n=n, r=r, p=p, maxmem=128 * r * n * 2, dklen=32)
+
+def _hash_credential(password, salt=None):
+    salt = salt or secrets.token_bytes(16)
+    return {'salt': salt.hex(), 'n': SCRYPT_N, 'r': SCRYPT_R, 'p': SCRYPT_P, 'hash': _scrypt(password, salt).hex()}
+
+def _write_private(path, payload):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+def _load_users():
+    """{usuário: credencial}, relido só quando o arquivo muda; sem arquivo, o usuário inicial."""
+    try:
+        mtime = os.stat(CREDENTIALS_FILE).st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+    with _lock:
+        if _credentials_cache['users'] is not None and _credentials_cache['mtime'] == mtime:
+            return _credentials_cache['users']
+    if mtime is None:
+        # Sal fixo: todas as réplicas chegam à mesma credencial (e aceitam os mesmos tokens).
+        users = {DEFAULT_ADMIN[0]: _hash_credential(DEFAULT_ADMIN[1], hashlib.sha256(DEFAULT_ADMIN[0].encode('utf-8')).digest()[:16])}
+    else:
+        with open(CREDENTIALS_FILE, 'r', encoding='utf-8') as f:
+            users = json.load(f)
+    with _lock:
+        _credentials_cache.update(mtime=mtime, users=users)
+    return users
+
+def using_default_credentials():
+    return not os.path.exists(CREDENTIALS_FILE)
+
+def _stored_users():
+    """Usuários gravados; o usuário inicial não é copiado para o arquivo."""
+    return {} if using_default_credentials() else dict(_load_users())
+
+def set_password(username, password):
+    """Cria o usuário ou troca a senha dele (invalidando as sessões abertas)."""
+    if not username or not password:
+        raise ValueError("Usuário e senha não podem ser vazios")
+    users = _stored_users()
+    users[username] = _hash_credential(password)
+    _write_private(CREDENTIALS_FILE, json.dumps(users, indent=4).encode('utf-8'))
+
+def remove_user(username):
+    if using_default_credentials() and username == DEFAULT_ADMIN[0]:
+        raise KeyError(f"{username} é o usuário inicial, que vale enquanto não há arquivo de credenciais; "
+                       f"crie outro usuário (`python cli.py admin-user <nome>`) para substituí-lo")
+    users = _stored_users()
+    if users.pop(username, None) is None:
+        raise KeyError(f"Usuário inexistente: {username}")
+    _write_private(CREDENTIALS_FILE, json.dumps(users, indent=4).encode('utf-8'))
+
+def list_users():
+    return sorted(_load_users())
+
+def verify_password(username, password):
+    """Confere a senha com o scrypt (lento de propósito); usuário inexistente custa o mesmo tempo."""
+    credential = _load_users().get(username)
+    if credential is None:
+        _scrypt(password, b"\0" * 16)
+        return False
+    digest = _scrypt(password, bytes.fromhex(credential['salt']), credential['n'], credential['r'], credential['p'])
+    return hmac.compare_digest(digest.hex(), credential['hash'])
+
+# --- Tokens de Sessão ---
+def _read_secret():
+    try:
+        with open(SECRET_FILE, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+def _create_secret():
+    """Grava um segredo novo num arquivo temporário e o publica com link(): o nome só passa a
+    existir com o conteúdo completo e, se outra réplica publicou antes, vale o segredo dela."""
+    os.makedirs(os.path.dirname(SECRET_FILE) or ".", exist_ok=True)
+    tmp_path = f"{SECRET_FILE}.{os.getpid()}.{threading.get_ident()}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(secrets.token_bytes(32))
+    try:
+        os.link(tmp_path, SECRET_FILE)
+    except FileExistsError:
+        pass
+    finally:
+        os.remove(tmp_path)
+
+def _session_secret():
+    """Chave HMAC dos tokens; nunca usa (nem guarda) uma chave com menos de 32 bytes."""
+    secret = os.environ.get("CHECKLIST_SESSION_SECRET")
+    if secret:
+        if len(secret.encode('utf-8')) < 32:
+            raise RuntimeError("CHECKLIST_SESSION_SECRET precisa ter ao menos 32 bytes")
+        return secret.encode('utf-8')
+    if 'key' not in _secret_cache:
+        key = _read_secret()
+        if key is None:
+            _create_secret()
+            key = _read_secret()
+        if key is None or len(key) < 32:
+            raise RuntimeError(f"Segredo de sessão inválido em {SECRET_FILE} (menos de 32 bytes); apague o arquivo para gerar outro")
+        _secret_cache['key'] = key
+    return _secret_cache['key']
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode('ascii')
+
+def _unb64(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+def _credential_version(username):
+    credential = _load_users().get(username)
+    return credential['hash'][:8] if credential else None
+
+def _session_path(session_id):
+    return os.path.join(SESSIONS_DIR, session_id)
+
+def _sweep(directory, seconds):
+    """Apaga os registros (sessões, códigos de troca) mais velhos que `seconds`."""
+    oldest = time.time() - seconds
+    try:
+        entries = list(os.scandir(directory))
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        try:
+            if entry.stat().st_mtime < oldest:
+                os.remove(entry.path)
+        except FileNotFoundError:
+            pass
+
+def issue_session_token(username):
+    _sweep(SESSIONS_DIR, SESSION_HOURS * 3600)
+    session_id = secrets.token_urlsafe(16)
+    _write_private(_session_path(session_id), username.encode('utf-8'))
+    payload = {'u': username, 'exp': int(time.time() + SESSION_HOURS * 3600), 'v': _credential_version(username), 'sid': session_id}
+    body = _b64(json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+    signature = _b64(hmac.new(_session_secret(), body.encode('ascii'), hashlib.sha256).digest())
+    return f"{body}.{signature}"
+
+def _signed_payload(token):
+    """Conteúdo do token se a assinatura confere; senão None."""
+    try:
+        body, signature = token.split('.')
+        expected = _b64(hmac.new(_session_secret(), body.encode('ascii'), hashlib.sha256).digest())
+        if not hmac.compare_digest(signature, expected):
+            return None
+        payload = json.loads(_unb64(body))
+    except (AttributeError, ValueError, UnicodeError):
+        return None
+    return payload if isinstance(payload, dict) and isinstance(payload.get('sid'), str) else None
+
+def verify_session_token(token):
+    """Usuário do token se a assinatura, a validade, a versão da credencial e a sessão aberta conferem; senão None."""
+    payload = _signed_payload(token)
+    if payload is None or payload.get('exp', 0) < time.time() or payload.get('v') != _credential_version(payload.get('u')):
+        return None
+    if not os.path.exists(_session_path(payload['sid'])):
+        return None  # sessão encerrada (logout)
+    return payload['u']
+
+def revoke_session_token(token):
+    """Encerra a sessão do token: ele deixa de valer em todas as réplicas."""
+    payload = _signed_payload(token)
+    if payload is not None:
+        try:
+            os.remove(_session_path(payload['sid']))
+        except FileNotFoundError:
+            pass
+
+# --- Cookie de Sessão (serve.py) ---
+_HANDOFF_CODE = re.compile(r"^[A-Za-z0-9_-]{32}$")
+
+def issue_cookie_handoff(token):
+    """Código de uso único, válido por HANDOFF_SECONDS em qualquer réplica, que a rota
+    /admin/session troca pelo cookie com o token; a URL nunca leva o token."""
+    _sweep(HANDOFF_DIR, HANDOFF_SECONDS)
+    code = secrets.token_urlsafe(24)
+    _write_private(os.path.join(HANDOFF_DIR, code), token.encode('ascii'))
+    return code
+
+def redeem_cookie_handoff(code):
+    """Token do código, uma única vez e dentro do prazo; senão None."""
+    if not isinstance(code, str) or not _HANDOFF_CODE.match(code):
+        return None
+    path = os.path.join(HANDOFF_DIR, code)
+    claimed = f"{path}.{os.getpid()}.{threading.get_ident()}.claimed"
+    try:
+        os.replace(path, claimed)  # só um resgate consegue renomear o arquivo
+    except FileNotFoundError:
+        return None
+    try:
+        if os.stat(claimed).st_mtime < time.time() - HANDOFF_SECONDS:
+            return None
+        with open(claimed, 'rb') as f:
+            token = f.read().decode('ascii')
+    finally:
+        os.remove(claimed)
+    return token if verify_session_token(token) else None
+
+def login(username, password):
+    """Token de sessão para credenciais válidas; None caso contrário."""
+    if verify_password(username, password):
+        return issue_session_token(username)
+    return None
@@ -1,22 +1,25 @@
 import streamlit as st
-import json
-import os
 import pandas as pd
 import plotly.express as px
-import io
-from docx import Document
-from docx.shared import Inches
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_LEFT, TA_CENTER
-from reportlab.lib.units import inch
-
-# --- Constante para o arquivo de histórico ---
-COMPLETED_FILE = "completed_checklists.json"
+import json
+import tempfile
+from admin_auth import (COOKIE_SESSIONS, SESSION_COOKIE, issue_cookie_handoff, login, revoke_session_token,
+                        using_default_credentials, verify_session_token)
+from ticket_store import archive_stats, list_ticket_summaries, load_ticket, load_ticket_versions, ticket_version_count
+from ticket_history import changed_fields
+from report_downloads import queued_file_button, report_download_buttons
+from report_executor import PRIORITY_ADMIN, PRIORITY_BULK
+from change_feed import latest_sequence
+from attachments import THUMBNAILS_ENABLED, THUMBNAILS_MISSING, ready_thumbnail
+from warmup import STATE_RUNNING, warmup_status
+from checklist_schema import DEFAULT_TEMPLATE_ID, rack_key, template_for
+from ticket_export import FORMATS, MIME_TYPES, write_export
+from capacity import CAPACITY_COLUMNS, get_capacity_index
+from ticket_stats import STATUS_KEYS
+from perf_metrics import ENABLED as METRICS_ENABLED, prometheus_text, stage_summary, timed
 
 # --- CSS Melhorado (mesmo do app principal) ---
+@timed("admin.css")
 def load_admin_css():
     """Carrega e injeta o CSS customizado melhorado para o painel administrativo."""
     css = """
@@ -294,114 +297,225 @@ def load_admin_css():
     """
     st.markdown(css, unsafe_allow_html=True)
 
-# --- Funções de Persistência (duplicadas para modularidade) ---
-def load_completed_tickets():
-    if not os.path.exists(COMPLETED_FILE):
-        return {}
-    with open(COMPLETED_FILE, 'r', encoding='utf-8') as f:
-        try:
-            return json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            return {}
-
-# --- Funções de Geração de Relatório (duplicadas para modularidade) ---
-def get_report_data(ticket_data):
-    agencia = ticket_data.get('agencia', '')
-    cidade_uf = ticket_data.get('cidade_uf', '')
-    endereco = ticket_data.get('endereco', '')
-    num_racks = int(ticket_data.get('num_racks', 1))
-    
-    report_lines = ["TITLE: Check list Caixa Econômica", ""]
-    report_lines.extend([f"Agência: {agencia}", f"Cidade/UF: {cidade_uf}", f"Endereço: {endereco}", f"Quantidade de Rack na agência: {num_racks}", ""])
-
-    for i in range(1, num_racks + 1):
-        report_lines.extend([f"SUBTITLE: Rack {i}:", f"Local instalado: {ticket_data.get(f'rack_local_{i}', '')}", f"Tamanho do Rack {i} – Número de Us: {ticket_data.get(f'rack_tamanho_{i}', '')}", f"Quantidade de Us disponíveis: {ticket_data.get(f'rack_us_disponiveis_{i}', '')}", f"Quantidade de réguas de energia: {ticket_data.get(f'rack_reguas_{i}', '')}", f"Quantidade de tomadas disponíveis: {ticket_data.get(f'rack_tomadas_disponiveis_{i}', '')}", f"Disponibilidade para ampliação de réguas de energia: {ticket_data.get(f'rack_ampliacao_reguas_{i}', 'Não')}", f"Rack está em bom estado: {ticket_data.get(f'rack_estado_{i}', 'Não')}", f"Rack está organizado: {ticket_data.get(f'rack_organizado_{i}', 'Não')}", f"Equipamentos e cabeamentos identificados: {ticket_data.get(f'rack_identificado_{i}', 'Não')}", ""])
+# --- Funções de Exibição da UI do Admin ---
+def render_review_section(fields, data_source, i=None):
+    """Campos de uma seção do modelo em modo de leitura, nas colunas indicadas no modelo."""
+    columns = st.columns([1, 1])
+    for field in fields:
+        value = data_source.get(rack_key(field, i) if i is not None else field.key, 'N/A')
+        if field.widget == 'number':
+            value = int(data_source.get(field.key, 1))
+        with columns[field.column - 1]:
+            if field.widget == 'photos':
+                render_review_photos(field, value if isinstance(value, list) else [])
+                continue
+            st.markdown(f"**{field.review_label}:** {value}")
+
+def render_review_photos(field, refs):
+    st.markdown(f"**{field.review_label}:** {len(refs) or 'Nenhuma'}")
+    thumbnails = [(ready_thumbnail(ref['sha256']), ref['name']) for ref in refs]
+    shown = [(path, name) for path, name in thumbnails if path]
+    if shown:
+        st.image([path for path, _ in shown], caption=[name for _, name in shown], width=140)
+    if len(shown) < len(refs):
+        if not THUMBNAILS_ENABLED:
+            st.warning(f"🖼️ {len(refs)} foto(s) sem miniatura — {THUMBNAILS_MISSING}")
+        else:
+            st.caption(f"🖼️ {len(refs) - len(shown)} miniatura(s) em geração")
 
-    report_lines.extend(["SUBTITLE: Access Point (AP)", "", f"Verificar a quantidade de APs: {ticket_data.get('ap_quantidade', '')}", f"Identificar o setor onde será instalado*: {ticket_data.get('ap_setor', '')}", f"Verificar as condições da Instalação (se possui infra ou não): {ticket_data.get('ap_condicoes', '')}", f"** Altura que será instalado / distância do rack até o ponto de instalação: {ticket_data.get('ap_distancia', '')}"])
-    
-    return report_lines
-
-def create_pdf_report(ticket_data):
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=inch, leftMargin=inch, topMargin=inch, bottomMargin=inch)
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(name='Title', parent=styles['h1'], fontName='Helvetica-Bold', fontSize=14, alignment=TA_CENTER, spaceAfter=20)
-    subtitle_style = ParagraphStyle(name='Subtitle', parent=styles['h2'], fontName='Helvetica-Bold', fontSize=12, alignment=TA_LEFT, spaceAfter=10)
-    body_style = ParagraphStyle(name='Body', parent=styles['Normal'], fontName='Helvetica', fontSize=10, leading=14, spaceAfter=4)
-    story = []
-    for line in get_report_data(ticket_data):
-        if line.startswith("TITLE:"): story.append(Paragraph(line.replace("TITLE:", "").strip(), title_style))
-        elif line.startswith("SUBTITLE:"): story.append(Paragraph(line.replace("SUBTITLE:", "").strip(), subtitle_style))
-        elif line.strip() == "": story.append(Spacer(1, 0.1*inch))
-        else: story.append(Paragraph(line.replace("<br>", "&nbsp;<br/>&nbsp;"), body_style))
-    doc.build(story)
-    buffer.seek(0)
-    return buffer
-
-def create_docx_report(ticket_data):
-    document = Document()
-    for line in get_report_data(ticket_data):
-        if line.startswith("TITLE:"):
-            p = document.add_paragraph(); p.add_run(line.replace("TITLE:", "").strip()).bold = True; p.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        elif line.startswith("SUBTITLE:"):
-            p = document.add_paragraph(); p.add_run(line.replace("SUBTITLE:", "").strip()).bold = True
-        else: document.add_paragraph(line)
-    buffer = io.BytesIO(); document.save(buffer); buffer.seek(0)
-    return buffer
 
-# --- Funções de Exibição da UI do Admin ---
 def display_review_checklist(ticket_id, data_source):
-    """Renderiza o formulário em modo de leitura."""
+    """Renderiza o formulário em modo de leitura, com o modelo em que o chamado foi preenchido."""
+    template = template_for(data_source)
+    if template.id != DEFAULT_TEMPLATE_ID:
+        st.caption(f"📋 {template.title} (versão {template.version})")
     
-    with st.expander("📋 Informações Gerais da Agência", expanded=True):
-        col1, col2 = st.columns([1, 1])
-        with col1:
-            st.markdown(f"**🏢 Agência:** {data_source.get('agencia', 'N/A')}")
-            st.markdown(f"**📍 Endereço:** {data_source.get('endereco', 'N/A')}")
-        with col2:
-            st.markdown(f"**🌍 Cidade/UF:** {data_source.get('cidade_uf', 'N/A')}")
-            st.markdown(f"**🗄️ Quantidade de Racks:** {int(data_source.get('num_racks', 1))}")
-
-    num_racks = int(data_source.get('num_racks', 1))
-
-    with st.expander("🗄️ Detalhes dos Racks", expanded=True):
-        for i in range(1, num_racks + 1):
-            st.markdown(f"#### 📦 Rack {i}")
-            col1, col2 = st.columns([1, 1])
-            with col1:
-                st.markdown(f"**📍 Local:** {data_source.get(f'rack_local_{i}', 'N/A')}")
-                st.markdown(f"**📏 Tamanho (U's):** {data_source.get(f'rack_tamanho_{i}', 'N/A')}")
-                st.markdown(f"**📊 U's disponíveis:** {data_source.get(f'rack_us_disponiveis_{i}', 'N/A')}")
-                st.markdown(f"**⚡ Réguas de energia:** {data_source.get(f'rack_reguas_{i}', 'N/A')}")
-                st.markdown(f"**🔌 Tomadas disponíveis:** {data_source.get(f'rack_tomadas_disponiveis_{i}', 'N/A')}")
-            with col2:
-                st.markdown(f"**🔧 Permite ampliação de réguas:** {data_source.get(f'rack_ampliacao_reguas_{i}', 'N/A')}")
-                st.markdown(f"**✅ Bom estado:** {data_source.get(f'rack_estado_{i}', 'N/A')}")
-                st.markdown(f"**🗂️ Organizado:** {data_source.get(f'rack_organizado_{i}', 'N/A')}")
-                st.markdown(f"**🏷️ Identificado:** {data_source.get(f'rack_identificado_{i}', 'N/A')}")
-            if i < num_racks: st.markdown("---")
-            
-    with st.expander("📡 Access Point (AP)", expanded=True):
-        col1, col2 = st.columns([1, 1])
-        with col1:
-            st.markdown(f"**📊 APs existentes:** {data_source.get('ap_quantidade', 'N/A')}")
-            st.markdown(f"**🎯 Setor de instalação:** {data_source.get('ap_setor', 'N/A')}")
-        with col2:
-            st.markdown(f"**🔍 Condições da infra:** {data_source.get('ap_condicoes', 'N/A')}")
-            st.markdown(f"**📐 Altura/Distância:** {data_source.get('ap_distancia', 'N/A')}")
+    for section in template.sections:
+        with st.expander(section.title, expanded=True):
+            if not section.repeat:
+                render_review_section(section.fields, data_source)
+                continue
+            # Um item por vez, como no formulário: a revisão não cresce com a quantidade de itens.
+            count = template.item_count(data_source, section.repeat)
+            i = st.selectbox(f"📦 {section.item_label}", range(1, count + 1), key=f"review_item:{section.key}:{ticket_id}") if count > 1 else 1
+            st.markdown(f"#### 📦 {section.item_label} {i}")
+            render_review_section(section.fields, data_source, i)
 
     st.markdown("---")
     st.subheader("📄 Exportar Relatório")
-    d_col1, d_col2, d_col3 = st.columns(3)
-    with d_col1: 
-        st.download_button("📄 Baixar .TXT", "\n".join(get_report_data(data_source)), f"Checklist_{ticket_id.upper()}.txt", "text/plain")
-    with d_col2: 
-        st.download_button("📑 Baixar .PDF", create_pdf_report(data_source), f"Checklist_{ticket_id.upper()}.pdf", "application/pdf")
-    with d_col3: 
-        st.download_button("📝 Baixar .DOCX", create_docx_report(data_source), f"Checklist_{ticket_id.upper()}.docx", "application/vnd.openxmlformats-officedocument.wordprocessingml.document")
+    report_download_buttons(ticket_id, data_source, PRIORITY_ADMIN, f"review:{ticket_id}")
+
+
+HISTORY_LABELS = {'archived_at': "📅 Arquivado em", 'template': "📋 Modelo", 'template_version': "📋 Versão do modelo"}
+
+def display_version_history(ticket_id, versions):
+    """Compara duas versões arquivadas do chamado, listando apenas os campos que mudaram."""
+    with st.expander(f"🕘 Histórico de Versões ({len(versions)})", expanded=False):
+        numbers = list(versions)
+        v_col1, v_col2 = st.columns(2)
+        with v_col1:
+            old = st.selectbox("Versão anterior", numbers, index=len(numbers) - 2, key=f"history_old:{ticket_id}")
+        with v_col2:
+            new = st.selectbox("Versão posterior", numbers, index=len(numbers) - 1, key=f"history_new:{ticket_id}")
+        changes = changed_fields(versions[old], versions[new])
+        if not changes:
+            st.info("ℹ️ As versões selecionadas são iguais.")
+            return
+        template = template_for(versions[new])
+        shown = lambda value: "—" if value is None else str(value)
+        table = pd.DataFrame(
+            [(HISTORY_LABELS.get(key) or template.field_label(key), shown(old_value), shown(new_value)) for key, old_value, new_value in changes],
+            columns=["Campo", f"Versão {old}", f"Versão {new}"],
+        )
+        st.caption(f"{len(changes)} campos alterados")
+        st.dataframe(table, use_container_width=True, hide_index=True)
+
+
+UNKNOWN_LOCATION = "Não identificada"
+
+def display_location_rollup(uf_counts, cities_by_uf):
+    """Barras por UF (no máximo 27) e, para a UF escolhida, barras por cidade."""
+    uf_table = pd.DataFrame(
+        [(uf or UNKNOWN_LOCATION, count) for uf, count in uf_counts.items()], columns=['UF', 'Contagem']
+    )
+    with timed("admin.chart_build"):
+        fig_uf = px.bar(uf_table, x='UF', y='Contagem', title="📍 Distribuição de Chamados por UF",
+                        color='Contagem', color_continuous_scale='Blues')
+        fig_uf.update_layout(xaxis_title="UF", yaxis_title="Número de Chamados", showlegend=False)
+    st.plotly_chart(fig_uf, use_container_width=True)
+
+    ufs = list(uf_counts)
+    uf = st.selectbox("🔎 Detalhar UF", ufs, format_func=lambda uf: uf or UNKNOWN_LOCATION, key="location_drilldown_uf")
+    cities = sorted(cities_by_uf.get(uf, {}).items(), key=lambda item: item[1], reverse=True)
+    city_table = pd.DataFrame([(city or UNKNOWN_LOCATION, count) for city, count in cities], columns=['Cidade', 'Contagem'])
+    with timed("admin.chart_build"):
+        fig_city = px.bar(city_table.head(30), x='Cidade', y='Contagem', title=f"🏙️ Chamados por Cidade — {uf or UNKNOWN_LOCATION}",
+                          color='Contagem', color_continuous_scale='Blues')
+        fig_city.update_layout(xaxis_title="Cidade", yaxis_title="Número de Chamados", showlegend=False)
+    st.plotly_chart(fig_city, use_container_width=True)
+    if len(city_table) > 30:
+        st.caption(f"Exibindo as 30 cidades com mais chamados de {len(city_table)}.")
+
+
+def display_capacity_by_city(capacity_by_city):
+    """Us e tomadas livres somados por cidade, a partir dos agregados do histórico."""
+    st.subheader("🧮 Capacidade Livre por Cidade")
+    if not capacity_by_city:
+        st.info("ℹ️ Sem quantidades numéricas arquivadas (rode `python cli.py reindex` para os chamados antigos).")
+        return
+    capacity = pd.DataFrame.from_dict(capacity_by_city, orient='index', columns=['Racks', 'Us livres', 'Tomadas livres'])
+    capacity.index.name = 'Cidade/UF'
+    totals = capacity.sum()
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("🗄️ Racks somados", int(totals['Racks']))
+    with col2:
+        st.metric("📊 Us livres na frota", int(totals['Us livres']))
+    with col3:
+        st.metric("🔌 Tomadas livres na frota", int(totals['Tomadas livres']))
+
+    top_cities = capacity.sort_values('Us livres', ascending=False).head(20).reset_index()
+    with timed("admin.chart_build"):
+        fig_capacity = px.bar(
+            top_cities,
+            x='Cidade/UF',
+            y=['Us livres', 'Tomadas livres'],
+            barmode='group',
+            title="📍 Cidades com mais capacidade livre (top 20 por Us livres)",
+        )
+        fig_capacity.update_layout(xaxis_title="Cidade/UF", yaxis_title="Quantidade", legend_title_text="")
+    st.plotly_chart(fig_capacity, use_container_width=True)
+    st.dataframe(capacity.sort_values('Us livres', ascending=False), use_container_width=True)
+
+
+def display_capacity_planning():
+    """Busca agências com espaço e energia livres para uma implantação."""
+    st.header("🧭 Planejamento de Capacidade")
+    st.caption("Agências com algum rack que tenha ao menos os Us e as tomadas livres pedidos, ou com rack que permite ampliação de réguas.")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        min_free_u = st.number_input("📊 Us livres (mínimo)", min_value=0, step=1, value=4, key="capacity_min_u")
+    with col2:
+        min_free_outlets = st.number_input("🔌 Tomadas livres (mínimo)", min_value=0, step=1, value=2, key="capacity_min_outlets")
+    with col3:
+        city = st.text_input("🌍 Cidade/UF (opcional)", key="capacity_city", placeholder="Ex: Recife")
+    include_expandable = st.checkbox("🔧 Incluir agências com rack que permite ampliação de réguas", value=True, key="capacity_expandable")
+
+    index = get_capacity_index()
+    if not index.total_racks:
+        st.info("ℹ️ Sem quantidades numéricas arquivadas (rode `python cli.py reindex` para os chamados antigos).")
+        return
+    results = index.query(int(min_free_u), int(min_free_outlets), include_expandable, city)
+    st.metric("🏢 Agências encontradas", f"{len(results)} de {len(index.agencies)}")
+    if results:
+        table = pd.DataFrame(results, columns=CAPACITY_COLUMNS)
+        st.dataframe(table, use_container_width=True, hide_index=True)
+        st.download_button("📥 Baixar lista (CSV)", lambda: table.to_csv(index=False).encode('utf-8-sig'), "capacidade.csv", "text/csv")
+
+
+def build_archive_export(fmt, layout):
+    """Gera a exportação (na fila) em arquivo temporário que transborda para o disco; devolve
+    a leitura do arquivo, feita só no clique do download."""
+    spool = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    write_export(spool, fmt, layout)
+
+    def read_export():
+        spool.seek(0)
+        return spool.read()
+    return read_export
+
+
+def display_performance_metrics():
+    """Latências p50/p95 das etapas instrumentadas neste processo."""
+    st.header("⏱️ Desempenho por Etapa")
+    summary = stage_summary()
+    if not summary:
+        st.info("ℹ️ Nenhuma medição registrada ainda.")
+        return
+    rows = [
+        {'Etapa': stage, 'Execuções': s['count'], 'p50 (ms)': round(s['p50_ms'], 2), 'p95 (ms)': round(s['p95_ms'], 2), 'Total (s)': round(s['total_s'], 3)}
+        for stage, s in summary.items()
+    ]
+    st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+    st.download_button("📥 Baixar métricas (Prometheus)", prometheus_text(), "metrics.prom", "text/plain")
 
 
 # --- Telas do Admin ---
+# --- Sessão do Administrador ---
+# O token assinado fica no estado da sessão e nunca na URL, onde iria para o histórico do
+# navegador e para logs. Com o app servido por serve.py, ele também vai para um cookie
+# HttpOnly: uma sessão nova (recarga, reconexão em outra réplica) o recupera de
+# st.context.cookies, e o parâmetro ?pagina=admin a devolve ao painel. O logout revoga o
+# token no servidor (ver admin_auth), o que invalida também o cookie.
+def _navigate(url):
+    """Leva o navegador a uma rota do serve.py e encerra esta execução."""
+    st.html(f"<script>window.location.replace({json.dumps(url)})</script>", unsafe_allow_javascript=True)
+    st.stop()
+
+def start_admin_session(token):
+    st.session_state.admin_token = token
+    if COOKIE_SESSIONS:
+        _navigate(f"admin/session?code={issue_cookie_handoff(token)}")
+
+def end_admin_session():
+    st.query_params.pop('pagina', None)
+    token = st.session_state.pop('admin_token', None)
+    if token:
+        revoke_session_token(token)
+        if COOKIE_SESSIONS:
+            _navigate("admin/logout")
+
+def authenticated_admin():
+    """Usuário do token da sessão (ou do cookie, numa sessão nova); None sem sessão válida."""
+    token = st.session_state.get('admin_token')
+    if token is None and COOKIE_SESSIONS:
+        token = st.context.cookies.get(SESSION_COOKIE)
+    user = verify_session_token(token) if token else None
+    if user:
+        st.session_state.admin_token = token
+    return user
+
 def page_admin_login():
     load_admin_css()
     
@@ -420,8 +534,9 @@ def page_admin_login():
             back_button = st.form_submit_button("⬅️ Voltar")
             
         if submitted:
-            if username == "admin" and password == "admin":
-                st.session_state.logged_in = True
+            token = login(username, password)
+            if token:
+                start_admin_session(token)
                 st.session_state.page = 'admin_dashboard'
                 st.success("✅ Login realizado com sucesso!")
                 st.rerun()
@@ -435,10 +550,13 @@ def page_admin_login():
 def page_admin_dashboard():
     load_admin_css()
     
-    if not st.session_state.get('logged_in'):
+    admin_user = authenticated_admin()
+    if not admin_user:
+        st.session_state.pop('admin_token', None)
         st.session_state.page = 'admin_login'
         st.error("❌ Acesso negado. Por favor, faça o login.")
         st.rerun()
+    st.query_params['pagina'] = 'admin'
     
     st.title("📊 Painel Administrativo")
     
@@ -447,22 +565,44 @@ def page_admin_dashboard():
     with col_logout:
         if st.button("🚪 Sair", type="secondary"):
             st.session_state.page = 'main'
-            if 'logged_in' in st.session_state:
-                del st.session_state.logged_in
+            end_admin_session()
             st.rerun()
-
-    tab1, tab2 = st.tabs(["📋 Revisão de Chamados", "📈 Estatísticas"])
+    with col_title:
+        st.caption(f"👤 {admin_user}")
+    if using_default_credentials():
+        st.warning("⚠️ Usando a senha padrão do administrador. Defina outra com `python cli.py admin-user admin`.")
+    warmup = warmup_status()
+    if warmup['estado'] == STATE_RUNNING:
+        st.caption(f"🔥 Preparando os dados do painel em segundo plano ({warmup['etapa']})...")
+
+    tab_names = ["📋 Revisão de Chamados", "📈 Estatísticas", "🧭 Planejamento de Capacidade"]
+    if METRICS_ENABLED:
+        tab_names.append("⏱️ Performance")
+    tab1, tab2, tab3, *tab_perf = st.tabs(tab_names)
 
     with tab1:
         st.header("🔍 Revisar Chamados Concluídos")
-        completed_tickets = load_completed_tickets()
+        ticket_summaries = list_ticket_summaries()
         
-        if not completed_tickets:
+        if not ticket_summaries:
             st.info("ℹ️ Nenhum chamado concluído para revisar.")
         else:
-            st.success(f"✅ {len(completed_tickets)} chamados encontrados")
+            st.success(f"✅ {len(ticket_summaries)} chamados encontrados")
+
+            with st.expander("📦 Exportar Histórico Completo", expanded=False):
+                e_col1, e_col2 = st.columns([1, 1])
+                with e_col1:
+                    export_format = st.selectbox("📄 Formato", FORMATS, key="export_format")
+                with e_col2:
+                    export_layout = st.radio("🧾 Layout", ("wide", "long"), key="export_layout", horizontal=True,
+                                             format_func=lambda l: "Um chamado por linha" if l == 'wide' else "Um rack por linha")
+                # Exportação em lote: mesma fila e mesmo limite por sessão dos relatórios, atrás
+                # dos pedidos dos técnicos; vale enquanto o histórico não mudar.
+                queued_file_button("⬇️", "Histórico", build_archive_export, (export_format, export_layout), PRIORITY_BULK,
+                                   "export_file", (export_format, export_layout, latest_sequence()),
+                                   f"Checklists_{export_layout}.{export_format}", MIME_TYPES[export_format], "export")
             
-            options = ["Selecione um chamado..."] + list(completed_tickets.keys())
+            options = ["Selecione um chamado..."] + [ticket_id for ticket_id, _ in ticket_summaries]
             ticket_to_review = st.selectbox(
                 "🎫 Selecione um chamado:", 
                 options=options, 
@@ -471,50 +611,38 @@ def page_admin_dashboard():
             
             if ticket_to_review != "Selecione um chamado...":
                 st.subheader(f"📋 Revisando Chamado: {ticket_to_review.upper()}")
-                display_review_checklist(ticket_to_review, completed_tickets[ticket_to_review])
+                if ticket_version_count(ticket_to_review) > 1:
+                    versions = load_ticket_versions(ticket_to_review)
+                    st.warning(f"⚠️ Chamado arquivado {len(versions)} vezes; exibindo a versão mais recente.")
+                    display_version_history(ticket_to_review, versions)
+                display_review_checklist(ticket_to_review, load_ticket(ticket_to_review) or {})
 
     with tab2:
         st.header("📊 Estatísticas dos Checklists")
-        completed_tickets = load_completed_tickets()
+        ticket_summaries = list_ticket_summaries()
         
-        if not completed_tickets:
+        if not ticket_summaries:
             st.warning("⚠️ Não há dados de chamados concluídos para gerar estatísticas.")
         else:
-            df = pd.DataFrame.from_dict(completed_tickets, orient='index')
+            stats = archive_stats()
             
             # Métricas principais
             col1, col2, col3 = st.columns(3)
             with col1:
-                st.metric("📊 Total de Chamados", len(df))
+                st.metric("📊 Total de Chamados", stats['total_tickets'])
             with col2:
-                total_racks = df['num_racks'].astype(int).sum()
-                st.metric("🗄️ Total de Racks", total_racks)
+                st.metric("🗄️ Total de Racks", stats['total_racks'])
             with col3:
-                avg_racks = df['num_racks'].astype(int).mean()
-                st.metric("📈 Média de Racks/Chamado", f"{avg_racks:.1f}")
+                st.metric("📈 Média de Racks/Chamado", f"{stats['avg_racks']:.1f}")
 
             st.markdown("---")
 
-            # Gráfico de distribuição por localização
-            st.subheader("🌍 Chamados por Localização (Cidade/UF)")
-            if 'cidade_uf' in df.columns and not df['cidade_uf'].isna().all():
-                location_counts = df['cidade_uf'].value_counts().reset_index()
-                location_counts.columns = ['Localização', 'Contagem']
-                
-                fig_loc = px.bar(
-                    location_counts, 
-                    x='Localização', 
-                    y='Contagem', 
-                    title="📍 Distribuição de Chamados por Localização",
-                    color='Contagem',
-                    color_continuous_scale='Blues'
-                )
-                fig_loc.update_layout(
-                    xaxis_title="Localização",
-                    yaxis_title="Número de Chamados",
-                    showlegend=False
-                )
-                st.plotly_chart(fig_loc, use_container_width=True)
+            # Distribuição por UF, com detalhamento por cidade (totais pré-computados no índice)
+            st.subheader("🌍 Chamados por Localização (UF → Cidade)")
+            if stats['uf_counts']:
+                display_location_rollup(stats['uf_counts'], stats['cities_by_uf'])
+            elif stats['location_counts']:
+                st.info("ℹ️ Totais por UF indisponíveis para os chamados antigos. Rode `python cli.py reindex` para normalizar Cidade/UF.")
             else:
                 st.info("ℹ️ Dados de localização não disponíveis")
 
@@ -522,56 +650,56 @@ def page_admin_dashboard():
 
             # Análise de status dos racks
             st.subheader("🔍 Análise de Status dos Racks")
-            status_keys = {
-                'estado': '✅ Rack em bom estado', 
-                'organizado': '🗂️ Rack organizado', 
-                'identificado': '🏷️ Equipamentos identificados'
-            }
-            status_counts = {key: {'Sim': 0, 'Não': 0} for key in status_keys}
-            
-            for _, ticket_data in df.iterrows():
-                num_racks = int(ticket_data.get('num_racks', 1))
-                for i in range(1, num_racks + 1):
-                    for key, _ in status_keys.items():
-                        status_val = ticket_data.get(f'rack_{key}_{i}', 'Não')
-                        if status_val in ['Sim', 'Não']: 
-                            status_counts[key][status_val] += 1
+            status_keys = STATUS_KEYS
+            status_counts = stats['status_counts']
 
             col1, col2, col3 = st.columns(3)
             
             with col1:
                 if sum(status_counts['estado'].values()) > 0:
-                    fig1 = px.pie(
-                        values=list(status_counts['estado'].values()), 
-                        names=list(status_counts['estado'].keys()), 
-                        title=status_keys['estado'],
-                        color_discrete_sequence=['#10b981', '#ef4444']
-                    )
+                    with timed("admin.chart_build"):
+                        fig1 = px.pie(
+                            values=list(status_counts['estado'].values()), 
+                            names=list(status_counts['estado'].keys()), 
+                            title=status_keys['estado'],
+                            color_discrete_sequence=['#10b981', '#ef4444']
+                        )
                     st.plotly_chart(fig1, use_container_width=True)
                 else:
                     st.info("Sem dados")
                     
             with col2:
                 if sum(status_counts['organizado'].values()) > 0:
-                    fig2 = px.pie(
-                        values=list(status_counts['organizado'].values()), 
-                        names=list(status_counts['organizado'].keys()), 
-                        title=status_keys['organizado'],
-                        color_discrete_sequence=['#10b981', '#ef4444']
-                    )
+                    with timed("admin.chart_build"):
+                        fig2 = px.pie(
+                            values=list(status_counts['organizado'].values()), 
+                            names=list(status_counts['organizado'].keys()), 
+                            title=status_keys['organizado'],
+                            color_discrete_sequence=['#10b981', '#ef4444']
+                        )
                     st.plotly_chart(fig2, use_container_width=True)
                 else:
                     st.info("Sem dados")
                     
             with col3:
                 if sum(status_counts['identificado'].values()) > 0:
-                    fig3 = px.pie(
-                        values=list(status_counts['identificado'].values()), 
-                        names=list(status_counts['identificado'].keys()), 
-                        title=status_keys['identificado'],
-                        color_discrete_sequence=['#10b981', '#ef4444']
-                    )
+                    with timed("admin.chart_build"):
+                        fig3 = px.pie(
+                            values=list(status_counts['identificado'].values()), 
+                            names=list(status_counts['identificado'].keys()), 
+                            title=status_keys['identificado'],
+                            color_discrete_sequence=['#10b981', '#ef4444']
+                        )
                     st.plotly_chart(fig3, use_container_width=True)
                 else:
                     st.info("Sem dados")
 
+            st.markdown("---")
+            display_capacity_by_city(stats.get('capacity_by_city', {}))
+
+    with tab3:
+        display_capacity_planning()
+
+    if tab_perf:
+        with tab_perf[0]:
+            display_performance_metrics()
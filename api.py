@@ -0,0 +1,282 @@
+# --- API HTTP somente leitura para integrações ---
+# Aplicação ASGI pura (sem framework), servida fora do Streamlit:
+#   uvicorn api:app --host 0.0.0.0 --port 8600
+#
+# Rotas:
+#   GET /tickets?cidade_uf=&agencia=&limit=&offset=   listagem filtrada e paginada
+#   GET /tickets/{id}                                 chamado completo
+#   GET /tickets/{id}/report.{txt,pdf,docx}           relatório do chamado
+#   GET /stats                                        agregados do histórico
+#   GET /changes?since=&limit=                        feed de alterações após a sequência `since`
+#   GET /export.{csv,jsonl}?layout=wide|long          exportação completa em streaming
+#   GET /metrics, /metrics.json                       instrumentação (com CHECKLIST_METRICS=1)
+#   GET /ready                                        andamento do aquecimento (200 pronto, 503 aquecendo)
+# As respostas de /tickets, /stats e /changes levam ETag e respondem 304 a um If-None-Match
+# válido; /metrics, /metrics.json, /ready, as exportações e as respostas de erro não têm ETag.
+
+import asyncio
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from urllib.parse import parse_qs
+
+from change_feed import latest_sequence, read_changes
+from attachments import photo_hashes, thumbnails_ready
+from report_executor import EXECUTOR, PRIORITY_ADMIN, ExecutorSaturated, RateLimited
+from perf_metrics import prometheus_text, stage_summary
+from reports import get_report_data, create_pdf_report, create_docx_report
+from ticket_export import LAYOUTS, MIME_TYPES, iter_export_chunks
+from ticket_store import archive_stats, get_ticket_index, load_ticket, normalize_ticket_id, store_version
+from warmup import is_ready, prerendered_report, record_report_download, report_digest, start_warmup, warmup_status
+
+REPORT_FORMATS = {
+    'txt': "text/plain; charset=utf-8",
+    'pdf': "application/pdf",
+    'docx': "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+REPORT_CACHE_SIZE = 128
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+# --- Cache do Histórico (invalidado pela versão do store, comum a todas as réplicas) ---
+_snapshot = {'version': None, 'index': {}, 'etags': {}, 'stats': None}
+_report_cache = OrderedDict()
+_lock = threading.Lock()
+
+def _etag(payload):
+    return '"' + hashlib.sha1(payload).hexdigest() + '"'
+
+def _current_snapshot():
+    """Retrato do histórico na versão atual. Uma versão nova ganha um dicionário novo: quem
+    ainda atende com o retrato anterior continua vendo índice, ETags e agregados coerentes.
+    O índice é lido fora da trava, que só protege a troca (e é a mesma do cache de relatórios)."""
+    global _snapshot
+    version = store_version()
+    with _lock:
+        current = _snapshot
+    if current['version'] == version:
+        return current
+    fresh = {'version': version, 'index': get_ticket_index(), 'etags': {}, 'stats': None}
+    with _lock:
+        if _snapshot['version'] != version:
+            _snapshot = fresh
+        return _snapshot
+
+def _render_report(ticket_data, fmt):
+    if fmt == 'txt':
+        return "\n".join(get_report_data(ticket_data)).encode('utf-8')
+    builder = create_pdf_report if fmt == 'pdf' else create_docx_report
+    return builder(ticket_data).getvalue()
+
+def _queued_render(ticket_data, fmt, owner):
+    """TXT direto; PDF e DOCX pela fila de relatórios, com o limite de taxa por cliente."""
+    if fmt == 'txt':
+        return _render_report(ticket_data, fmt)
+    try:
+        return EXECUTOR.run(_render_report, ticket_data, fmt, priority=PRIORITY_ADMIN, owner=owner)
+    except RateLimited as e:
+        raise HTTPError(429, str(e))
+    except ExecutorSaturated as e:
+        raise HTTPError(503, str(e))
+
+# --- Handlers ---
+def _json_body(data):
+    return json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+def _get_ticket(snapshot, raw_id):
+    """(ticket_id, ETag, hashes das fotos, leitura do chamado). A ETag e as fotos ficam no
+    retrato da versão; o chamado só é lido e decodificado para calculá-las na primeira vez e
+    para gerar a resposta, nunca para responder 304."""
+    ticket_id = normalize_ticket_id(raw_id)
+    if ticket_id not in snapshot['index']:
+        raise HTTPError(404, f"Chamado {ticket_id} não encontrado")
+    cached = snapshot['etags'].get(ticket_id)
+    loaded = None
+    if cached is None:
+        loaded = load_ticket(ticket_id)
+        if loaded is None:
+            raise HTTPError(404, f"Chamado {ticket_id} não encontrado")
+        payload = json.dumps(loaded, sort_keys=True, ensure_ascii=False).encode('utf-8')
+        cached = snapshot['etags'][ticket_id] = (_etag(payload), tuple(photo_hashes(loaded)))
+
+    def load():
+        ticket_data = loaded if loaded is not None else load_ticket(ticket_id)
+        if ticket_data is None:
+            raise HTTPError(404, f"Chamado {ticket_id} não encontrado")
+        return ticket_data
+
+    return ticket_id, cached[0], cached[1], load
+
+def handle_ticket(snapshot, raw_id):
+    ticket_id, etag, _, load = _get_ticket(snapshot, raw_id)
+    return etag, "application/json", lambda: _json_body({'ticket_id': ticket_id, **load()})
+
+def handle_report(snapshot, raw_id, fmt, client=None):
+    if fmt not in REPORT_FORMATS:
+        raise HTTPError(404, f"Formato de relatório desconhecido: {fmt}")
+    ticket_id, etag, photos, load = _get_ticket(snapshot, raw_id)
+    # PDF/DOCX trazem as miniaturas das fotos: a ETag (e a chave do cache) muda quando
+    # aparecem miniaturas que ainda não existiam na geração anterior.
+    thumbnails = thumbnails_ready(photos) if fmt != 'txt' else ''
+    report_etag = _etag(f"{etag}|{fmt}|{thumbnails}".encode('utf-8'))
+
+    def render():
+        if fmt != 'txt':
+            record_report_download(ticket_id, fmt)  # contagem em memória, gravada em lote
+        key = report_etag
+        with _lock:
+            if key in _report_cache:
+                _report_cache.move_to_end(key)
+                return _report_cache[key]
+        ticket_data = load()
+        body = prerendered_report(ticket_id, fmt, report_digest(ticket_data)) if fmt != 'txt' else None
+        if body is None:
+            body = _queued_render(ticket_data, fmt, client)
+        with _lock:
+            _report_cache[key] = body
+            if len(_report_cache) > REPORT_CACHE_SIZE:
+                _report_cache.popitem(last=False)
+        return body
+
+    return report_etag, REPORT_FORMATS[fmt], render
+
+def _int_param(query, name, default, maximum=None):
+    try:
+        value = int(query.get(name, [default])[0])
+    except ValueError:
+        raise HTTPError(400, f"Parâmetro inválido: {name}")
+    if value < 0:
+        raise HTTPError(400, f"Parâmetro inválido: {name}")
+    return min(value, maximum) if maximum else value
+
+def handle_list(snapshot, query):
+    limit = _int_param(query, 'limit', DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+    offset = _int_param(query, 'offset', 0)
+    filters = {field: query[field][0].casefold() for field in ('cidade_uf', 'agencia') if query.get(field)}
+    etag = _etag(f"{snapshot['version']}|{sorted(query.items())}".encode('utf-8'))
+
+    def render():
+        matches = [
+            (ticket_id, summary) for ticket_id, summary in snapshot['index'].items()
+            if all(value in str(summary.get(field, '')).casefold() for field, value in filters.items())
+        ]
+        items = [
+            {'ticket_id': ticket_id, 'agencia': summary['agencia'], 'cidade_uf': summary['cidade_uf'], 'num_racks': summary['num_racks']}
+            for ticket_id, summary in matches[offset:offset + limit]
+        ]
+        return _json_body({'total': len(matches), 'limit': limit, 'offset': offset, 'items': items})
+
+    return etag, "application/json", render
+
+def handle_stats(snapshot):
+    def render():
+        if snapshot['stats'] is None:
+            snapshot['stats'] = _json_body(archive_stats())
+        return snapshot['stats']
+
+    return _etag(f"stats|{snapshot['version']}".encode('utf-8')), "application/json", render
+
+def handle_changes(query):
+    since = _int_param(query, 'since', 0)
+    limit = _int_param(query, 'limit', DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE) or DEFAULT_PAGE_SIZE
+    latest = latest_sequence()
+
+    def render():
+        events = [event for event, _ in read_changes(since, limit=limit)]
+        next_since = events[-1]['seq'] if events else since
+        return _json_body({'since': since, 'next_since': next_since, 'latest': latest, 'items': events})
+
+    return _etag(f"changes|{since}|{limit}|{latest}".encode('utf-8')), "application/json", render
+
+# --- Aplicação ASGI ---
+async def _send_response(send, status, headers, body=b""):
+    await send({'type': 'http.response.start', 'status': status, 'headers': [(k.encode(), v.encode()) for k, v in headers]})
+    await send({'type': 'http.response.body', 'body': body})
+
+async def _send_error(send, status, message):
+    await _send_response(send, status, [('content-type', "application/json")], _json_body({'erro': message}))
+
+async def _stream_export(send, fmt, layout):
+    await send({'type': 'http.response.start', 'status': 200, 'headers': [
+        (b'content-type', MIME_TYPES[fmt].encode()),
+        (b'content-disposition', f'attachment; filename="Checklists_{layout}.{fmt}"'.encode()),
+    ]})
+    chunks = iter_export_chunks(fmt, layout)
+    while True:
+        chunk = await asyncio.to_thread(next, chunks, None)
+        if chunk is None:
+            break
+        await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+    await send({'type': 'http.response.body', 'body': b""})
+
+def _route(snapshot, path, query, client=None):
+    parts = [p for p in path.split('/') if p]
+    if parts == ['tickets']:
+        return handle_list(snapshot, query)
+    if len(parts) == 2 and parts[0] == 'tickets':
+        return handle_ticket(snapshot, parts[1])
+    if len(parts) == 3 and parts[0] == 'tickets' and parts[2].startswith('report.'):
+        return handle_report(snapshot, parts[1], parts[2].split('.', 1)[1], client)
+    if parts == ['stats']:
+        return handle_stats(snapshot)
+    if parts == ['changes']:
+        return handle_changes(query)
+    raise HTTPError(404, "Rota não encontrada")
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                start_warmup()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    if scope['type'] != 'http':
+        return
+
+    if scope['method'] not in ('GET', 'HEAD'):
+        await _send_error(send, 405, "Método não permitido")
+        return
+    path = scope['path']
+    query = parse_qs(scope.get('query_string', b'').decode('utf-8'))
+
+    try:
+        if path == '/metrics':
+            await _send_response(send, 200, [('content-type', "text/plain; version=0.0.4")], prometheus_text().encode('utf-8'))
+            return
+        if path == '/metrics.json':
+            await _send_response(send, 200, [('content-type', "application/json")], _json_body(stage_summary()))
+            return
+        if path == '/ready':
+            start_warmup()  # servidores sem lifespan
+            await _send_response(send, 200 if is_ready() else 503, [('content-type', "application/json")], _json_body(warmup_status()))
+            return
+        if path in ('/export.csv', '/export.jsonl'):
+            layout = query.get('layout', ['wide'])[0]
+            if layout not in LAYOUTS:
+                raise HTTPError(400, f"Layout desconhecido: {layout}")
+            await _stream_export(send, path.rsplit('.', 1)[1], layout)
+            return
+
+        snapshot = await asyncio.to_thread(_current_snapshot)
+        client = (scope.get('client') or (None,))[0]
+        etag, content_type, render = await asyncio.to_thread(_route, snapshot, path, query, client)
+        headers = [('etag', etag), ('cache-control', "no-cache")]
+        if_none_match = dict(scope['headers']).get(b'if-none-match', b'').decode()
+        if etag in [tag.strip() for tag in if_none_match.split(',')]:
+            await _send_response(send, 304, headers)
+            return
+        body = await asyncio.to_thread(render)
+        headers.append(('content-type', content_type))
+        await _send_response(send, 200, headers, b"" if scope['method'] == 'HEAD' else body)
+    except HTTPError as e:
+        await _send_error(send, e.status, e.message)
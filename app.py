@@ -3,18 +3,13 @@
 # pip install streamlit python-docx reportlab pandas plotly
 
 import streamlit as st
-import datetime
-import io
-import json
-import os
-from docx import Document
-from docx.shared import Inches
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_LEFT, TA_CENTER
-from reportlab.lib.units import inch
+from perf_metrics import timed
+from ticket_store import save_completed_ticket, normalize_ticket_id
+from report_downloads import report_download_buttons
+from report_executor import PRIORITY_TECHNICIAN
+from attachments import ACCEPTED_TYPES, THUMBNAILS_ENABLED, THUMBNAILS_MISSING, AttachmentError, ready_thumbnail, store_attachment
+from checklist_schema import DEFAULT_TEMPLATE_ID, LATEST_TEMPLATES, MAX_ITEMS, default_value, get_template, rack_key
+from warmup import start_warmup
 
 # --- Configuração da Página ---
 st.set_page_config(
@@ -23,10 +18,8 @@ st.set_page_config(
     layout="wide",
 )
 
-# --- Constante para o arquivo de histórico ---
-COMPLETED_FILE = "completed_checklists.json"
-
 # --- CSS Melhorado para um Design Responsivo e Legível ---
+@timed("app.css")
 def load_css():
     """Carrega e injeta o CSS customizado melhorado para estilizar a aplicação."""
     css = """
@@ -409,106 +402,141 @@ def load_css():
     """
     st.markdown(css, unsafe_allow_html=True)
 
-# --- Funções de Persistência ---
-def load_completed_tickets():
-    if not os.path.exists(COMPLETED_FILE):
-        return {}
-    with open(COMPLETED_FILE, 'r', encoding='utf-8') as f:
-        try:
-            return json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            return {}
-
-def save_completed_ticket(ticket_id, data):
-    all_completed = load_completed_tickets()
-    all_completed[ticket_id] = data
-    with open(COMPLETED_FILE, 'w', encoding='utf-8') as f:
-        json.dump(all_completed, f, indent=4, ensure_ascii=False)
-
-
-# --- Funções de Geração de Relatório ---
-def get_report_data(ticket_data):
-    agencia = ticket_data.get('agencia', '')
-    cidade_uf = ticket_data.get('cidade_uf', '')
-    endereco = ticket_data.get('endereco', '')
-    num_racks = int(ticket_data.get('num_racks', 1))
-    
-    report_lines = ["TITLE: Check list Caixa Econômica", ""]
-    report_lines.extend([f"Agência: {agencia}", f"Cidade/UF: {cidade_uf}", f"Endereço: {endereco}", f"Quantidade de Rack na agência: {num_racks}", ""])
-
-    for i in range(1, num_racks + 1):
-        report_lines.extend([f"SUBTITLE: Rack {i}:", f"Local instalado: {ticket_data.get(f'rack_local_{i}', '')}", f"Tamanho do Rack {i} – Número de Us: {ticket_data.get(f'rack_tamanho_{i}', '')}", f"Quantidade de Us disponíveis: {ticket_data.get(f'rack_us_disponiveis_{i}', '')}", f"Quantidade de réguas de energia: {ticket_data.get(f'rack_reguas_{i}', '')}", f"Quantidade de tomadas disponíveis: {ticket_data.get(f'rack_tomadas_disponiveis_{i}', '')}", f"Disponibilidade para ampliação de réguas de energia: {ticket_data.get(f'rack_ampliacao_reguas_{i}', 'Não')}", f"Rack está em bom estado: {ticket_data.get(f'rack_estado_{i}', 'Não')}", f"Rack está organizado: {ticket_data.get(f'rack_organizado_{i}', 'Não')}", f"Equipamentos e cabeamentos identificados: {ticket_data.get(f'rack_identificado_{i}', 'Não')}", ""])
-
-    report_lines.extend(["SUBTITLE: Access Point (AP)", "", f"Verificar a quantidade de APs: {ticket_data.get('ap_quantidade', '')}", f"Identificar o setor onde será instalado*: {ticket_data.get('ap_setor', '')}", f"Verificar as condições da Instalação (se possui infra ou não): {ticket_data.get('ap_condicoes', '')}", f"** Altura que será instalado / distância do rack até o ponto de instalação: {ticket_data.get('ap_distancia', '')}"])
-    
-    return report_lines
-
-def create_pdf_report(ticket_data):
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=inch, leftMargin=inch, topMargin=inch, bottomMargin=inch)
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(name='Title', parent=styles['h1'], fontName='Helvetica-Bold', fontSize=14, alignment=TA_CENTER, spaceAfter=20)
-    subtitle_style = ParagraphStyle(name='Subtitle', parent=styles['h2'], fontName='Helvetica-Bold', fontSize=12, alignment=TA_LEFT, spaceAfter=10)
-    body_style = ParagraphStyle(name='Body', parent=styles['Normal'], fontName='Helvetica', fontSize=10, leading=14, spaceAfter=4)
-    story = []
-    for line in get_report_data(ticket_data):
-        if line.startswith("TITLE:"): story.append(Paragraph(line.replace("TITLE:", "").strip(), title_style))
-        elif line.startswith("SUBTITLE:"): story.append(Paragraph(line.replace("SUBTITLE:", "").strip(), subtitle_style))
-        elif line.strip() == "": story.append(Spacer(1, 0.1*inch))
-        else: story.append(Paragraph(line.replace("<br>", "&nbsp;<br/>&nbsp;"), body_style))
-    doc.build(story)
-    buffer.seek(0)
-    return buffer
-
-def create_docx_report(ticket_data):
-    document = Document()
-    for line in get_report_data(ticket_data):
-        if line.startswith("TITLE:"):
-            p = document.add_paragraph(); p.add_run(line.replace("TITLE:", "").strip()).bold = True; p.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        elif line.startswith("SUBTITLE:"):
-            p = document.add_paragraph(); p.add_run(line.replace("SUBTITLE:", "").strip()).bold = True
-        else: document.add_paragraph(line)
-    buffer = io.BytesIO(); document.save(buffer); buffer.seek(0)
-    return buffer
-
 # --- Funções de Exibição da UI ---
+def render_field(field, key, i=None):
+    """Cria o widget de um campo do modelo ligado à chave `key` do session_state."""
+    label = field.label.format(i=i) if i is not None else field.label
+    if field.widget == 'number':
+        st.number_input(label, min_value=1, max_value=MAX_ITEMS, step=1, key=key)
+    elif field.widget == 'radio':
+        st.radio(label, field.options, key=key, horizontal=True)
+    else:
+        st.text_input(label, key=key, placeholder=field.placeholder)
+
+def render_photos(field, key, ticket_id, i=None):
+    """Fotos de um campo: o chamado guarda só as referências (lista em `key`); os arquivos vão
+    para o disco assim que chegam e o envio é reiniciado (chave nova), liberando a memória
+    que o Streamlit mantém para os arquivos do widget."""
+    label = field.label.format(i=i) if i is not None else field.label
+    refs = st.session_state.setdefault(key, [])
+    counter = f"upload_n:{key}:{ticket_id}"
+    n = st.session_state.get(counter, 0)
+    uploads = st.file_uploader(label, type=list(ACCEPTED_TYPES), accept_multiple_files=True, key=f"upload:{key}:{n}:{ticket_id}")
+    if uploads:
+        errors = []
+        known = {ref['sha256'] for ref in refs}
+        for upload in uploads:
+            try:
+                ref = store_attachment(upload, upload.name, upload.type)
+            except AttachmentError as e:
+                errors.append(str(e))
+                continue
+            if ref['sha256'] not in known:
+                refs.append(ref)
+                known.add(ref['sha256'])
+        st.session_state[counter] = n + 1
+        if not errors:
+            st.rerun()
+        for message in errors:
+            st.caption(f"⚠️ {message}")
+    if refs:
+        columns = st.columns(3)
+        for n, ref in enumerate(list(refs)):
+            with columns[n % 3]:
+                thumbnail = ready_thumbnail(ref['sha256'])
+                if thumbnail:
+                    st.image(thumbnail, caption=ref['name'], use_container_width=True)
+                elif not THUMBNAILS_ENABLED:
+                    st.caption(f"🖼️ {ref['name']} ({THUMBNAILS_MISSING})")
+                else:
+                    st.caption(f"🖼️ {ref['name']} (gerando miniatura...)")
+                if st.button("🗑️ Remover", key=f"foto:{key}:{ref['sha256'][:12]}:{ticket_id}"):
+                    refs.remove(ref)
+                    st.rerun()
+
+def render_section(template, fields, ticket_id, i=None):
+    """Distribui os campos de uma seção nas duas colunas indicadas no modelo, avisando logo
+    abaixo de cada campo quando o valor digitado não passa na validação do modelo."""
+    columns = st.columns([1, 1])
+    names = {field.key: rack_key(field, i) if i is not None else field.key for field in fields}
+    values = {name: st.session_state.get(f'{name}_{ticket_id}') for name in names.values()}
+    values = {name: value for name, value in values.items() if value is not None}
+    for field in fields:
+        with columns[field.column - 1]:
+            if field.widget == 'photos':
+                render_photos(field, f'{names[field.key]}_{ticket_id}', ticket_id, i)
+                continue
+            render_field(field, f'{names[field.key]}_{ticket_id}', i)
+            if field.widget == 'text' and (field.check or field.max_field):
+                error = template.check_field(field, values, i)
+                if error:
+                    st.caption(f"⚠️ {error}")
+
+def keep_item_state(section, ticket_id, count):
+    """Mantém no session_state os valores de todos os itens, inclusive dos que não estão na tela.
+
+    O Streamlit descarta o estado de widgets não desenhados na execução; regravar a chave
+    a transforma em estado da sessão, que sobrevive enquanto só um item é materializado.
+    Itens ainda não abertos recebem os mesmos valores iniciais dos widgets.
+    """
+    for i in range(1, count + 1):
+        for field in section.fields:
+            key = f'{rack_key(field, i)}_{ticket_id}'
+            st.session_state[key] = st.session_state.get(key, default_value(field))
+
+def collect_ticket_data(ticket_id):
+    """Dados do formulário. Itens acima da quantidade atual (o técnico diminuiu o número de
+    racks) continuam na sessão, caso a quantidade volte a subir, mas não entram no chamado."""
+    data = {key.replace(f"_{ticket_id}", ""): value for key, value in st.session_state.items() if str(key).endswith(f"_{ticket_id}")}
+    template = active_template(ticket_id)
+    for section in template.repeat_sections:
+        count = template.item_count(data, section.repeat)
+        names = {field.key for field in section.fields}
+        for key in list(data):
+            base, _, suffix = key.rpartition('_')
+            if base in names and suffix.isdigit() and int(suffix) > count:
+                del data[key]
+    return data
+
+def item_title(section, ticket_id, i):
+    name = st.session_state.get(f'{rack_key(section.fields[0], i)}_{ticket_id}', '')
+    return f"📦 {section.item_label} {i} — {name}" if name else f"📦 {section.item_label} {i}"
+
+def active_template(ticket_id):
+    """Modelo escolhido ao iniciar o chamado (gravado junto com os dados do formulário)."""
+    return get_template(st.session_state.get(f'template_{ticket_id}', DEFAULT_TEMPLATE_ID),
+                        st.session_state.get(f'template_version_{ticket_id}'))
+
+@st.fragment
+def display_item_editor(section, ticket_id, count):
+    """Edita um item (rack, ponto...) por vez: só o item selecionado tem widgets, e interagir com
+    eles reexecuta apenas este fragmento, mantendo o tempo de resposta independente da quantidade."""
+    with timed("app.item_editor"):
+        i = st.selectbox(f"📦 {section.item_label} em edição", range(1, count + 1), key=f"item_em_edicao:{section.key}:{ticket_id}") if count > 1 else 1
+        st.markdown(f"#### {item_title(section, ticket_id, i)}")
+        render_section(active_template(ticket_id), section.fields, ticket_id, i)
+        refresh_report_snapshot(ticket_id)
+
+def refresh_report_snapshot(ticket_id):
+    """Atualiza, no mesmo objeto, os dados usados pelos downloads gerados sob demanda."""
+    snapshot = st.session_state.setdefault(f"relatorio:{ticket_id}", {})
+    snapshot.clear()
+    snapshot.update(collect_ticket_data(ticket_id))
+    return snapshot
+
 def display_checklist_form(ticket_id):
-    """Renderiza os campos do formulário para um determinado chamado."""
-    
-    with st.expander("📋 Informações Gerais da Agência", expanded=True):
-        col1, col2 = st.columns([1, 1])
-        with col1:
-            st.text_input("🏢 Agência", key=f'agencia_{ticket_id}', placeholder="Digite o nome da agência")
-            st.text_input("📍 Endereço", key=f'endereco_{ticket_id}', placeholder="Endereço completo")
-        with col2:
-            st.text_input("🌍 Cidade/UF", key=f'cidade_uf_{ticket_id}', placeholder="Ex: São Paulo/SP")
-            st.number_input("🗄️ Quantidade de Racks na agência", min_value=1, step=1, key=f'num_racks_{ticket_id}')
+    """Renderiza os campos do formulário para um determinado chamado a partir do seu modelo."""
+    template = active_template(ticket_id)
     
-    num_racks = int(st.session_state.get(f'num_racks_{ticket_id}', 1))
-
-    with st.expander("🗄️ Detalhes dos Racks", expanded=True):
-        for i in range(1, num_racks + 1):
-            st.markdown(f"#### 📦 Rack {i}")
-            c1, c2 = st.columns([1, 1])
-            with c1:
-                st.text_input(f"📍 Local instalado", key=f'rack_local_{i}_{ticket_id}', placeholder="Ex: Sala de TI")
-                st.text_input(f"📏 Tamanho do Rack {i} – Número de Us", key=f'rack_tamanho_{i}_{ticket_id}', placeholder="Ex: 42U")
-                st.text_input(f"📊 Quantidade de Us disponíveis", key=f'rack_us_disponiveis_{i}_{ticket_id}', placeholder="Ex: 15U")
-                st.text_input(f"⚡ Quantidade de réguas de energia", key=f'rack_reguas_{i}_{ticket_id}', placeholder="Ex: 2")
-                st.text_input(f"🔌 Quantidade de tomadas disponíveis", key=f'rack_tomadas_disponiveis_{i}_{ticket_id}', placeholder="Ex: 8")
-            with c2:
-                radio_options = ("Sim", "Não")
-                st.radio("🔧 Disponibilidade para ampliação de réguas de energia", radio_options, key=f'rack_ampliacao_reguas_{i}_{ticket_id}', horizontal=True)
-                st.radio("✅ Rack está em bom estado", radio_options, key=f'rack_estado_{i}_{ticket_id}', horizontal=True)
-                st.radio("🗂️ Rack está organizado", radio_options, key=f'rack_organizado_{i}_{ticket_id}', horizontal=True)
-                st.radio("🏷️ Equipamentos e cabeamentos identificados", radio_options, key=f'rack_identificado_{i}_{ticket_id}', horizontal=True)
-            if i < num_racks: st.markdown("---")
-
-    with st.expander("📡 Access Point (AP)", expanded=True):
-        st.text_input("📊 Verificar a quantidade de APs", key=f'ap_quantidade_{ticket_id}', placeholder="Ex: 5")
-        st.text_input("🎯 Identificar o setor onde será instalado*", key=f'ap_setor_{ticket_id}', placeholder="Ex: Recepção, Gerência")
-        st.text_input("🔍 Verificar as condições da Instalação", key=f'ap_condicoes_{ticket_id}', placeholder="Possui infra ou não")
-        st.text_input("📐 ** Altura que será instalado / distância do rack", key=f'ap_distancia_{ticket_id}', placeholder="Ex: 3m altura / 15m distância")
+    for section in template.sections:
+        if section.repeat:
+            count = int(st.session_state.get(f'{section.repeat}_{ticket_id}', 1))
+            keep_item_state(section, ticket_id, count)
+            with st.expander(section.title, expanded=True):
+                display_item_editor(section, ticket_id, count)
+        else:
+            with st.expander(section.title, expanded=True):
+                render_section(template, section.fields, ticket_id)
     
     st.markdown("---")
     st.subheader("🎯 Ações")
@@ -516,74 +544,81 @@ def display_checklist_form(ticket_id):
     col_action1, col_action2 = st.columns([2, 1])
     with col_action1:
         if st.button("✅ Concluir e Arquivar Chamado", key=f"complete_{ticket_id}", type="primary"):
-            current_ticket_data = {key.replace(f"_{ticket_id}", ""): value for key, value in st.session_state.items() if str(key).endswith(f"_{ticket_id}")}
-            save_completed_ticket(ticket_id, current_ticket_data)
-            st.session_state.active_ticket_id = None
-            st.success(f"✅ Chamado {ticket_id} arquivado com sucesso!")
-            st.rerun()
+            ticket_data = collect_ticket_data(ticket_id)
+            errors = template.validate(ticket_data)
+            if errors:
+                st.error("❌ Corrija os campos antes de arquivar:\n\n" + "\n".join(f"- {message}" for message in errors.values()))
+            else:
+                save_completed_ticket(ticket_id, template.parse_numbers(ticket_data))
+                st.session_state.active_ticket_id = None
+                st.success(f"✅ Chamado {ticket_id} arquivado com sucesso!")
+                st.rerun()
     
     with col_action2:
         if st.button("🔄 Iniciar outro chamado", key=f"new_ticket_{ticket_id}"):
             st.session_state.active_ticket_id = None
             st.rerun()
 
-    final_ticket_data = {key.replace(f"_{ticket_id}", ""): value for key, value in st.session_state.items() if str(key).endswith(f"_{ticket_id}")}
+    # Os relatórios só são gerados no clique, a partir do retrato mais recente do formulário;
+    # PDF e DOCX do técnico têm prioridade na fila de relatórios.
+    final_ticket_data = refresh_report_snapshot(ticket_id)
     
     st.markdown("### 📄 Exportar Relatório")
-    d_col1, d_col2, d_col3 = st.columns(3)
-    with d_col1: 
-        st.download_button("📄 Baixar .TXT", "\n".join(get_report_data(final_ticket_data)), f"Checklist_{ticket_id.upper()}.txt", "text/plain")
-    with d_col2: 
-        st.download_button("📑 Baixar .PDF", create_pdf_report(final_ticket_data), f"Checklist_{ticket_id.upper()}.pdf", "application/pdf")
-    with d_col3: 
-        st.download_button("📝 Baixar .DOCX", create_docx_report(final_ticket_data), f"Checklist_{ticket_id.upper()}.docx", "application/vnd.openxmlformats-officedocument.wordprocessingml.document")
+    report_download_buttons(ticket_id, final_ticket_data, PRIORITY_TECHNICIAN, f"form:{ticket_id}")
 
 # --- Lógica Principal da Aplicação ---
-load_css()
+# Medida com `with`: uma execução encerrada por st.rerun() (exceção de controle do
+# Streamlit) também é registrada.
+with timed("app.rerun"):
+    start_warmup()  # só na primeira execução do processo; roda em segundo plano
+    load_css()
 
-# Inicializa o estado da sessão
-if 'active_ticket_id' not in st.session_state:
-    st.session_state.active_ticket_id = None
+    # Inicializa o estado da sessão
+    if 'active_ticket_id' not in st.session_state:
+        st.session_state.active_ticket_id = None
 
-st.title("🛠️ Ferramenta de Checklist de Campo")
+    st.title("🛠️ Ferramenta de Checklist de Campo")
 
-if st.session_state.active_ticket_id is None:
-    st.header("🚀 Iniciar Novo Checklist")
+    if st.session_state.active_ticket_id is None:
+        st.header("🚀 Iniciar Novo Checklist")
     
-    # Botão para acessar painel administrativo
-    col_main, col_admin = st.columns([3, 1])
-    with col_admin:
-        if st.button("🔐 Login ADM"):
-            st.session_state.page = 'admin_login'
-            st.rerun()
+        # Botão para acessar painel administrativo
+        col_main, col_admin = st.columns([3, 1])
+        with col_admin:
+            if st.button("🔐 Login ADM"):
+                st.session_state.page = 'admin_login'
+                st.rerun()
     
-    with st.form("new_ticket_form"):
-        st.markdown("### 🎫 Informações do Chamado")
-        ticket_id_input = st.text_input("🔢 Insira o código do chamado:", placeholder="Ex: 12345 ou CLAR-12345")
-        submitted = st.form_submit_button("🚀 Iniciar Checklist", type="primary")
+        with st.form("new_ticket_form"):
+            st.markdown("### 🎫 Informações do Chamado")
+            ticket_id_input = st.text_input("🔢 Insira o código do chamado:", placeholder="Ex: 12345 ou CLAR-12345")
+            template_id = st.selectbox("📋 Tipo de checklist", sorted(LATEST_TEMPLATES, key=lambda t: t != DEFAULT_TEMPLATE_ID), format_func=lambda t: LATEST_TEMPLATES[t].title)
+            submitted = st.form_submit_button("🚀 Iniciar Checklist", type="primary")
         
-        if submitted and ticket_id_input:
-            formatted_id = ticket_id_input.strip().upper()
-            if formatted_id.isdigit(): 
-                formatted_id = f"CLAR-{formatted_id}"
-            elif not formatted_id.startswith("CLAR-"): 
-                formatted_id = f"CLAR-{formatted_id}"
+            if submitted and ticket_id_input:
+                formatted_id = normalize_ticket_id(ticket_id_input)
             
-            st.session_state.active_ticket_id = formatted_id
-            for key in list(st.session_state.keys()):
-                if key.endswith(f"_{formatted_id}"): 
-                    del st.session_state[key]
-            st.rerun()
-else:
-    ticket_id = st.session_state.active_ticket_id
-    st.header(f"📋 Preenchendo Chamado: {ticket_id}")
-    display_checklist_form(ticket_id)
-
-# --- Lógica de Navegação para Admin ---
-if st.session_state.get('page') == 'admin_login':
-    from admin_page import page_admin_login
-    page_admin_login()
-elif st.session_state.get('page') == 'admin_dashboard':
-    from admin_page import page_admin_dashboard
-    page_admin_dashboard()
-
+                st.session_state.active_ticket_id = formatted_id
+                for key in list(st.session_state.keys()):
+                    if key.endswith((f"_{formatted_id}", f":{formatted_id}")): 
+                        del st.session_state[key]
+                # O chamado guarda a versão do modelo com que foi preenchido.
+                st.session_state[f'template_{formatted_id}'] = template_id
+                st.session_state[f'template_version_{formatted_id}'] = LATEST_TEMPLATES[template_id].version
+                st.rerun()
+    else:
+        ticket_id = st.session_state.active_ticket_id
+        st.header(f"📋 Preenchendo Chamado: {ticket_id}")
+        display_checklist_form(ticket_id)
+
+    # --- Lógica de Navegação para Admin ---
+    # Sessão nova com ?pagina=admin (recarga, reconexão em outra réplica): volta ao painel,
+    # que confere o acesso pelo cookie de sessão (ver admin_page).
+    if 'page' not in st.session_state and st.query_params.get('pagina') == 'admin':
+        st.session_state.page = 'admin_dashboard'
+    if st.session_state.get('page') == 'admin_login':
+        from admin_page import page_admin_login
+        page_admin_login()
+    elif st.session_state.get('page') == 'admin_dashboard':
+        from admin_page import page_admin_dashboard
+        page_admin_dashboard()
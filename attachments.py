@@ -0,0 +1,195 @@
+# --- Anexos (fotos dos racks) ---
+# Os arquivos enviados são copiados em blocos para BLOB_DIR, com o nome igual ao SHA-256 do
+# conteúdo: a mesma foto enviada duas vezes (ou em dois chamados) ocupa espaço uma vez só.
+# O chamado guarda apenas referências ({'sha256', 'name', 'size', 'type'}), nunca os bytes.
+# As miniaturas (JPEG de até THUMBNAIL_SIZE px) são geradas fora da execução da página, na
+# fila de relatórios com a menor prioridade; relatórios usam só as miniaturas, limitados a
+# REPORT_MAX_IMAGES fotos e a REPORT_IMAGE_BUDGET_S segundos para gerar as que faltarem.
+# Fotos com mais de MAX_IMAGE_PIXELS pixels (bombas de descompressão) ou que o Pillow não
+# consegue decodificar ficam sem miniatura; a falha é lembrada por THUMBNAIL_RETRY_S segundos
+# para que cada exibição da foto não a coloque de novo na fila.
+
+import hashlib
+import os
+import threading
+import time
+
+from perf_metrics import timed
+from report_executor import EXECUTOR, PRIORITY_BACKGROUND, ExecutorSaturated
+
+try:
+    from PIL import Image
+except ImportError:  # sem Pillow: anexos continuam sendo guardados, mas sem miniaturas
+    Image = None
+
+THUMBNAILS_ENABLED = Image is not None
+THUMBNAILS_MISSING = "miniaturas indisponíveis: instale o Pillow (requirements.txt)"
+
+DATA_DIR = os.environ.get("CHECKLIST_DATA_DIR", ".")
+BLOB_DIR = os.path.join(DATA_DIR, "blobs")
+THUMB_DIR = os.path.join(BLOB_DIR, "thumbs")
+MAX_ATTACHMENT_BYTES = int(float(os.environ.get("CHECKLIST_ATTACHMENT_MAX_MB", "15")) * 1024 * 1024)
+THUMBNAIL_SIZE = 480
+REPORT_MAX_IMAGES = int(os.environ.get("CHECKLIST_REPORT_MAX_IMAGES", "60"))
+REPORT_IMAGE_BUDGET_S = float(os.environ.get("CHECKLIST_REPORT_IMAGE_BUDGET_S", "10"))
+MAX_IMAGE_PIXELS = int(os.environ.get("CHECKLIST_MAX_IMAGE_PIXELS", "50000000"))
+THUMBNAIL_RETRY_S = float(os.environ.get("CHECKLIST_THUMBNAIL_RETRY_S", "600"))
+ACCEPTED_TYPES = ("jpg", "jpeg", "png", "webp")
+_CHUNK = 256 * 1024
+
+# Erros de uma foto ruim: arquivo corrompido ou desconhecido (OSError, SyntaxError,
+# ValueError) ou grande demais (DecompressionBombError).
+if THUMBNAILS_ENABLED:
+    Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+    DECODE_ERRORS = (OSError, SyntaxError, ValueError, Image.DecompressionBombError)
+else:
+    DECODE_ERRORS = (OSError,)
+
+class AttachmentError(ValueError):
+    """Anexo recusado (tamanho ou tipo)."""
+
+_pending_thumbnails = set()
+_failed_thumbnails = {}  # sha256 -> instante (monotonic) a partir do qual vale tentar de novo
+_pending_lock = threading.Lock()
+
+def blob_path(sha256):
+    return os.path.join(BLOB_DIR, sha256[:2], sha256)
+
+def thumbnail_path(sha256):
+    return os.path.join(THUMB_DIR, f"{sha256}.jpg")
+
+# --- Gravação ---
+@timed("attachments.store")
+def store_attachment(fileobj, name, content_type=None):
+    """Copia o arquivo em blocos para o diretório de blobs e devolve a referência a guardar no chamado."""
+    extension = name.rsplit('.', 1)[-1].lower() if '.' in name else ''
+    if extension not in ACCEPTED_TYPES:
+        raise AttachmentError(f"Tipo de arquivo não aceito: {name} (use {', '.join(ACCEPTED_TYPES)})")
+    os.makedirs(BLOB_DIR, exist_ok=True)
+    tmp_path = os.path.join(BLOB_DIR, f"upload.{os.getpid()}.{threading.get_ident()}.tmp")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(tmp_path, 'wb') as out:
+            while True:
+                chunk = fileobj.read(_CHUNK)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > MAX_ATTACHMENT_BYTES:
+                    raise AttachmentError(f"{name}: arquivo maior que {MAX_ATTACHMENT_BYTES // (1024 * 1024)} MB")
+                digest.update(chunk)
+                out.write(chunk)
+        sha256 = digest.hexdigest()
+        path = blob_path(sha256)
+        if os.path.exists(path):
+            os.remove(tmp_path)  # conteúdo já guardado
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    request_thumbnail(sha256)
+    return {'sha256': sha256, 'name': name, 'size': size, 'type': content_type or f"image/{extension}"}
+
+# --- Miniaturas ---
+def _build_thumbnail(sha256):
+    target = thumbnail_path(sha256)
+    if os.path.exists(target) or Image is None:
+        return target
+    os.makedirs(THUMB_DIR, exist_ok=True)
+    with Image.open(blob_path(sha256)) as image:
+        if image.width * image.height > MAX_IMAGE_PIXELS:  # o Pillow só recusa acima do dobro
+            raise Image.DecompressionBombError(f"{sha256}: {image.width}x{image.height} px")
+        image.draft('RGB', (THUMBNAIL_SIZE, THUMBNAIL_SIZE))  # JPEG: decodifica já reduzido
+        image = image.convert('RGB')
+        image.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+        tmp_path = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        image.save(tmp_path, 'JPEG', quality=80, optimize=True)
+    os.replace(tmp_path, target)
+    return target
+
+def _remember_failure(sha256):
+    now = time.monotonic()
+    with _pending_lock:
+        for expired in [key for key, retry_at in _failed_thumbnails.items() if retry_at <= now]:
+            del _failed_thumbnails[expired]
+        _failed_thumbnails[sha256] = now + THUMBNAIL_RETRY_S
+
+def _recently_failed(sha256):
+    with _pending_lock:
+        retry_at = _failed_thumbnails.get(sha256)
+    return retry_at is not None and time.monotonic() < retry_at
+
+def _thumbnail_job(sha256):
+    try:
+        return _build_thumbnail(sha256)
+    except DECODE_ERRORS:
+        _remember_failure(sha256)
+        raise
+    finally:
+        with _pending_lock:
+            _pending_thumbnails.discard(sha256)
+
+def request_thumbnail(sha256):
+    """Agenda a miniatura em segundo plano (sem esperar); ignorado se já existe, está na fila
+    ou falhou há menos de THUMBNAIL_RETRY_S segundos."""
+    if Image is None or os.path.exists(thumbnail_path(sha256)) or _recently_failed(sha256):
+        return
+    with _pending_lock:
+        if sha256 in _pending_thumbnails:
+            return
+        _pending_thumbnails.add(sha256)
+    try:
+        EXECUTOR.submit(_thumbnail_job, sha256, priority=PRIORITY_BACKGROUND)
+    except ExecutorSaturated:
+        with _pending_lock:
+            _pending_thumbnails.discard(sha256)  # será gerada quando for pedida por um relatório
+
+def photo_hashes(ticket_data):
+    """SHA-256 das fotos anexadas ao chamado, na ordem dos campos."""
+    return [ref['sha256'] for value in ticket_data.values() if isinstance(value, list)
+            for ref in value if isinstance(ref, dict) and 'sha256' in ref]
+
+def thumbnails_ready(sha256s):
+    """Quais dessas miniaturas já existem ('1'/'0' por foto), para invalidar relatórios gerados sem elas."""
+    return ''.join('1' if os.path.exists(thumbnail_path(sha256)) else '0' for sha256 in sha256s)
+
+def ready_thumbnail(sha256):
+    """Caminho da miniatura, se já gerada; senão agenda a geração e devolve None."""
+    path = thumbnail_path(sha256)
+    if os.path.exists(path):
+        return path
+    request_thumbnail(sha256)
+    return None
+
+class ReportImageBudget:
+    """Limite de fotos e de tempo de um relatório.
+
+    Miniaturas que ainda não existem são geradas na própria thread do relatório enquanto
+    houver prazo; depois dele, e além de `max_images` fotos, a foto fica de fora (None).
+    """
+
+    def __init__(self, max_images=REPORT_MAX_IMAGES, seconds=REPORT_IMAGE_BUDGET_S):
+        self.remaining = max_images
+        self.deadline = time.monotonic() + seconds
+
+    def thumbnails(self, sha256s):
+        paths = []
+        for sha256 in sha256s:
+            path = thumbnail_path(sha256) if self.remaining > 0 else None
+            if path and not os.path.exists(path):
+                path = None
+                if (Image is not None and time.monotonic() < self.deadline and os.path.exists(blob_path(sha256))
+                        and not _recently_failed(sha256)):
+                    try:
+                        path = _build_thumbnail(sha256)
+                    except DECODE_ERRORS:
+                        _remember_failure(sha256)
+                        path = None
+            if path:
+                self.remaining -= 1
+            paths.append(path)
+        return paths
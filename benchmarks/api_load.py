@@ -0,0 +1,92 @@
+# --- Teste de carga da API HTTP (cliente ASGI local, sem rede) ---
+# Uso: python benchmarks/api_load.py --tickets 2000 --requests 3000 --concurrency 32
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_common import percentile, use_temp_data_dir
+
+use_temp_data_dir("checklist-api-load-")
+
+import api
+import ticket_store
+from synthetic import generate_tickets
+
+async def call(method, path, query=b"", headers=()):
+    """Executa uma requisição diretamente na aplicação ASGI e devolve (status, cabeçalhos, corpo)."""
+    messages = []
+    async def receive():
+        return {'type': 'http.request', 'body': b"", 'more_body': False}
+    async def send(message):
+        messages.append(message)
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': query, 'headers': list(headers)}
+    await api.app(scope, receive, send)
+    start = messages[0]
+    body = b"".join(m.get('body', b"") for m in messages[1:])
+    return start['status'], dict(start['headers']), body
+
+async def run_load(ticket_ids, total_requests, concurrency, revalidate, rng):
+    etags = {}
+    latencies = []
+    statuses = {}
+
+    def next_request():
+        roll = rng.random()
+        ticket_id = rng.choice(ticket_ids)
+        if roll < 0.5:
+            return f"/tickets/{ticket_id}", b""
+        if roll < 0.7:
+            return f"/tickets/{ticket_id}/report.{rng.choice(['txt', 'pdf', 'docx'])}", b""
+        if roll < 0.9:
+            return "/tickets", f"offset={rng.randint(0, len(ticket_ids))}&limit=50".encode()
+        return "/stats", b""
+
+    async def worker(n):
+        for _ in range(n):
+            path, query = next_request()
+            headers = [(b'if-none-match', etags[(path, query)].encode())] if revalidate and (path, query) in etags else []
+            started = time.perf_counter()
+            status, response_headers, _ = await call('GET', path, query, headers)
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+            if b'etag' in response_headers:
+                etags[(path, query)] = response_headers[b'etag'].decode()
+
+    started = time.perf_counter()
+    per_worker = total_requests // concurrency
+    await asyncio.gather(*(worker(per_worker) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        'requisicoes': per_worker * concurrency,
+        'req_por_s': per_worker * concurrency / elapsed,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'status': statuses,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga local da API de checklists.")
+    parser.add_argument('--tickets', type=int, default=2000)
+    parser.add_argument('--requests', type=int, default=3000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    args = parser.parse_args()
+
+    tickets = dict(generate_tickets(args.tickets))
+    ticket_store.save_completed_tickets(tickets)
+    ticket_ids = list(tickets)
+
+    for label, revalidate in (("sem If-None-Match", False), ("com If-None-Match", True)):
+        result = asyncio.run(run_load(ticket_ids, args.requests, args.concurrency, revalidate, random.Random(7)))
+        print(f"{label}: {result['requisicoes']} req em {result['req_por_s']:.0f} req/s | "
+              f"p50 {result['p50_ms']:.1f} ms | p95 {result['p95_ms']:.1f} ms | status {result['status']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+# --- Teste de carga da interface Streamlit (AppTest, sem rede e sem navegador) ---
+# Uso:
+#   python benchmarks/app_load.py --tickets 2000 --technicians 8 --admins 2 --checklists 5
+#   python benchmarks/app_load.py --output carga.json
+#   python benchmarks/app_load.py --baseline carga.json --threshold 1.5
+#
+# Cada técnico e cada administrador é uma sessão do AppTest numa thread própria, todas no
+# mesmo processo (como as sessões de um servidor Streamlit): os técnicos abrem, preenchem e
+# arquivam checklists enquanto os administradores navegam pelo painel (revisão de chamados,
+# estatísticas, detalhamento por UF). Mede-se a vazão, os percentis de latência de cada
+# reexecução (com o número de amostras ao lado) e, no fim, a integridade do histórico:
+# cada texto digitado (sorteado com acentos, aspas, separadores e emoji) volta idêntico do
+# histórico e do feed de alterações, cada chamado arquivado tem exatamente um evento
+# "criado", nenhum evento é de chamado alheio e o total das estatísticas bate.
+# Os administradores seguem navegando depois dos técnicos até somar --min-admin-runs
+# reexecuções cada e --min-seconds de carga, para que os percentis deles não saiam de meia
+# dúzia de amostras. As propriedades do codec, das diferenças do histórico e da importação
+# com entradas geradas ficam em property_checks.py, fora da interface.
+# O processo termina com código 1 se houver exceções, falhas de integridade ou, com
+# --baseline, algum percentil mais lento que baseline × threshold.
+
+import argparse
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from bench_common import compare, percentile, use_temp_data_dir
+
+use_temp_data_dir("checklist-app-load-")
+
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+from streamlit.testing.v1 import AppTest, app_test
+
+# Avisos repetidos a cada reexecução (depreciações; acesso ao estado fora da thread do script).
+logging.getLogger("streamlit.deprecation_util").disabled = True
+logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").disabled = True
+
+# O AppTest foi feito para uma sessão por vez: a cada execução instala um Runtime simulado
+# global e o remove no fim, e recompila o app.py. Para várias sessões simultâneas no mesmo
+# processo, como no servidor, o primeiro Runtime simulado passa a ser compartilhado (e não é
+# mais removido) e o bytecode do script é compilado uma vez só — compilar em várias threads
+# ao mesmo tempo também esbarra em erros do compilador do CPython.
+class _SharedRuntimeMeta(type):
+    def __setattr__(cls, name, value):
+        if name != '_instance':
+            super().__setattr__(name, value)
+        elif value is not None and Runtime._instance is None:
+            Runtime._instance = value
+
+class _SharedRuntime(Runtime, metaclass=_SharedRuntimeMeta):
+    pass
+
+app_test.Runtime = _SharedRuntime
+
+_shared_script_cache = ScriptCache()
+_get_bytecode = ScriptCache.get_bytecode
+ScriptCache.get_bytecode = lambda self, script_path: _get_bytecode(_shared_script_cache, script_path)
+
+import admin_auth
+import change_feed
+import ticket_store
+from synthetic import CIDADES_UF, LOCAIS, generate_tickets
+
+APP_FILE = os.path.join(ROOT_DIR, "app.py")
+UNSELECTED = "Selecione um chamado..."
+TEXT_ALPHABET = "abcxyzÁÉÍÓÚáéíóúçãõâêô0123456789 '\"\\,;:{}[]<>/&%#-_🙂"
+
+def random_text(rng, prefix):
+    """Texto sorteado para um campo livre; o que o técnico digita tem de voltar idêntico."""
+    return f"{prefix} {''.join(rng.choice(TEXT_ALPHABET) for _ in range(rng.randint(1, 24)))}".strip()
+
+class LoadRecorder:
+    """Latências por papel, exceções e chamados arquivados, compartilhados entre as threads."""
+
+    def __init__(self):
+        self.latencies = {'tecnico': [], 'admin': []}
+        self.errors = []
+        self.archived = {}
+        self._lock = threading.Lock()
+
+    def run(self, role, at):
+        """Reexecuta a sessão, registra a latência e as exceções da página."""
+        started = time.perf_counter()
+        at.run()
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.latencies[role].append(elapsed)
+            self.errors.extend(f"{role}: {e.value}" for e in at.exception)
+        return at
+
+    def fail(self, message):
+        with self._lock:
+            self.errors.append(message)
+
+    def archive(self, ticket_id, expected):
+        with self._lock:
+            self.archived[ticket_id] = expected
+
+    def thread(self, target, *args):
+        """Thread de uma sessão simulada; uma exceção no roteiro conta como erro da carga."""
+        def guarded():
+            try:
+                target(*args)
+            except Exception as e:
+                self.fail(f"{target.__name__}: {type(e).__name__}: {e}")
+        return threading.Thread(target=guarded, name=target.__name__)
+
+# --- Sessões Simuladas ---
+def technician_session(number, checklists, racks, recorder, seed):
+    """Um técnico preenchendo e arquivando `checklists` chamados, campo a campo."""
+    rng = random.Random(seed)
+    at = AppTest.from_file(APP_FILE, default_timeout=120)
+    recorder.run('tecnico', at)
+    for n in range(checklists):
+        ticket_id = ticket_store.normalize_ticket_id(str(9_000_000 + number * 10_000 + n))
+        at.text_input[0].input(ticket_id)
+        at.button[-1].click()
+        recorder.run('tecnico', at)
+        if at.session_state.active_ticket_id != ticket_id:
+            recorder.fail(f"{ticket_id}: checklist não foi aberto")
+            continue
+
+        expected = {
+            'agencia': random_text(rng, "Agência"),
+            'endereco': random_text(rng, "Rua"),
+            'cidade_uf': rng.choice(CIDADES_UF),
+            'num_racks': racks,
+        }
+        for key in ('agencia', 'endereco', 'cidade_uf'):
+            at.text_input(key=f"{key}_{ticket_id}").input(expected[key])
+            recorder.run('tecnico', at)
+        if racks > 1:
+            at.number_input(key=f"num_racks_{ticket_id}").set_value(racks)
+            recorder.run('tecnico', at)
+        for i in range(1, racks + 1):
+            if racks > 1:
+                at.selectbox(key=f"item_em_edicao:racks:{ticket_id}").select(i)
+                recorder.run('tecnico', at)
+            tamanho = rng.choice([24, 42, 44])
+            expected.update({
+                f'rack_local_{i}': random_text(rng, rng.choice(LOCAIS)),
+                f'rack_tamanho_{i}': f"{tamanho}U",
+                f'rack_us_disponiveis_{i}': f"{rng.randint(0, tamanho)}U",
+            })
+            for key in ('rack_local', 'rack_tamanho', 'rack_us_disponiveis'):
+                at.text_input(key=f"{key}_{i}_{ticket_id}").input(expected[f"{key}_{i}"])
+                recorder.run('tecnico', at)
+
+        at.button(key=f"complete_{ticket_id}").click()
+        recorder.run('tecnico', at)
+        if at.session_state.active_ticket_id is not None:
+            recorder.fail(f"{ticket_id}: arquivamento recusado ({[e.value for e in at.error]})")
+            continue
+        recorder.archive(ticket_id, expected)
+
+def admin_session(recorder, stop, seed, min_runs):
+    """Um administrador alternando entre chamados na revisão e o detalhamento por UF, até o fim
+    da carga e no mínimo `min_runs` reexecuções."""
+    rng = random.Random(seed)
+    at = AppTest.from_file(APP_FILE, default_timeout=120)
+    at.session_state.page = 'admin_dashboard'
+    at.session_state.admin_token = admin_auth.issue_session_token(admin_auth.DEFAULT_ADMIN[0])
+    recorder.run('admin', at)
+    runs = 1
+    while runs < min_runs or not stop.is_set():
+        if rng.random() < 0.7:
+            review = at.selectbox(key="review_select")
+            options = [option for option in review.options if option != UNSELECTED]
+            review.select(rng.choice(options))
+        else:
+            drilldown = at.selectbox(key="location_drilldown_uf")
+            drilldown.select(rng.choice(drilldown.options))
+        recorder.run('admin', at)
+        runs += 1
+
+# --- Execução e Verificações ---
+def check_integrity(recorder, seeded, feed_start):
+    """Falhas de integridade do histórico depois da carga (lista vazia quando tudo confere)."""
+    failures = []
+    for ticket_id, expected in recorder.archived.items():
+        stored = ticket_store.load_ticket(ticket_id)
+        if stored is None:
+            failures.append(f"{ticket_id}: chamado perdido")
+            continue
+        wrong = [key for key, value in expected.items() if stored.get(key) != value]
+        if wrong:
+            failures.append(f"{ticket_id}: campos diferentes do preenchido: {', '.join(wrong)}")
+    total = ticket_store.archive_stats()['total_tickets']
+    if total != seeded + len(recorder.archived):
+        failures.append(f"estatísticas com {total} chamados (esperado {seeded + len(recorder.archived)})")
+    events = [event for event, _ in change_feed.read_changes(feed_start)]
+    created = Counter(event['ticket_id'] for event in events if event['op'] == 'criado')
+    for ticket_id, expected in recorder.archived.items():
+        if created[ticket_id] != 1:
+            failures.append(f"{ticket_id}: {created[ticket_id]} eventos 'criado' no feed (esperado 1)")
+    for event in events:
+        expected = recorder.archived.get(event['ticket_id'])
+        if expected is None:
+            failures.append(f"feed de alterações com evento de {event['ticket_id']}, que não foi arquivado na carga")
+        elif any(event['data'].get(key) != value for key, value in expected.items()):
+            failures.append(f"{event['ticket_id']}: evento {event['seq']} do feed diferente do preenchido")
+    return failures
+
+def run_load(args):
+    seeded = dict(generate_tickets(args.tickets))
+    ticket_store.save_completed_tickets(seeded)
+    feed_start = change_feed.latest_sequence()
+
+    recorder = LoadRecorder()
+    stop = threading.Event()
+    admins = [recorder.thread(admin_session, recorder, stop, 100 + n, args.min_admin_runs) for n in range(args.admins)]
+    technicians = [recorder.thread(technician_session, n, args.checklists, args.racks, recorder, n) for n in range(args.technicians)]
+    started = time.perf_counter()
+    for thread in admins + technicians:
+        thread.start()
+    for thread in technicians:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    if elapsed < args.min_seconds:
+        time.sleep(args.min_seconds - elapsed)
+    stop.set()
+    for thread in admins:
+        thread.join()
+    total_elapsed = time.perf_counter() - started
+
+    results = {}
+    for role, latencies in recorder.latencies.items():
+        if latencies:
+            results[f"{role}.p50_ms"] = statistics.median(latencies) * 1000
+            results[f"{role}.p95_ms"] = percentile(latencies, 95) * 1000
+            results[f"{role}.p99_ms"] = percentile(latencies, 99) * 1000
+    summary = {
+        'segundos': elapsed,
+        'chamados_arquivados': len(recorder.archived),
+        'chamados_por_minuto': len(recorder.archived) / elapsed * 60,
+        'amostras': {role: len(latencies) for role, latencies in recorder.latencies.items()},
+        'reexecucoes_por_s': sum(len(latencies) for latencies in recorder.latencies.values()) / total_elapsed,
+    }
+    return results, summary, recorder.errors, check_integrity(recorder, len(seeded), feed_start)
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga da interface Streamlit com sessões simuladas.")
+    parser.add_argument('--tickets', type=int, default=1000, help="Chamados no histórico antes da carga")
+    parser.add_argument('--technicians', type=int, default=6, help="Técnicos simultâneos")
+    parser.add_argument('--admins', type=int, default=2, help="Administradores simultâneos")
+    parser.add_argument('--checklists', type=int, default=3, help="Checklists arquivados por técnico")
+    parser.add_argument('--racks', type=int, default=2, help="Racks preenchidos por checklist")
+    parser.add_argument('--min-admin-runs', type=int, default=50, help="Reexecuções mínimas de cada administrador")
+    parser.add_argument('--min-seconds', type=float, default=0, help="Duração mínima da carga dos administradores")
+    parser.add_argument('--output', help="Grava os percentis (ms) e o resumo em JSON")
+    parser.add_argument('--baseline', help="JSON de uma execução anterior para comparação")
+    parser.add_argument('--threshold', type=float, default=1.5, help="Fator máximo de lentidão tolerado")
+    args = parser.parse_args()
+
+    results, summary, errors, failures = run_load(args)
+    print(f"{summary['chamados_arquivados']} chamados arquivados em {summary['segundos']:.1f} s "
+          f"({summary['chamados_por_minuto']:.1f}/min) | {summary['reexecucoes_por_s']:.1f} reexecuções/s "
+          f"| amostras {summary['amostras']}")
+    for name, value in results.items():
+        print(f"{name:<20} {value:10.1f} ms  (n={summary['amostras'][name.split('.')[0]]})")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'unit': 'ms', 'results': results, 'summary': summary}, f, indent=4)
+
+    status = 0
+    if errors:
+        print("\n❌ Exceções durante a carga:")
+        print("\n".join(f"  {line}" for line in errors[:20]))
+        status = 1
+    if failures:
+        print("\n❌ Falhas de integridade:")
+        print("\n".join(f"  {line}" for line in failures[:20]))
+        status = 1
+    elif not errors:
+        print("\n✅ Histórico íntegro: nenhum chamado perdido ou alterado.")
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold, digits=1)
+        if regressions:
+            print("\n❌ Regressões acima do limite:")
+            print("\n".join(f"  {line}" for line in regressions))
+            status = 1
+        else:
+            print("\n✅ Nenhuma regressão acima do limite.")
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
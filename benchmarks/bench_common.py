@@ -0,0 +1,28 @@
+# --- Utilitários comuns dos benchmarks e testes de carga ---
+import atexit
+import os
+import shutil
+import tempfile
+
+def use_temp_data_dir(prefix):
+    """Aponta CHECKLIST_DATA_DIR para um diretório temporário, apagado no fim do processo.
+
+    Chame antes de importar os módulos do app: eles leem a variável na importação.
+    """
+    data_dir = tempfile.mkdtemp(prefix=prefix)
+    os.environ["CHECKLIST_DATA_DIR"] = data_dir
+    atexit.register(shutil.rmtree, data_dir, ignore_errors=True)
+    return data_dir
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def compare(results, baseline, threshold, digits=2):
+    """Casos mais lentos que baseline × threshold, já formatados para o relatório."""
+    regressions = []
+    for name, value in results.items():
+        reference = baseline.get(name)
+        if reference and value > reference * threshold:
+            regressions.append(f"{name}: {value:.{digits}f} ms (baseline {reference:.{digits}f} ms, {value / reference:.2f}×)")
+    return regressions
@@ -0,0 +1,71 @@
+# --- Benchmark de memória do caminho do painel administrativo ---
+# Mede o pico de RSS de um processo novo que lista o histórico, calcula as estatísticas
+# e abre um chamado para revisão, comparando a leitura pelo índice ("lazy") com a
+# leitura do arquivo inteiro ("full"). Uso:
+#   python benchmarks/memory_benchmark.py --sizes 1000 5000 20000
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+ADMIN_PATHS = {
+    'lazy': """
+import ticket_store
+from ticket_stats import compute_stats_from_summaries
+summaries = ticket_store.list_ticket_summaries()
+compute_stats_from_summaries(s for _, s in summaries)
+ticket_store.load_ticket(summaries[len(summaries) // 2][0])
+""",
+    'full': """
+import pandas as pd
+import ticket_store
+from ticket_stats import compute_ticket_stats
+tickets = ticket_store.load_completed_tickets()
+df = pd.DataFrame.from_dict(tickets, orient='index')
+compute_ticket_stats(tickets.values())
+tickets[list(tickets)[len(tickets) // 2]]
+""",
+}
+PEAK_RSS = "\nimport resource, sys\nsys.stdout.write(str(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss))\n"
+
+def peak_rss_kb(data_dir, code):
+    env = dict(os.environ, CHECKLIST_DATA_DIR=data_dir, PYTHONPATH=REPO_DIR)
+    # Importa pandas nos dois modos para que a diferença medida seja só a dos dados.
+    prelude = "import pandas\n"
+    output = subprocess.run([sys.executable, "-c", prelude + code + PEAK_RSS], env=env, capture_output=True, text=True, check=True)
+    return int(output.stdout.strip())
+
+def main():
+    parser = argparse.ArgumentParser(description="Pico de RSS do painel administrativo por tamanho de histórico.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000, 20000])
+    parser.add_argument('--output', help="Grava os resultados (KB) em JSON")
+    args = parser.parse_args()
+
+    results = {}
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory(prefix="checklist-mem-") as data_dir:
+            env = dict(os.environ, CHECKLIST_DATA_DIR=data_dir, PYTHONPATH=REPO_DIR)
+            # Gera o histórico num processo separado para não contaminar as medições.
+            subprocess.run([sys.executable, "-c", (
+                "import sys; sys.path.insert(0, %r)\n"
+                "import ticket_store\n"
+                "from synthetic import generate_tickets\n"
+                "ticket_store.save_completed_tickets(dict(generate_tickets(%d)))\n"
+                "ticket_store.list_ticket_summaries()\n"
+            ) % (BENCH_DIR, size)], env=env, check=True)
+            for mode, code in ADMIN_PATHS.items():
+                results[f"{mode}[n={size}]"] = peak_rss_kb(data_dir, code)
+                print(f"{mode:<5} n={size:<7} pico RSS {results[f'{mode}[n={size}]'] / 1024:8.1f} MB")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'unit': 'KB', 'results': results}, f, indent=4)
+
+if __name__ == "__main__":
+    main()
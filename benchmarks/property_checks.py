@@ -0,0 +1,171 @@
+# --- Verificação de propriedades com entradas geradas ---
+# Uso:
+#   python benchmarks/property_checks.py
+#   python benchmarks/property_checks.py --cases 5000 --seed 7
+#
+# Complementa o teste de carga (app_load) com entradas sorteadas direto nas funções puras:
+#   codec      decode(encode(x)) == x e loads_record(dumps_record(x)) == x, em JSON e,
+#              se o pacote estiver instalado, em msgpack
+#   diferença  apply_diff(nova, reverse_diff(nova, antiga)) == antiga
+#   importação linhas válidas (Sim/Não escritos de vários jeitos, quantidades "3" ou "3.0",
+#              espaços nas bordas) são aceitas; CSV e JSONL dão o mesmo resultado;
+#              normalizar de novo o que saiu não muda nada; quantidades de racks fora da
+#              faixa são rejeitadas
+# Os casos saem de um random.Random com semente fixa, então uma falha se reproduz com o
+# mesmo --seed. O processo termina com código 1 se alguma propriedade falhar.
+
+import argparse
+import json
+import os
+import random
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_common import use_temp_data_dir
+
+use_temp_data_dir("checklist-properties-")
+
+import ticket_codec
+from checklist_schema import MAX_ITEMS
+from ticket_history import apply_diff, reverse_diff
+from ticket_import import RowValidationError, normalize_row
+from ticket_store import normalize_ticket_id
+
+TEXT_ALPHABET = "abcxyzÁÉÍÓÚáéíóúçãõâêô0123456789 '\"\\,;:{}[]<>/&%#-_\n\t🙂"
+YES = ["Sim", "sim", "S", "s", " SIM "]
+NO = ["Não", "não", "nao", "NAO", "N", "n", ""]
+
+# --- Geradores ---
+def random_text(rng, max_length=16):
+    return ''.join(rng.choice(TEXT_ALPHABET) for _ in range(rng.randint(0, max_length)))
+
+def random_value(rng):
+    """Valor que um chamado pode guardar: texto, número, booleano, None ou lista."""
+    kind = rng.randrange(7)
+    if kind == 0:
+        return rng.randint(-5, 10 ** 6)
+    if kind == 1:
+        return rng.choice([True, False, None])
+    if kind == 2:
+        return rng.choice(["Sim", "Não"])
+    if kind == 3:
+        return [random_text(rng, 4) for _ in range(rng.randint(0, 3))]
+    return random_text(rng)
+
+def random_key(rng):
+    """Chave de campo, com peso para os nomes que o codec trata por posição (e seus vizinhos)."""
+    kind = rng.randrange(5)
+    if kind == 0:
+        return rng.choice(ticket_codec.TICKET_FIELDS)
+    if kind in (1, 2):
+        number = rng.choice([rng.randint(1, 40), 0, "01", "x", ""])
+        return f"{rng.choice(ticket_codec.RACK_FIELDS)}_{number}"
+    if kind == 3:
+        return rng.choice(["FormSubmitter:checklist_form-Salvar", "rack_local", "rack_", "ap_extra"])
+    return random_text(rng, 12)
+
+def random_ticket(rng):
+    return {random_key(rng): random_value(rng) for _ in range(rng.randint(0, 40))}
+
+def random_import_row(rng):
+    """Linha de planilha válida para o modelo padrão, com as variações aceitas na importação."""
+    num_racks = rng.randint(1, 6)
+    row = {
+        rng.choice(['chamado', 'ticket_id']): f"  {rng.choice(['ch', 'CH', 'Ch'])}-{rng.randint(1, 99999)} ",
+        'num_racks': rng.choice([str(num_racks), f"{num_racks}.0", f" {num_racks} "]),
+        'agencia': f" {random_text(rng)} ",
+        'endereco': random_text(rng),
+        'cidade_uf': rng.choice(["São Paulo/SP", "recife - pe", "", random_text(rng)]),
+        'ap_setor': random_text(rng),
+        'ap_condicoes': random_text(rng),
+    }
+    for i in range(1, num_racks + 1):
+        tamanho = rng.choice([12, 24, 42, 44])
+        row.update({
+            f'rack_local_{i}': random_text(rng),
+            f'rack_tamanho_{i}': rng.choice([f"{tamanho}U", str(tamanho), ""]),
+            f'rack_us_disponiveis_{i}': rng.choice([f"{rng.randint(0, tamanho)}U", ""]),
+            f'rack_reguas_{i}': rng.choice([str(rng.randint(1, 4)), ""]),
+            f'rack_tomadas_disponiveis_{i}': rng.choice([str(rng.randint(0, 12)), ""]),
+        })
+        for field in ('rack_ampliacao_reguas', 'rack_estado', 'rack_organizado', 'rack_identificado'):
+            row[f'{field}_{i}'] = rng.choice(YES + NO)
+    return row
+
+# --- Propriedades ---
+def check_codec(rng, failures, formats):
+    ticket_id = random_text(rng, 8)
+    data = random_ticket(rng)
+    if ticket_codec.decode_ticket(ticket_codec.encode_ticket(ticket_id, data)) != (ticket_id, data):
+        failures.append(("codec", data))
+    for fmt in formats:
+        payload = ticket_codec.dumps_record(ticket_id, data, fmt)
+        if ticket_codec.loads_record(payload, fmt) != (ticket_id, data):
+            failures.append((f"codec {fmt}", data))
+
+def check_diff(rng, failures):
+    older = random_ticket(rng)
+    newer = dict(older) if rng.random() < 0.5 else {}
+    for _ in range(rng.randint(0, 10)):
+        newer[random_key(rng)] = random_value(rng)
+    for key in rng.sample(sorted(newer), k=min(len(newer), rng.randint(0, 3))):
+        del newer[key]
+    if apply_diff(newer, reverse_diff(newer, older)) != older:
+        failures.append(("diferença", {'nova': newer, 'antiga': older}))
+
+def check_import(rng, failures):
+    row = random_import_row(rng)
+    try:
+        ticket_id, data = normalize_row(row)
+        from_jsonl = normalize_row(json.dumps(row, ensure_ascii=False))
+        again = normalize_row({**data, 'chamado': ticket_id})
+    except RowValidationError as e:
+        failures.append((f"importação rejeitou linha válida ({e})", row))
+        return
+    raw_id = next(row[col] for col in ('chamado', 'ticket_id') if col in row)
+    if ticket_id != normalize_ticket_id(raw_id):
+        failures.append(("importação: código do chamado", row))
+    if any(data[f'{field}_{i}'] not in ("Sim", "Não")
+           for i in range(1, data['num_racks'] + 1)
+           for field in ('rack_ampliacao_reguas', 'rack_estado', 'rack_organizado', 'rack_identificado')):
+        failures.append(("importação: Sim/Não", row))
+    if from_jsonl != (ticket_id, data):
+        failures.append(("importação: CSV × JSONL", row))
+    if again != (ticket_id, data):
+        failures.append(("importação: normalizar de novo", row))
+
+    invalid = dict(row, num_racks=rng.choice(["0", str(MAX_ITEMS + 1), "-1", "2,5", "dois", "1e3"]))
+    try:
+        normalize_row(invalid)
+    except RowValidationError:
+        pass
+    else:
+        failures.append(("importação aceitou quantidade inválida", invalid))
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica propriedades do codec, das diferenças e da importação com entradas geradas.")
+    parser.add_argument("--cases", type=int, default=1000, help="Casos sorteados por propriedade.")
+    parser.add_argument("--seed", type=int, default=2024)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    formats = ['json'] + (['msgpack'] if ticket_codec.msgpack is not None else [])
+    failures = []
+    for _ in range(args.cases):
+        check_codec(rng, failures, formats)
+        check_diff(rng, failures)
+        check_import(rng, failures)
+
+    print(f"{args.cases} casos por propriedade (semente {args.seed}; codec em {', '.join(formats)})")
+    for name, example in failures[:10]:
+        print(f"❌ {name}: {json.dumps(example, ensure_ascii=False)[:300]}")
+    if failures:
+        print(f"{len(failures)} falha(s)")
+        sys.exit(1)
+    print("✅ todas as propriedades valem")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# --- Suíte de benchmarks dos caminhos críticos ---
+# Uso:
+#   python benchmarks/run_benchmarks.py --sizes 100 1000 5000 --output resultados.json
+#   python benchmarks/run_benchmarks.py --baseline resultados.json --threshold 1.25
+# Com --baseline, o processo termina com código 1 se algum caso ficar mais lento que
+# baseline × threshold.
+
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_common import compare, use_temp_data_dir
+
+use_temp_data_dir("checklist-bench-")
+
+import capacity
+import ticket_store
+from reports import get_report_data, create_pdf_report, create_docx_report
+from synthetic import generate_ticket, generate_tickets
+from ticket_stats import compute_ticket_stats
+
+def measure(func, repeat):
+    """Mediana de `repeat` execuções, em milissegundos."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+def reset_store(size):
+    shutil.rmtree(ticket_store.ARCHIVE_DIR, ignore_errors=True)
+    ticket_store.save_completed_tickets(dict(generate_tickets(size)))
+
+def run_suite(sizes, repeat):
+    rng = random.Random(1)
+    results = {}
+    report_tickets = {racks: generate_ticket(rng, num_racks=racks) for racks in (1, 10, 30)}
+
+    for racks, ticket in report_tickets.items():
+        results[f"get_report_data[racks={racks}]"] = measure(lambda: get_report_data(ticket), repeat * 10)
+        results[f"create_pdf_report[racks={racks}]"] = measure(lambda: create_pdf_report(ticket), repeat)
+        results[f"create_docx_report[racks={racks}]"] = measure(lambda: create_docx_report(ticket), repeat)
+
+    for size in sizes:
+        reset_store(size)
+        counter = iter(range(10 ** 9))
+        results[f"save_completed_ticket[n={size}]"] = measure(lambda: ticket_store.save_completed_ticket(f"CLAR-BENCH-{next(counter)}", generate_ticket(rng)), repeat)
+        results[f"load_completed_tickets[n={size}]"] = measure(ticket_store.load_completed_tickets, repeat)
+        tickets = ticket_store.load_completed_tickets()
+        results[f"compute_ticket_stats[n={size}]"] = measure(lambda: compute_ticket_stats(tickets.values()), repeat)
+        results[f"archive_stats[n={size}]"] = measure(ticket_store.archive_stats, repeat)
+        results[f"capacity_index_build[n={size}]"] = measure(lambda: capacity.CapacityIndex(ticket_store.get_ticket_index()), repeat)
+        capacity_index = capacity.get_capacity_index()
+        results[f"capacity_query[n={size}]"] = measure(lambda: capacity_index.query(20, 6, include_expandable=False), repeat * 10)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de persistência, relatórios e estatísticas.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 5000], help="Tamanhos do histórico a medir")
+    parser.add_argument('--repeat', type=int, default=5, help="Repetições por caso (usa a mediana)")
+    parser.add_argument('--output', help="Grava os resultados (ms) em JSON")
+    parser.add_argument('--baseline', help="JSON de resultados anteriores para comparação")
+    parser.add_argument('--threshold', type=float, default=1.25, help="Fator máximo de lentidão tolerado")
+    args = parser.parse_args()
+
+    results = run_suite(args.sizes, args.repeat)
+    for name, value in results.items():
+        print(f"{name:<45} {value:10.2f} ms")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'unit': 'ms', 'results': results}, f, indent=4)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print("\n❌ Regressões acima do limite:")
+            print("\n".join(f"  {line}" for line in regressions))
+            return 1
+        print("\n✅ Nenhuma regressão acima do limite.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
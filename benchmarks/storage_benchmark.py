@@ -0,0 +1,82 @@
+# --- Benchmark de tamanho em disco e tempo de leitura do histórico ---
+# Compara o JSON indentado original ({id: dados}, indent=4) com as codificações do
+# ticket_codec: JSON compacto com chaves, registros posicionais em JSON ou msgpack,
+# e as partições seladas com gzip ou zstd. Uso:
+#   python benchmarks/storage_benchmark.py --sizes 1000 10000
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import ticket_codec
+from synthetic import generate_tickets
+
+def _legacy_pretty(tickets):
+    return json.dumps(tickets, ensure_ascii=False, indent=4).encode('utf-8')
+
+def _compact_dict(tickets):
+    return json.dumps(tickets, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def _records(fmt):
+    return lambda tickets: b"".join(ticket_codec.dumps_record(ticket_id, data, fmt) for ticket_id, data in tickets.items())
+
+def _load_dict(blob):
+    return json.loads(blob)
+
+def _load_records(fmt):
+    return lambda blob: dict(ticket_codec.iter_records(blob, fmt))
+
+ENCODINGS = {
+    'json-indentado (original)': (_legacy_pretty, _load_dict),
+    'json-compacto': (_compact_dict, _load_dict),
+    'registros-json': (_records('json'), _load_records('json')),
+}
+if ticket_codec.msgpack is not None:
+    ENCODINGS['registros-msgpack'] = (_records('msgpack'), _load_records('msgpack'))
+
+COMPRESSIONS = {'nenhuma': (lambda b: b, lambda b: b), 'gzip': (lambda b: ticket_codec.compress(b, 'gzip'), gzip.decompress)}
+if ticket_codec.zstandard is not None:
+    COMPRESSIONS['zstd'] = (lambda b: ticket_codec.compress(b, 'zstd'), lambda b: ticket_codec.decompress(b, 'zstd'))
+
+def best_time(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Tamanho em disco e tempo de leitura por codificação do histórico.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help="Grava os resultados em JSON")
+    args = parser.parse_args()
+
+    results = {}
+    for size in args.sizes:
+        tickets = dict(generate_tickets(size))
+        baseline = None
+        for name, (dump, load) in ENCODINGS.items():
+            raw = dump(tickets)
+            assert load(raw) == tickets, f"{name}: leitura não reproduz os chamados"
+            for compression, (pack, unpack) in COMPRESSIONS.items():
+                blob = pack(raw)
+                seconds = best_time(lambda: load(unpack(blob)), args.repeat)
+                baseline = baseline or len(blob)
+                label = f"{name}+{compression}[n={size}]"
+                results[label] = {'bytes': len(blob), 'leitura_s': seconds}
+                print(f"{label:<45} {len(blob) / 1024:10.1f} KB ({len(blob) / baseline:6.1%})  leitura {seconds * 1000:8.1f} ms")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4)
+
+if __name__ == "__main__":
+    main()
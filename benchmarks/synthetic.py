@@ -0,0 +1,59 @@
+# --- Gerador de chamados sintéticos para benchmarks e testes de carga ---
+import datetime
+import random
+
+CIDADES_UF = [
+    "São Paulo/SP", "Campinas/SP", "Santos/SP", "Ribeirão Preto/SP", "São José dos Campos/SP", "Sorocaba/SP",
+    "Rio de Janeiro/RJ", "Niterói/RJ", "Petrópolis/RJ", "Belo Horizonte/MG", "Uberlândia/MG", "Juiz de Fora/MG",
+    "Curitiba/PR", "Londrina/PR", "Maringá/PR", "Florianópolis/SC", "Joinville/SC", "Blumenau/SC",
+    "Porto Alegre/RS", "Caxias do Sul/RS", "Pelotas/RS", "Salvador/BA", "Feira de Santana/BA", "Vitória da Conquista/BA",
+    "Recife/PE", "Caruaru/PE", "Fortaleza/CE", "Juazeiro do Norte/CE", "São Luís/MA", "Teresina/PI",
+    "Natal/RN", "João Pessoa/PB", "Maceió/AL", "Aracaju/SE", "Brasília/DF", "Goiânia/GO", "Anápolis/GO",
+    "Campo Grande/MS", "Cuiabá/MT", "Palmas/TO", "Manaus/AM", "Belém/PA", "Santarém/PA", "Macapá/AP",
+    "Boa Vista/RR", "Porto Velho/RO", "Rio Branco/AC", "Vitória/ES", "Vila Velha/ES",
+]
+LOCAIS = ["Sala de TI", "Copa", "Tesouraria", "Sala da gerência", "Corredor técnico", "Almoxarifado", "Embaixo da escada", "Sala do cofre"]
+SETORES = ["Recepção", "Gerência", "Atendimento", "Caixas", "Autoatendimento", "Sala de reunião", "Retaguarda"]
+CONDICOES = [
+    "Possui infra", "Não possui infra", "Infra parcial, falta eletroduto", "Forro de gesso, precisa de suporte",
+    "Há canaleta aparente até o ponto, mas sem tomada próxima", "Laje de concreto; necessário furação e conduíte novo",
+]
+
+def generate_ticket(rng, num_racks=None):
+    """Gera um chamado no mesmo formato de dados gravado pelo formulário de checklist."""
+    num_racks = num_racks or rng.randint(1, 30)
+    data = {
+        'agencia': f"Agência {rng.randint(1000, 9999)}",
+        'endereco': f"Rua {rng.choice(['das Flores', 'XV de Novembro', 'São João', 'Sete de Setembro'])}, {rng.randint(1, 3000)}",
+        'cidade_uf': rng.choice(CIDADES_UF),
+        'num_racks': num_racks,
+    }
+    for i in range(1, num_racks + 1):
+        tamanho = rng.choice([12, 24, 36, 42, 44])
+        data.update({
+            f'rack_local_{i}': rng.choice(LOCAIS),
+            f'rack_tamanho_{i}': f"{tamanho}U",
+            f'rack_us_disponiveis_{i}': f"{rng.randint(0, tamanho)}U",
+            f'rack_reguas_{i}': str(rng.randint(1, 4)),
+            f'rack_tomadas_disponiveis_{i}': str(rng.randint(0, 12)),
+            f'rack_ampliacao_reguas_{i}': rng.choice(["Sim", "Não"]),
+            f'rack_estado_{i}': rng.choice(["Sim", "Não"]),
+            f'rack_organizado_{i}': rng.choice(["Sim", "Não"]),
+            f'rack_identificado_{i}': rng.choice(["Sim", "Não"]),
+        })
+    data.update({
+        'ap_quantidade': str(rng.randint(1, 8)),
+        'ap_setor': ", ".join(rng.sample(SETORES, 2)),
+        'ap_condicoes': rng.choice(CONDICOES),
+        'ap_distancia': f"{rng.randint(2, 4)}m altura / {rng.randint(5, 40)}m distância",
+    })
+    return data
+
+def generate_tickets(count, seed=42, months=24):
+    """Gera `count` pares (ticket_id, dados) de forma determinística, arquivados ao longo dos últimos `months` meses."""
+    rng = random.Random(seed)
+    today = datetime.datetime.now()
+    for n in range(count):
+        data = generate_ticket(rng)
+        data['archived_at'] = (today - datetime.timedelta(days=rng.randint(0, months * 30))).isoformat(timespec='seconds')
+        yield f"CLAR-{100000 + n}", data
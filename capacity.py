@@ -0,0 +1,119 @@
+# --- Planejamento de Capacidade ---
+# Responde consultas do tipo "agências com algum rack com ao menos N Us livres e M tomadas
+# livres, ou com rack que permite ampliação de réguas" sem abrir os chamados: usa apenas os
+# resumos do índice do histórico ([Us livres, tomadas livres, ampliação] por rack, ver
+# ticket_stats.summarize_ticket). Os racks ficam em vetores ordenados por Us livres e por
+# tomadas livres; cada consulta faz uma busca binária no índice mais seletivo e filtra só
+# os racks que sobraram.
+
+import threading
+
+import numpy as np
+
+from perf_metrics import timed
+from ticket_store import get_ticket_index, store_version
+
+class CapacityIndex:
+    """Resumo de capacidade por agência e índices ordenados dos racks, montados uma vez por versão do histórico."""
+
+    def __init__(self, ticket_index):
+        self.ticket_ids = []
+        agencies = []
+        rack_ticket, rack_u, rack_outlets, rack_expandable = [], [], [], []
+        for ticket_id, summary in ticket_index.items():
+            racks = summary.get('racks')
+            if not racks:
+                continue
+            position = len(self.ticket_ids)
+            self.ticket_ids.append(ticket_id)
+            free_u = [rack[0] for rack in racks if rack[0] is not None]
+            free_outlets = [rack[1] for rack in racks if rack[1] is not None]
+            agencies.append({
+                'ticket_id': ticket_id,
+                'agencia': summary.get('agencia', ''),
+                'cidade_uf': summary.get('cidade_uf', ''),
+                'racks': len(racks),
+                'us_livres_total': sum(free_u),
+                'tomadas_livres_total': sum(free_outlets),
+                'maior_us_livres': max(free_u, default=0),
+                'maior_tomadas_livres': max(free_outlets, default=0),
+                'racks_com_ampliacao': sum(rack[2] for rack in racks),
+            })
+            for free_u_rack, free_outlets_rack, expandable in racks:
+                rack_ticket.append(position)
+                rack_u.append(-1 if free_u_rack is None else free_u_rack)
+                rack_outlets.append(-1 if free_outlets_rack is None else free_outlets_rack)
+                rack_expandable.append(expandable)
+        self.agencies = agencies
+        self.total_racks = len(rack_ticket)
+        self._cities = [agency['cidade_uf'].lower() for agency in agencies]
+        # Posição de cada agência na ordem de exibição (maior folga em Us, depois em tomadas).
+        by_slack = sorted(range(len(agencies)), key=lambda n: (agencies[n]['maior_us_livres'], agencies[n]['maior_tomadas_livres']), reverse=True)
+        self._rank = np.empty(len(agencies), dtype=np.int64)
+        self._rank[by_slack] = np.arange(len(agencies))
+
+        rack_ticket = np.asarray(rack_ticket, dtype=np.int64)
+        rack_u = np.asarray(rack_u, dtype=np.int64)
+        rack_outlets = np.asarray(rack_outlets, dtype=np.int64)
+        # Índice ordenado por Us livres e por tomadas livres (quantidade não informada = -1).
+        by_u = np.argsort(rack_u, kind='stable')
+        by_outlets = np.argsort(rack_outlets, kind='stable')
+        self._u_sorted, self._u_other, self._u_ticket = rack_u[by_u], rack_outlets[by_u], rack_ticket[by_u]
+        self._o_sorted, self._o_other, self._o_ticket = rack_outlets[by_outlets], rack_u[by_outlets], rack_ticket[by_outlets]
+        self._expandable_tickets = np.unique(rack_ticket[np.asarray(rack_expandable, dtype=bool)]) if rack_expandable else np.empty(0, dtype=np.int64)
+
+    def _matching_racks(self, min_free_u, min_free_outlets):
+        """Posições das agências com algum rack que atende aos dois limites, e quantos racks atendem em cada uma."""
+        u_start = np.searchsorted(self._u_sorted, min_free_u, side='left')
+        o_start = np.searchsorted(self._o_sorted, min_free_outlets, side='left')
+        # Percorre o lado com menos candidatos e filtra pelo outro limite.
+        if len(self._u_sorted) - u_start <= len(self._o_sorted) - o_start:
+            tickets = self._u_ticket[u_start:][self._u_other[u_start:] >= min_free_outlets]
+        else:
+            tickets = self._o_ticket[o_start:][self._o_other[o_start:] >= min_free_u]
+        return np.unique(tickets, return_counts=True)
+
+    @timed("capacity.query")
+    def query(self, min_free_u=0, min_free_outlets=0, include_expandable=True, city=None, limit=None):
+        """Agências com algum rack com ao menos `min_free_u` Us e `min_free_outlets` tomadas livres
+        (ou, com `include_expandable`, com rack que permite ampliar as réguas), ordenadas pela
+        maior folga em Us."""
+        fitting, counts = self._matching_racks(max(min_free_u, 0), max(min_free_outlets, 0))
+        positions = np.union1d(fitting, self._expandable_tickets) if include_expandable else fitting
+        # Primeiro as agências que atendem pelos limites, depois as que só permitem ampliação.
+        fits = np.isin(positions, fitting)
+        positions = positions[np.lexsort((self._rank[positions], ~fits))].tolist()
+        fitting_counts = dict(zip(fitting.tolist(), counts.tolist()))
+        city = city.strip().lower() if city else None
+        results = []
+        for position in positions:
+            if city and city not in self._cities[position]:
+                continue
+            results.append(dict(self.agencies[position], racks_que_atendem=fitting_counts.get(position, 0)))
+            if limit and len(results) >= limit:
+                break
+        return results
+
+# --- Cache por Processo ---
+_capacity_cache = {'version': None, 'index': None}
+_capacity_lock = threading.Lock()
+
+@timed("capacity.build")
+def get_capacity_index():
+    """Índice de capacidade do histórico atual, reconstruído só quando `store_version()` muda."""
+    version = store_version()
+    with _capacity_lock:
+        if _capacity_cache['version'] == version:
+            return _capacity_cache['index']
+    index = CapacityIndex(get_ticket_index())
+    with _capacity_lock:
+        _capacity_cache.update(version=version, index=index)
+    return index
+
+def find_capacity(min_free_u=0, min_free_outlets=0, include_expandable=True, city=None, limit=None):
+    return get_capacity_index().query(min_free_u, min_free_outlets, include_expandable, city, limit)
+
+CAPACITY_COLUMNS = [
+    'ticket_id', 'agencia', 'cidade_uf', 'racks', 'racks_que_atendem', 'maior_us_livres',
+    'maior_tomadas_livres', 'us_livres_total', 'tomadas_livres_total', 'racks_com_ampliacao',
+]
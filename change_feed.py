@@ -0,0 +1,158 @@
+# --- Feed de Alterações do Histórico ---
+# Cada gravação no histórico acrescenta eventos a um log JSONL somente-acréscimo
+# (CHANGES_FILE), um por chamado, com número de sequência monotônico:
+#   {"seq": 42, "at": "2026-10-19T13:05:00", "op": "criado", "ticket_id": "CLAR-123", "data": {...}}
+# 'op' é "criado" na primeira vez que o chamado é arquivado e "atualizado" quando ele é
+# rearquivado ou reprocessado (ex.: `cli.py reindex`). Os eventos são gravados com a trava
+# do histórico adquirida e depois das partições, então a ordem das sequências é a ordem
+# das gravações e um consumidor nunca vê um chamado que ainda não está no histórico.
+#
+# Consumidores leem a partir de um ponto de controle (última sequência processada e a
+# posição em bytes logo depois dela), sem reler o log desde o início.
+
+import datetime
+import json
+import os
+import re
+import time
+
+DATA_DIR = os.environ.get("CHECKLIST_DATA_DIR", ".")
+CHANGES_FILE = os.path.join(DATA_DIR, "changes.jsonl")
+CHECKPOINT_DIR = os.path.join(DATA_DIR, "feed_checkpoints")
+
+OP_CREATED = "criado"
+OP_UPDATED = "atualizado"
+_TAIL_CHUNK = 64 * 1024
+_CONSUMER_NAME = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+# --- Gravação ---
+def _last_complete_line(f, size):
+    """Posição do fim da última linha completa e o conteúdo dela (lendo o arquivo de trás para frente)."""
+    end = size
+    tail = b""
+    while end > 0:
+        start = max(end - _TAIL_CHUNK, 0)
+        f.seek(start)
+        tail = f.read(end - start) + tail
+        end = start
+        cut = tail.rfind(b"\n")
+        if cut == -1:
+            continue
+        previous = tail.rfind(b"\n", 0, cut)
+        if previous != -1 or end == 0:
+            return end + cut + 1, tail[previous + 1:cut]
+    return 0, b""
+
+def _prepare_log():
+    """Descarta uma linha incompleta no fim do log (gravação interrompida) e devolve a última sequência."""
+    if not os.path.exists(CHANGES_FILE):
+        return 0
+    with open(CHANGES_FILE, 'r+b') as f:
+        size = f.seek(0, os.SEEK_END)
+        complete, last_line = _last_complete_line(f, size)
+        if complete < size:
+            f.truncate(complete)
+    return json.loads(last_line)['seq'] if last_line else 0
+
+def append_changes(changes):
+    """Acrescenta um evento por (op, ticket_id, dados) e devolve a última sequência gravada.
+
+    Deve ser chamada com `ticket_store._store_lock()` adquirida.
+    """
+    seq = _prepare_log()
+    if not changes:
+        return seq
+    now = datetime.datetime.now().isoformat(timespec='seconds')
+    lines = []
+    for op, ticket_id, data in changes:
+        seq += 1
+        lines.append(json.dumps({'seq': seq, 'at': now, 'op': op, 'ticket_id': ticket_id, 'data': data}, ensure_ascii=False, separators=(',', ':')))
+    os.makedirs(DATA_DIR, exist_ok=True)
+    with open(CHANGES_FILE, 'ab') as f:
+        f.write(("\n".join(lines) + "\n").encode('utf-8'))
+        f.flush()
+        os.fsync(f.fileno())
+    return seq
+
+def latest_sequence():
+    """Sequência do último evento gravado (0 com o log vazio)."""
+    if not os.path.exists(CHANGES_FILE):
+        return 0
+    with open(CHANGES_FILE, 'rb') as f:
+        _, last_line = _last_complete_line(f, f.seek(0, os.SEEK_END))
+    return json.loads(last_line)['seq'] if last_line else 0
+
+# --- Leitura ---
+def read_changes(after=0, offset=0, limit=None):
+    """Eventos com sequência maior que `after`, como pares (evento, posição após a linha).
+
+    `offset` é a posição devolvida junto com o evento `after` numa leitura anterior; se não
+    corresponder (log reescrito, posição antiga), a leitura recomeça do início do arquivo.
+    Uma linha ainda sem o '\\n' final é ignorada até ser concluída.
+    """
+    try:
+        f = open(CHANGES_FILE, 'rb')
+    except FileNotFoundError:
+        return
+    with f:
+        if offset and not _offset_follows(f, offset, after):
+            offset = 0
+        f.seek(offset)
+        position = offset
+        count = 0
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            position += len(line)
+            event = json.loads(line)
+            if event['seq'] <= after:
+                continue
+            yield event, position
+            count += 1
+            if limit and count >= limit:
+                break
+
+def _offset_follows(f, offset, after):
+    """Confere se `offset` cai logo depois da linha do evento `after`."""
+    size = f.seek(0, os.SEEK_END)
+    if offset > size:
+        return False
+    _, line = _last_complete_line(f, offset)
+    try:
+        return json.loads(line)['seq'] == after
+    except (ValueError, KeyError):
+        return False
+
+def follow(after=0, offset=0, poll_interval=1.0, stop=None):
+    """Como `tail -f`: entrega os eventos existentes e espera pelos próximos, indefinidamente
+    (ou até `stop()` retornar verdadeiro)."""
+    while True:
+        for event, offset in read_changes(after, offset):
+            after = event['seq']
+            yield event, offset
+        if stop and stop():
+            return
+        time.sleep(poll_interval)
+
+# --- Pontos de Controle dos Consumidores ---
+def _checkpoint_path(consumer):
+    if not _CONSUMER_NAME.match(consumer):
+        raise ValueError(f"Nome de consumidor inválido: {consumer!r} (use letras, números, '.', '_' ou '-')")
+    return os.path.join(CHECKPOINT_DIR, f"{consumer}.json")
+
+def load_checkpoint(consumer):
+    """Última sequência processada pelo consumidor e a posição no log: (seq, offset)."""
+    try:
+        with open(_checkpoint_path(consumer), 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+        return int(checkpoint['seq']), int(checkpoint.get('offset', 0))
+    except (FileNotFoundError, json.JSONDecodeError, KeyError, ValueError):
+        return 0, 0
+
+def save_checkpoint(consumer, seq, offset=0):
+    path = _checkpoint_path(consumer)
+    os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'seq': seq, 'offset': offset, 'saved_at': datetime.datetime.now().isoformat(timespec='seconds')}, f)
+    os.replace(tmp_path, path)
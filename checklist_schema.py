@@ -0,0 +1,292 @@
+import glob
+import json
+import os
+import re
+from collections import namedtuple
+
+# --- Modelos de Checklist Versionados ---
+# Cada arquivo em TEMPLATES_DIR descreve um tipo de levantamento (id + versão): seções,
+# campos e validações. Os modelos são lidos e compilados uma única vez, na importação, e
+# cada chamado grava 'template' e 'template_version' para ser sempre exibido, validado e
+# relatado com a versão em que foi preenchido. Chamados antigos, sem essas chaves, usam
+# o modelo padrão na versão 1.
+#
+# Campos (em seções repetidas, '{i}' nos rótulos vira o número do item e a chave gravada
+# é '<key>_<i>'):
+#   widget        'text', 'number', 'radio' ou 'photos' (lista de referências a anexos,
+#                 ver attachments; o relatório traz a contagem e as miniaturas)
+#   label         rótulo do formulário
+#   review_label  rótulo da revisão (somente leitura)
+#   report_label  rótulo da linha do relatório TXT/PDF/DOCX
+#   column        coluna (1 ou 2) no formulário e na revisão
+#   options       opções do rádio (padrão: Sim/Não)
+#   numeric       texto de quantidade ("42U", "8"): o valor inteiro é gravado também em
+#                 '<key>_num' (ou '<key>_num_<i>'), preservando o texto digitado
+#   validate      regras opcionais: required, pattern (+ message), integer, units,
+#                 min, max, max_field (não pode exceder o valor numérico de outro campo)
+TEMPLATES_DIR = os.environ.get("CHECKLIST_TEMPLATES_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates"))
+DEFAULT_TEMPLATE_ID = "caixa_rack_ap"
+DEFAULT_TEMPLATE_VERSION = 1
+
+RADIO_OPTIONS = ("Sim", "Não")
+# Limite de itens de uma seção repetida: formulário, validação e relatórios percorrem todos eles.
+MAX_ITEMS = int(os.environ.get("CHECKLIST_MAX_ITEMS", "100"))
+
+Field = namedtuple('Field', 'key widget label review_label report_label placeholder column options numeric max_field check')
+Section = namedtuple('Section', 'key title report_title repeat item_label fields')
+
+class TemplateError(ValueError):
+    """Arquivo de modelo de checklist inválido."""
+
+# --- Quantidades Digitadas ---
+_COUNT_TEXT = re.compile(r"^\s*(\d+)\s*(?:u|us|u's)?\s*$", re.IGNORECASE)
+
+def parse_count(value):
+    """Inteiro de uma quantidade digitada ('42U', '15 Us', '8'); None se vazia ou ilegível."""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value if value >= 0 else None
+    match = _COUNT_TEXT.match(str(value or ''))
+    return int(match.group(1)) if match else None
+
+def numeric_key(field_key, i=None):
+    return f'{field_key}_num' if i is None else f'{field_key}_num_{i}'
+
+# --- Validações Compiladas ---
+def _compile_check(spec, widget, options):
+    """Transforma as regras de um campo numa única função valor -> mensagem de erro (ou None)."""
+    rules = []
+    if spec.get('required'):
+        rules.append(lambda value: "campo obrigatório" if str(value).strip() == '' else None)
+    if 'pattern' in spec:
+        pattern = re.compile(spec['pattern'])
+        message = spec.get('message', "formato inválido")
+        rules.append(lambda value: message if str(value).strip() and not pattern.match(str(value).strip()) else None)
+    if spec.get('integer') or spec.get('units') or 'min' in spec or 'max' in spec:
+        low, high = spec.get('min'), spec.get('max')
+        units = spec.get('units')
+
+        def check_number(value):
+            text = str(value).strip()
+            if text == '':
+                return None
+            number = parse_count(text) if units else (int(text) if text.lstrip('-').isdigit() else None)
+            if number is None:
+                return "informe só o número (ex.: 42U ou 8)" if units else "informe um número inteiro"
+            if low is not None and number < low:
+                return f"deve ser no mínimo {low}"
+            if high is not None and number > high:
+                return f"deve ser no máximo {high}"
+            return None
+        rules.append(check_number)
+    if widget == 'radio':
+        rules.append(lambda value: None if value in options else f"use uma das opções: {'/'.join(options)}")
+    if not rules:
+        return None
+
+    def check(value):
+        for rule in rules:
+            error = rule(value)
+            if error:
+                return error
+        return None
+    return check
+
+def _build_field(spec):
+    widget = spec.get('widget', 'text')
+    if widget not in ('text', 'number', 'radio', 'photos'):
+        raise TemplateError(f"Widget desconhecido no campo {spec.get('key')!r}: {widget!r}")
+    options = tuple(spec.get('options', RADIO_OPTIONS)) if widget == 'radio' else ()
+    label = spec.get('label', spec['key'])
+    return Field(
+        key=spec['key'],
+        widget=widget,
+        label=label,
+        review_label=spec.get('review_label', label),
+        report_label=spec.get('report_label', label),
+        placeholder=spec.get('placeholder'),
+        column=int(spec.get('column', 1)),
+        options=options,
+        numeric=bool(spec.get('numeric')),
+        max_field=spec.get('validate', {}).get('max_field'),
+        check=_compile_check(spec.get('validate', {}), widget, options),
+    )
+
+# --- Modelo de Checklist ---
+class ChecklistTemplate:
+    """Modelo compilado: seções, índice de campos e validadores, prontos para uso."""
+
+    def __init__(self, spec, path=None):
+        try:
+            self.id = spec['id']
+            self.version = int(spec['version'])
+            self.title = spec['title']
+            self.sections = tuple(
+                Section(
+                    key=section['key'],
+                    title=section['title'],
+                    report_title=section.get('report_title'),
+                    repeat=section.get('repeat'),
+                    item_label=section.get('item_label', "Item"),
+                    fields=tuple(_build_field(field) for field in section['fields']),
+                )
+                for section in spec['sections']
+            )
+        except (KeyError, TypeError, ValueError, re.error) as e:
+            raise TemplateError(f"Modelo inválido ({path or spec.get('id')}): {e}") from e
+        self.description = spec.get('description', '')
+        self.path = path
+        self.fields = {field.key: field for section in self.sections if not section.repeat for field in section.fields}
+        self.repeat_sections = tuple(section for section in self.sections if section.repeat)
+        self.report_general_order = tuple(spec.get('report_general_order', ()))
+        stats = spec.get('stats') or {}
+        self.count_field = stats.get('count_field')
+        self.status_fields = dict(stats.get('status_fields', {}))
+        self.capacity_fields = dict(stats.get('capacity', {}))
+        for section in self.repeat_sections:
+            if section.repeat not in self.fields:
+                raise TemplateError(f"Modelo {self.id} v{self.version}: seção '{section.key}' repete por campo inexistente '{section.repeat}'")
+        self._checks = [
+            (section, field)
+            for section in self.sections
+            for field in section.fields
+            if field.check or field.max_field
+        ]
+        self._numeric = [(section, field) for section in self.sections for field in section.fields if field.numeric]
+
+    @property
+    def ref(self):
+        return f"{self.id}@{self.version}"
+
+    def item_count(self, data, count_field):
+        """Número de itens de uma seção repetida (ou valor de um campo numérico), entre 1 e MAX_ITEMS."""
+        try:
+            return min(max(int(data.get(count_field, 1)), 1), MAX_ITEMS)
+        except (TypeError, ValueError, OverflowError):
+            return 1
+
+    def check_field(self, field, data, i=None):
+        """Mensagem de erro de um campo (None se válido), incluindo a comparação com `max_field`."""
+        value = data.get(rack_key(field, i) if i is not None else field.key, default_value(field))
+        error = field.check(value) if field.check else None
+        if error is None and field.max_field:
+            limit = parse_count(data.get(f'{field.max_field}_{i}' if i is not None else field.max_field))
+            number = parse_count(value)
+            if limit is not None and number is not None and number > limit:
+                error = f"não pode passar de {limit}"
+        return error
+
+    def validate(self, data):
+        """Aplica os validadores compilados; retorna {chave: mensagem} com os campos inválidos."""
+        errors = {}
+        for section in self.repeat_sections:
+            try:
+                count = int(data.get(section.repeat, 1))
+            except (TypeError, ValueError, OverflowError):
+                continue
+            if count > MAX_ITEMS:
+                errors[section.repeat] = f"{self.field_label(section.repeat)}: no máximo {MAX_ITEMS}"
+        for section, field in self._checks:
+            if section.repeat:
+                for i in range(1, self.item_count(data, section.repeat) + 1):
+                    error = self.check_field(field, data, i)
+                    if error:
+                        errors[rack_key(field, i)] = f"{section.item_label} {i} – {field.review_label}: {error}"
+            else:
+                error = self.check_field(field, data)
+                if error:
+                    errors[field.key] = f"{field.review_label}: {error}"
+        return errors
+
+    def field_label(self, key):
+        """Rótulo de revisão de uma chave gravada no chamado ('rack_tamanho_2' -> 'Rack 2 – Tamanho')."""
+        base, _, suffix = key.rpartition('_')
+        for section in self.sections:
+            for field in section.fields:
+                if not section.repeat and key in (field.key, numeric_key(field.key)):
+                    return field.review_label + (" (número)" if key != field.key else "")
+                if section.repeat and suffix.isdigit() and base in (field.key, numeric_key(field.key)):
+                    return f"{section.item_label} {suffix} – {field.review_label}" + (" (número)" if base != field.key else "")
+        return key
+
+    def parse_numbers(self, data):
+        """Cópia do chamado com o valor inteiro de cada campo de quantidade em '<campo>_num_<i>'.
+
+        O texto original continua gravado; quantidades vazias ou ilegíveis não geram chave.
+        """
+        parsed = dict(data)
+        for section, field in self._numeric:
+            items = range(1, self.item_count(data, section.repeat) + 1) if section.repeat else [None]
+            for i in items:
+                key = numeric_key(field.key, i)
+                number = parse_count(data.get(rack_key(field, i) if i is not None else field.key))
+                if number is None:
+                    parsed.pop(key, None)
+                else:
+                    parsed[key] = number
+        return parsed
+
+# --- Registro dos Modelos ---
+def load_templates(directory=TEMPLATES_DIR):
+    """Lê e compila todos os modelos do diretório: {(id, versão): ChecklistTemplate}."""
+    templates = {}
+    for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                spec = json.load(f)
+        except json.JSONDecodeError as e:
+            raise TemplateError(f"Modelo inválido ({path}): {e}") from e
+        template = ChecklistTemplate(spec, path)
+        if (template.id, template.version) in templates:
+            raise TemplateError(f"Modelo {template.ref} definido em mais de um arquivo")
+        templates[(template.id, template.version)] = template
+    return templates
+
+TEMPLATES = load_templates()
+LATEST_TEMPLATES = {}
+for _template in sorted(TEMPLATES.values(), key=lambda t: t.version):
+    LATEST_TEMPLATES[_template.id] = _template
+
+def get_template(template_id=DEFAULT_TEMPLATE_ID, version=None):
+    """Modelo pela id e versão (a mais recente quando a versão não é informada)."""
+    if version is None:
+        template = LATEST_TEMPLATES.get(template_id)
+    else:
+        template = TEMPLATES.get((template_id, int(version)))
+    if template is None:
+        raise KeyError(f"Modelo de checklist desconhecido: {template_id}@{version or 'última'}")
+    return template
+
+def template_for(ticket_data):
+    """Modelo com que o chamado foi preenchido, pelas chaves gravadas nele."""
+    template_id = ticket_data.get('template') or DEFAULT_TEMPLATE_ID
+    version = ticket_data.get('template_version')
+    if version is None and template_id == DEFAULT_TEMPLATE_ID:
+        version = DEFAULT_TEMPLATE_VERSION
+    return get_template(template_id, version)
+
+# --- Seções do Modelo Padrão (importação e exportação) ---
+DEFAULT_TEMPLATE = get_template(DEFAULT_TEMPLATE_ID, DEFAULT_TEMPLATE_VERSION)
+GENERAL_SECTION, RACK_SECTION, AP_SECTION = (section.fields for section in DEFAULT_TEMPLATE.sections)
+GENERAL_FIELDS = [field.key for field in GENERAL_SECTION if field.widget != 'number']
+RACK_TEXT_FIELDS = [field.key for field in RACK_SECTION if field.widget == 'text']
+RACK_RADIO_FIELDS = [field.key for field in RACK_SECTION if field.widget == 'radio']
+RACK_FIELDS = RACK_TEXT_FIELDS + RACK_RADIO_FIELDS
+RACK_NUMERIC_FIELDS = [numeric_key(field.key) for field in get_template(DEFAULT_TEMPLATE_ID).repeat_sections[0].fields if field.numeric]
+AP_FIELDS = [field.key for field in AP_SECTION]
+
+def rack_key(field, i):
+    return f'{field.key}_{i}'
+
+def default_value(field):
+    """Valor que o widget assume antes de ser tocado (o rádio começa na primeira opção)."""
+    if field.widget == 'radio':
+        return field.options[0]
+    if field.widget == 'number':
+        return 1
+    if field.widget == 'photos':
+        return []
+    return ''
+
+def report_default(field):
+    """Valor do relatório quando o chamado não tem o campo (chamados antigos ou importados)."""
+    return "Não" if "Não" in field.options else ''
@@ -0,0 +1,186 @@
+# --- Linha de comando do Checklist (sem Streamlit) ---
+# Uso:
+#   python cli.py import chamados.csv --dead-letter rejeitados.jsonl
+#   python cli.py export arquivo.xlsx --layout long
+#   python cli.py seal
+#   python cli.py reindex
+#   python cli.py capacity --us 4 --tomadas 2 --cidade Recife
+#   python cli.py follow --consumidor bi
+#   python cli.py admin-user admin
+
+import argparse
+import csv
+import getpass
+import json
+import sys
+
+from ticket_export import FORMATS, LAYOUTS, STREAMING_FORMATS, iter_export_chunks, write_export
+from ticket_import import import_tickets, iter_rows
+from admin_auth import list_users, remove_user, set_password
+from capacity import CAPACITY_COLUMNS, find_capacity
+from change_feed import follow, latest_sequence, load_checkpoint, read_changes, save_checkpoint
+from checklist_schema import template_for
+from locations import with_location
+from ticket_store import HOT_MONTHS, rewrite_partitions, seal_old_partitions
+
+def cmd_import(args):
+    def progress(imported, rejected, elapsed):
+        rate = (imported + rejected) / elapsed if elapsed > 0 else 0.0
+        print(f"... {imported} importados, {rejected} rejeitados ({rate:.0f} linhas/s)", file=sys.stderr)
+
+    result = import_tickets(iter_rows(args.arquivo), batch_size=args.batch_size, dead_letter_path=args.dead_letter, progress=progress)
+    print(f"✅ {result['importados']} chamados importados, {result['rejeitados']} rejeitados "
+          f"em {result['segundos']:.2f}s ({result['linhas_por_segundo']:.0f} linhas/s)")
+    if result['rejeitados'] and args.dead_letter:
+        print(f"⚠️ Linhas rejeitadas gravadas em {args.dead_letter}")
+    return 1 if result['rejeitados'] else 0
+
+def cmd_export(args):
+    if args.arquivo == '-':
+        fmt = args.formato or 'jsonl'
+        if fmt not in STREAMING_FORMATS:
+            print(f"❌ O formato {fmt} não pode ir para a saída padrão (use {', '.join(STREAMING_FORMATS)})", file=sys.stderr)
+            return 2
+        for chunk in iter_export_chunks(fmt, args.layout):
+            sys.stdout.buffer.write(chunk)
+        return 0
+    fmt = args.formato or args.arquivo.rsplit('.', 1)[-1].lower()
+    if fmt not in FORMATS:
+        print(f"❌ Formato desconhecido: {fmt} (use a extensão ou --formato: {', '.join(FORMATS)})", file=sys.stderr)
+        return 2
+    with open(args.arquivo, 'wb') as f:
+        write_export(f, fmt, args.layout)
+    print(f"✅ Histórico exportado para {args.arquivo} ({fmt}, layout {args.layout})")
+    return 0
+
+def cmd_seal(args):
+    sealed = seal_old_partitions()
+    if sealed:
+        print(f"✅ Partições seladas: {', '.join(sealed)}")
+    else:
+        print(f"ℹ️ Nenhuma partição fora da janela quente de {HOT_MONTHS} meses.")
+    return 0
+
+def cmd_reindex(args):
+    count = rewrite_partitions(lambda data: with_location(template_for(data).parse_numbers(data)))
+    print(f"✅ {count} chamados reprocessados (quantidades numéricas, Cidade/UF, índices e agregados)")
+    return 0
+
+def cmd_capacity(args):
+    results = find_capacity(args.us, args.tomadas, not args.sem_ampliacao, args.cidade, args.limite)
+    if args.formato == 'jsonl':
+        for row in results:
+            sys.stdout.write(json.dumps(row, ensure_ascii=False) + "\n")
+    elif args.formato == 'csv':
+        writer = csv.DictWriter(sys.stdout, fieldnames=CAPACITY_COLUMNS)
+        writer.writeheader()
+        writer.writerows(results)
+    else:
+        for row in results:
+            print(f"{row['ticket_id']:<14} {row['agencia'][:28]:<28} {row['cidade_uf'][:26]:<26} "
+                  f"{row['maior_us_livres']:>4} U {row['maior_tomadas_livres']:>4} tomadas  "
+                  f"{row['racks_que_atendem']}/{row['racks']} racks  ampliação: {row['racks_com_ampliacao']}")
+        print(f"✅ {len(results)} agências encontradas", file=sys.stderr)
+    return 0
+
+def cmd_follow(args):
+    after, offset = load_checkpoint(args.consumidor) if args.consumidor else (0, 0)
+    if args.desde is not None:
+        after, offset = args.desde, 0
+    elif args.do_fim:
+        after, offset = latest_sequence(), 0
+    events = read_changes(after, offset) if args.uma_vez else follow(after, offset, poll_interval=args.intervalo)
+    try:
+        for event, offset in events:
+            sys.stdout.write(json.dumps(event, ensure_ascii=False) + "\n")
+            sys.stdout.flush()
+            if args.consumidor:
+                save_checkpoint(args.consumidor, event['seq'], offset)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+def cmd_admin_user(args):
+    if args.listar:
+        print("\n".join(list_users()))
+        return 0
+    if not args.usuario:
+        print("❌ Informe o usuário", file=sys.stderr)
+        return 2
+    if args.remover:
+        try:
+            remove_user(args.usuario)
+        except KeyError as e:
+            print(f"❌ {e.args[0]}", file=sys.stderr)
+            return 1
+        print(f"✅ Usuário {args.usuario} removido")
+        return 0
+    if args.senha_stdin:
+        password = sys.stdin.readline().rstrip("\n")
+    else:
+        password = getpass.getpass("Nova senha: ")
+        if password != getpass.getpass("Repita a senha: "):
+            print("❌ As senhas não conferem", file=sys.stderr)
+            return 1
+    try:
+        set_password(args.usuario, password)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    print(f"✅ Senha de {args.usuario} definida; sessões abertas desse usuário foram encerradas")
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="Ferramentas de linha de comando do Checklist Help Desk.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    p_import = subparsers.add_parser('import', help="Importa chamados em lote de um arquivo CSV ou JSONL.")
+    p_import.add_argument('arquivo', help="Arquivo .csv ou .jsonl com um chamado por linha")
+    p_import.add_argument('--batch-size', type=int, default=500, help="Chamados gravados por transação (padrão: 500)")
+    p_import.add_argument('--dead-letter', default="rejeitados.jsonl", help="Arquivo JSONL para as linhas rejeitadas")
+    p_import.set_defaults(func=cmd_import)
+
+    p_export = subparsers.add_parser('export', help="Exporta todo o histórico em CSV, JSONL ou XLSX.")
+    p_export.add_argument('arquivo', help="Arquivo de saída (o formato vem da extensão) ou '-' para stdout")
+    p_export.add_argument('--formato', choices=FORMATS, help="Força o formato de saída")
+    p_export.add_argument('--layout', choices=LAYOUTS, default='wide', help="wide: um chamado por linha; long: um rack por linha")
+    p_export.set_defaults(func=cmd_export)
+
+    p_seal = subparsers.add_parser('seal', help="Comprime as partições mensais fora da janela quente.")
+    p_seal.set_defaults(func=cmd_seal)
+
+    p_reindex = subparsers.add_parser('reindex', help="Preenche os campos numéricos dos chamados antigos e recalcula índices e agregados.")
+    p_reindex.set_defaults(func=cmd_reindex)
+
+    p_capacity = subparsers.add_parser('capacity', help="Lista agências com Us e tomadas livres para uma implantação.")
+    p_capacity.add_argument('--us', type=int, default=0, help="Mínimo de Us livres num mesmo rack")
+    p_capacity.add_argument('--tomadas', type=int, default=0, help="Mínimo de tomadas livres no mesmo rack")
+    p_capacity.add_argument('--sem-ampliacao', action='store_true', help="Não inclui agências só por permitirem ampliação de réguas")
+    p_capacity.add_argument('--cidade', help="Filtra pela Cidade/UF (trecho do nome)")
+    p_capacity.add_argument('--limite', type=int, help="Número máximo de agências listadas")
+    p_capacity.add_argument('--formato', choices=('tabela', 'csv', 'jsonl'), default='tabela')
+    p_capacity.set_defaults(func=cmd_capacity)
+
+    p_follow = subparsers.add_parser('follow', help="Acompanha o feed de alterações do histórico (como tail -f), em JSONL.")
+    p_follow.add_argument('--consumidor', help="Nome do consumidor: retoma do último ponto de controle e o atualiza a cada evento")
+    p_follow.add_argument('--desde', type=int, help="Começa após esta sequência (ignora o ponto de controle)")
+    p_follow.add_argument('--do-fim', action='store_true', help="Ignora os eventos existentes e mostra só os novos")
+    p_follow.add_argument('--intervalo', type=float, default=1.0, help="Segundos entre verificações de novos eventos (padrão: 1)")
+    p_follow.add_argument('--uma-vez', action='store_true', help="Mostra os eventos pendentes e termina, sem esperar novos")
+    p_follow.set_defaults(func=cmd_follow)
+
+    p_admin = subparsers.add_parser('admin-user', help="Cria administradores, troca senhas ou remove usuários do painel.")
+    p_admin.add_argument('usuario', nargs='?', help="Usuário do painel administrativo")
+    p_admin.add_argument('--remover', action='store_true', help="Remove o usuário")
+    p_admin.add_argument('--listar', action='store_true', help="Lista os usuários cadastrados")
+    p_admin.add_argument('--senha-stdin', action='store_true', help="Lê a senha da entrada padrão (para scripts)")
+    p_admin.set_defaults(func=cmd_admin_user)
+
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+# --- Normalização de Cidade/UF ---
+# O campo 'cidade_uf' é texto livre ("São Paulo/SP", "sao paulo - sp", "SP"). Ao arquivar,
+# cada chamado ganha 'cidade' e 'uf' canônicos (o texto digitado é preservado): acentos
+# e caixa são ignorados na comparação, a UF é extraída da sigla ou do nome do estado no
+# fim do texto e o nome da cidade vem da tabela local de municípios (MUNICIPALITIES_FILE,
+# CSV municipio,uf — pode ser trocada pela tabela completa do IBGE). Cidades fora da
+# tabela ficam com o nome digitado, em caixa de título.
+
+import csv
+import functools
+import os
+import re
+import unicodedata
+
+MUNICIPALITIES_FILE = os.environ.get(
+    "CHECKLIST_MUNICIPALITIES_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "municipios.csv"),
+)
+
+STATES = {
+    'AC': "Acre", 'AL': "Alagoas", 'AP': "Amapá", 'AM': "Amazonas", 'BA': "Bahia", 'CE': "Ceará",
+    'DF': "Distrito Federal", 'ES': "Espírito Santo", 'GO': "Goiás", 'MA': "Maranhão", 'MT': "Mato Grosso",
+    'MS': "Mato Grosso do Sul", 'MG': "Minas Gerais", 'PA': "Pará", 'PB': "Paraíba", 'PR': "Paraná",
+    'PE': "Pernambuco", 'PI': "Piauí", 'RJ': "Rio de Janeiro", 'RN': "Rio Grande do Norte",
+    'RS': "Rio Grande do Sul", 'RO': "Rondônia", 'RR': "Roraima", 'SC': "Santa Catarina", 'SP': "São Paulo",
+    'SE': "Sergipe", 'TO': "Tocantins",
+}
+_LOWERCASE_WORDS = {'de', 'da', 'do', 'das', 'dos', 'e'}
+# Sigla no fim do texto, depois de '/', ',', ';', '|', '(', '-' ou espaço.
+_TRAILING_UF = re.compile(r"^(.*?)\s*(?:[/,;|(-]|\s)\s*([a-z]{2})\)?$")
+
+def fold(text):
+    """Minúsculas sem acentos, com os espaços normalizados; mantém um caractere por caractere do texto."""
+    text = " ".join(unicodedata.normalize('NFC', str(text or '')).split())
+    return "".join(unicodedata.normalize('NFKD', ch)[0].lower() for ch in text)
+
+def _title(text):
+    words = text.split(" ")
+    return " ".join(
+        word.lower() if n and word.lower() in _LOWERCASE_WORDS else "-".join(part[:1].upper() + part[1:].lower() for part in word.split("-"))
+        for n, word in enumerate(words)
+    )
+
+def _load_municipalities(path=MUNICIPALITIES_FILE):
+    """{(nome dobrado, UF): nome oficial} e {nome dobrado: [UFs]} da tabela local."""
+    by_city_uf, ufs_by_city = {}, {}
+    try:
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            for row in csv.DictReader(f):
+                name, uf = row['municipio'].strip(), row['uf'].strip().upper()
+                by_city_uf[(fold(name), uf)] = name
+                ufs_by_city.setdefault(fold(name), []).append(uf)
+    except FileNotFoundError:
+        pass
+    return by_city_uf, ufs_by_city
+
+_MUNICIPALITIES, _UFS_BY_CITY = _load_municipalities()
+_STATE_BY_NAME = {fold(name): uf for uf, name in STATES.items()}
+
+@functools.lru_cache(maxsize=4096)
+def normalize_location(text):
+    """(cidade, uf) canônicos de um 'Cidade/UF' digitado; '' no que não puder ser identificado."""
+    original = " ".join(unicodedata.normalize('NFC', str(text or '')).split())
+    folded = fold(original)
+    if not folded:
+        return '', ''
+    if folded.upper() in STATES:
+        return '', folded.upper()
+    if len(_UFS_BY_CITY.get(folded, ())) == 1:
+        uf = _UFS_BY_CITY[folded][0]
+        return _MUNICIPALITIES[(folded, uf)], uf
+
+    city, uf = folded, ''
+    match = _TRAILING_UF.match(folded)
+    if match and match.group(2).upper() in STATES:
+        city, uf = match.group(1), match.group(2).upper()
+    else:
+        for state_name, state_uf in _STATE_BY_NAME.items():
+            for separator in ("/", ",", " - ", " "):
+                if folded.endswith(separator + state_name):
+                    city, uf = folded[:-len(separator + state_name)], state_uf
+                    break
+            if uf:
+                break
+        else:
+            if folded in _STATE_BY_NAME:
+                return '', _STATE_BY_NAME[folded]
+    start = len(city) - len(city.lstrip(" -/,;"))
+    city = city.strip(" -/,;")
+    if not city:
+        return '', uf
+    if uf and (city, uf) in _MUNICIPALITIES:
+        return _MUNICIPALITIES[(city, uf)], uf
+    if not uf and len(_UFS_BY_CITY.get(city, ())) == 1:
+        uf = _UFS_BY_CITY[city][0]
+        return _MUNICIPALITIES[(city, uf)], uf
+    # Fora da tabela: o nome digitado (com os acentos originais) em caixa de título.
+    return _title(original[start:start + len(city)]), uf
+
+def location_label(cidade, uf):
+    """'Cidade/UF', só a cidade ou só a UF, conforme o que se conhece."""
+    if cidade and uf:
+        return f"{cidade}/{uf}"
+    return cidade or uf
+
+def with_location(data):
+    """Cópia do chamado com 'cidade' e 'uf' normalizados a partir de 'cidade_uf' (texto preservado)."""
+    if 'cidade_uf' not in data:
+        return data
+    cidade, uf = normalize_location(data.get('cidade_uf'))
+    if data.get('cidade') == cidade and data.get('uf') == uf:
+        return data
+    return dict(data, cidade=cidade, uf=uf)
@@ -0,0 +1,101 @@
+# --- Instrumentação de Desempenho ---
+# Ative com CHECKLIST_METRICS=1. Desativada, `timed` devolve a própria função (decorator)
+# ou um contexto vazio compartilhado, sem custo de medição.
+
+import os
+import threading
+import time
+from collections import deque
+from functools import wraps
+
+ENABLED = os.environ.get("CHECKLIST_METRICS", "0") == "1"
+SAMPLES_PER_STAGE = 1024
+
+_samples = {}
+_totals = {}
+_lock = threading.Lock()
+
+def observe(stage, seconds):
+    """Registra uma duração (em segundos) para a etapa informada."""
+    with _lock:
+        if stage not in _samples:
+            _samples[stage] = deque(maxlen=SAMPLES_PER_STAGE)
+            _totals[stage] = [0, 0.0]
+        _samples[stage].append(seconds)
+        _totals[stage][0] += 1
+        _totals[stage][1] += seconds
+
+class _Timer:
+    __slots__ = ('stage', 'started')
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.stage, time.perf_counter() - self.started)
+        return False
+
+    def __call__(self, func):
+        stage = self.stage
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                observe(stage, time.perf_counter() - started)
+        return wrapper
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __call__(self, func):
+        return func
+
+_NULL_TIMER = _NullTimer()
+
+def timed(stage):
+    """Mede uma etapa: use como `with timed('store.load'):` ou como `@timed('report.pdf')`."""
+    if not ENABLED:
+        return _NULL_TIMER
+    return _Timer(stage)
+
+# --- Leitura das Métricas ---
+def _percentile(ordered, pct):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def stage_summary():
+    """Resumo por etapa: contagem, tempo total e latências p50/p95 (ms) das últimas amostras."""
+    with _lock:
+        snapshot = {stage: (sorted(samples), tuple(_totals[stage])) for stage, samples in _samples.items()}
+    return {
+        stage: {
+            'count': count,
+            'total_s': total,
+            'p50_ms': _percentile(ordered, 50) * 1000,
+            'p95_ms': _percentile(ordered, 95) * 1000,
+        }
+        for stage, (ordered, (count, total)) in sorted(snapshot.items())
+    }
+
+def prometheus_text():
+    """Métricas no formato de exposição de texto do Prometheus (tipo summary)."""
+    lines = [
+        "# HELP checklist_stage_seconds Duração das etapas instrumentadas.",
+        "# TYPE checklist_stage_seconds summary",
+    ]
+    for stage, summary in stage_summary().items():
+        lines.append(f'checklist_stage_seconds{{stage="{stage}",quantile="0.5"}} {summary["p50_ms"] / 1000:.6f}')
+        lines.append(f'checklist_stage_seconds{{stage="{stage}",quantile="0.95"}} {summary["p95_ms"] / 1000:.6f}')
+        lines.append(f'checklist_stage_seconds_sum{{stage="{stage}"}} {summary["total_s"]:.6f}')
+        lines.append(f'checklist_stage_seconds_count{{stage="{stage}"}} {summary["count"]}')
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,92 @@
+# --- Botões de Relatório com Fila ---
+# TXT continua sendo gerado no clique do download. PDF e DOCX passam pela fila de
+# relatórios (report_executor): o botão "Gerar" enfileira o pedido com a prioridade de
+# quem o fez, mostra a posição na fila enquanto espera e, pronto o arquivo, troca-se pelo
+# botão de download. A sessão guarda um único arquivo por formato — o do chamado atual,
+# enquanto ele não mudar; abrir outro chamado descarta o anterior. Relatórios
+# já gerados no aquecimento (warmup) aparecem direto como download. A exportação do
+# histórico (painel administrativo) usa o mesmo caminho, por `queued_file_button`.
+
+from concurrent.futures import TimeoutError
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from report_executor import EXECUTOR, ExecutorSaturated, RateLimited
+from reports import create_docx_report, create_pdf_report, get_report_data
+from warmup import prerendered_report, record_report_download, report_digest
+
+QUEUED_FORMATS = {
+    'pdf': ("📑", ".PDF", create_pdf_report, "application/pdf"),
+    'docx': ("📝", ".DOCX", create_docx_report, "application/vnd.openxmlformats-officedocument.wordprocessingml.document"),
+}
+POLL_SECONDS = 0.5
+
+def session_owner():
+    """Identificador da sessão do Streamlit, usado no limite de taxa por sessão."""
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else None
+
+def _wait_for(job, status):
+    """Espera o pedido, atualizando o aviso de fila/geração até ele terminar."""
+    while True:
+        position = EXECUTOR.position(job)
+        if position:
+            status.info(f"⏳ Na fila de relatórios: {position}º lugar")
+        else:
+            status.info("⚙️ Gerando relatório...")
+        try:
+            return job.future.result(timeout=POLL_SECONDS)
+        except TimeoutError:
+            continue
+
+def queued_file_button(icon, label, func, args, priority, state_key, version, file_name, mime, key,
+                       prepared=None, on_click="rerun", on_click_args=None):
+    """Botão "Gerar" → fila → download. `func(*args)` roda na fila com o limite da sessão; o
+    resultado fica em session_state[state_key] enquanto `version` não mudar. `prepared` são
+    bytes já prontos para esta versão, servidos sem passar pela fila."""
+    ready = st.session_state.get(state_key)
+    if ready is not None and ready[0] != version:
+        del st.session_state[state_key]  # arquivo de outra versão: libera a memória já
+        ready = None
+    if ready is None and prepared is not None:
+        ready = st.session_state[state_key] = (version, prepared)
+    # Um único espaço na tela: botão "Gerar", depois o aviso de fila e por fim o download.
+    slot = st.empty()
+    if ready is None:
+        if not slot.button(f"{icon} Gerar {label}", key=f"report_request:{key}"):
+            return
+        try:
+            job = EXECUTOR.submit(func, *args, priority=priority, owner=session_owner())
+        except (RateLimited, ExecutorSaturated) as e:
+            slot.warning(f"⏱️ {e}")
+            return
+        try:
+            payload = _wait_for(job, slot)
+        except Exception as e:
+            slot.error(f"❌ Não foi possível gerar o arquivo: {e}")
+            return
+        ready = st.session_state[state_key] = (version, payload)
+    slot.download_button(f"{icon} Baixar {label}", ready[1], file_name, mime, key=f"report_download:{key}",
+                         on_click=on_click, args=on_click_args)
+
+def _render_report(builder, ticket_data):
+    return builder(ticket_data).getvalue()
+
+def queued_download_button(fmt, ticket_id, ticket_data, priority, key):
+    icon, label, builder, mime = QUEUED_FORMATS[fmt]
+    digest = report_digest(ticket_data)
+    queued_file_button(icon, label, _render_report, (builder, ticket_data), priority,
+                       f"report_file:{fmt}", (ticket_id, digest), f"Checklist_{ticket_id.upper()}{label.lower()}", mime, f"{fmt}:{key}",
+                       prepared=prerendered_report(ticket_id, fmt, digest),
+                       on_click=record_report_download, on_click_args=(ticket_id, fmt))
+
+def report_download_buttons(ticket_id, ticket_data, priority, key):
+    """Linha de botões TXT/PDF/DOCX de um chamado; `key` distingue o formulário da revisão."""
+    d_col1, d_col2, d_col3 = st.columns(3)
+    with d_col1:
+        st.download_button("📄 Baixar .TXT", lambda: "\n".join(get_report_data(ticket_data)), f"Checklist_{ticket_id.upper()}.txt", "text/plain", key=f"report_download:txt:{key}")
+    with d_col2:
+        queued_download_button('pdf', ticket_id, ticket_data, priority, key)
+    with d_col3:
+        queued_download_button('docx', ticket_id, ticket_data, priority, key)
@@ -0,0 +1,149 @@
+# --- Fila de Geração de Relatórios ---
+# PDF, DOCX e exportações do histórico são gerados por um número fixo de threads de
+# trabalho (REPORT_WORKERS), com uma fila de prioridade limitada: os relatórios que o
+# técnico baixa do próprio checklist passam à frente das revisões e das operações em lote
+# do painel administrativo. Cada sessão (ou cliente da API) tem um limite de taxa em
+# balde de fichas; quem o excede recebe `RateLimited` com o tempo de espera, e a fila
+# cheia gera `ExecutorSaturated` em vez de acumular trabalho sem fim.
+#
+# A geração com ReportLab/python-docx é Python puro: limitar as threads de relatório
+# limita a disputa pelo GIL com as sessões do Streamlit, que continuam respondendo.
+
+import heapq
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+from perf_metrics import ENABLED as METRICS_ENABLED, observe
+
+REPORT_WORKERS = int(os.environ.get("CHECKLIST_REPORT_WORKERS", "2"))
+MAX_PENDING = int(os.environ.get("CHECKLIST_REPORT_QUEUE", "64"))
+RATE_PER_MINUTE = float(os.environ.get("CHECKLIST_REPORT_RATE", "12"))
+RATE_BURST = int(os.environ.get("CHECKLIST_REPORT_BURST", "4"))
+
+PRIORITY_TECHNICIAN = 0
+PRIORITY_ADMIN = 1
+PRIORITY_BULK = 2
+PRIORITY_BACKGROUND = 3
+
+class RateLimited(Exception):
+    def __init__(self, retry_after):
+        super().__init__(f"Limite de relatórios atingido; tente novamente em {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+class ExecutorSaturated(Exception):
+    """Fila de relatórios cheia."""
+
+# --- Limite de Taxa por Sessão ---
+class RateLimiter:
+    """Balde de fichas por dono: `burst` pedidos seguidos, repostos a `per_minute` por minuto."""
+
+    def __init__(self, per_minute=RATE_PER_MINUTE, burst=RATE_BURST):
+        self.rate = per_minute / 60.0
+        self.burst = burst
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, owner):
+        """Consome uma ficha do dono ou levanta `RateLimited` com os segundos até a próxima."""
+        if owner is None or self.rate <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(owner, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens < 1:
+                self._buckets[owner] = (tokens, now)
+                raise RateLimited((1 - tokens) / self.rate)
+            self._buckets[owner] = (tokens - 1, now)
+            # Donos que já recompuseram o balde não precisam mais de registro.
+            if len(self._buckets) > 4096:
+                full = now - self.burst / self.rate
+                self._buckets = {key: value for key, value in self._buckets.items() if value[1] > full}
+
+# --- Executor ---
+class ReportJob:
+    """Pedido na fila; `future` recebe o resultado."""
+
+    __slots__ = ('priority', 'seq', 'func', 'args', 'future', 'submitted', 'started')
+
+    def __init__(self, priority, seq, func, args):
+        self.priority = priority
+        self.seq = seq
+        self.func = func
+        self.args = args
+        self.future = Future()
+        self.submitted = time.perf_counter()
+        self.started = None
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+class ReportExecutor:
+    def __init__(self, workers=REPORT_WORKERS, max_pending=MAX_PENDING, limiter=None):
+        self.workers = max(1, workers)
+        self.max_pending = max_pending
+        self.limiter = limiter or RateLimiter()
+        self._pending = []
+        self._running = 0
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._threads = []
+
+    def _start_workers(self):
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, name=f"report-worker-{len(self._threads)}", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def submit(self, func, *args, priority=PRIORITY_ADMIN, owner=None):
+        """Enfileira `func(*args)`; devolve o `ReportJob`. Pode levantar `RateLimited` ou `ExecutorSaturated`."""
+        self.limiter.acquire(owner)
+        with self._cond:
+            if len(self._pending) >= self.max_pending:
+                raise ExecutorSaturated(f"Fila de relatórios cheia ({self.max_pending} pedidos); tente novamente em instantes")
+            job = ReportJob(priority, next(self._seq), func, args)
+            heapq.heappush(self._pending, job)
+            self._start_workers()
+            self._cond.notify()
+        return job
+
+    def run(self, func, *args, priority=PRIORITY_ADMIN, owner=None, timeout=None):
+        """Enfileira e espera o resultado."""
+        return self.submit(func, *args, priority=priority, owner=owner).future.result(timeout)
+
+    def position(self, job):
+        """Lugar do pedido na fila (1 = o próximo a ser gerado; 0 quando já está em geração ou pronto)."""
+        with self._cond:
+            if job.started is not None:
+                return 0
+            return sum(1 for other in self._pending if other < job) + 1
+
+    def load(self):
+        """(pedidos em geração, pedidos na fila)."""
+        with self._cond:
+            return self._running, len(self._pending)
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                job = heapq.heappop(self._pending)
+                job.started = time.perf_counter()
+                self._running += 1
+            if METRICS_ENABLED:
+                observe("report.queue_wait", job.started - job.submitted)
+            try:
+                if job.future.set_running_or_notify_cancel():
+                    try:
+                        job.future.set_result(job.func(*job.args))
+                    except BaseException as e:
+                        job.future.set_exception(e)
+            finally:
+                with self._cond:
+                    self._running -= 1
+
+EXECUTOR = ReportExecutor()
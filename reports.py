@@ -0,0 +1,107 @@
+import io
+from docx import Document
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from reportlab.lib.pagesizes import letter
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image as PDFImage, Table
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.enums import TA_LEFT, TA_CENTER
+from reportlab.lib.units import inch
+from docx.shared import Inches
+from attachments import ReportImageBudget
+from checklist_schema import rack_key, report_default, template_for
+from perf_metrics import timed
+
+# --- Funções de Geração de Relatório ---
+def _photo_lines(label, refs, with_images):
+    """Linhas de um campo de fotos: a contagem e, para PDF/DOCX, os hashes das miniaturas."""
+    refs = refs or []
+    lines = [f"{label}: {len(refs)} foto(s)" if refs else f"{label}: Nenhuma"]
+    if with_images and refs:
+        lines.append("IMAGES: " + " ".join(ref['sha256'] for ref in refs))
+    return lines
+
+@timed("report.lines")
+def get_report_data(ticket_data, with_images=False):
+    """Linhas do relatório; `with_images` inclui as linhas 'IMAGES:' usadas pelo PDF e pelo DOCX."""
+    template = template_for(ticket_data)
+    report_lines = [f"TITLE: {template.title}", ""]
+
+    for section in template.sections:
+        if section.repeat:
+            for i in range(1, template.item_count(ticket_data, section.repeat) + 1):
+                report_lines.append(f"SUBTITLE: {section.item_label} {i}:")
+                for field in section.fields:
+                    if field.widget == 'photos':
+                        report_lines.extend(_photo_lines(field.report_label.format(i=i), ticket_data.get(rack_key(field, i)), with_images))
+                        continue
+                    report_lines.append(f"{field.report_label.format(i=i)}: {ticket_data.get(rack_key(field, i), report_default(field))}")
+                report_lines.append("")
+            continue
+        if section.report_title:
+            report_lines.extend([f"SUBTITLE: {section.report_title}", ""])
+        fields = {field.key: field for field in section.fields}
+        order = [key for key in template.report_general_order if key in fields] or list(fields)
+        for key in order:
+            field = fields[key]
+            if field.widget == 'photos':
+                report_lines.extend(_photo_lines(field.report_label, ticket_data.get(key), with_images))
+                continue
+            value = template.item_count(ticket_data, key) if field.widget == 'number' else ticket_data.get(key, report_default(field))
+            report_lines.append(f"{field.report_label}: {value}")
+        report_lines.append("")
+
+    while report_lines and report_lines[-1] == "":
+        report_lines.pop()
+    return report_lines
+
+@timed("report.pdf")
+def create_pdf_report(ticket_data):
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=inch, leftMargin=inch, topMargin=inch, bottomMargin=inch)
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(name='Title', parent=styles['h1'], fontName='Helvetica-Bold', fontSize=14, alignment=TA_CENTER, spaceAfter=20)
+    subtitle_style = ParagraphStyle(name='Subtitle', parent=styles['h2'], fontName='Helvetica-Bold', fontSize=12, alignment=TA_LEFT, spaceAfter=10)
+    body_style = ParagraphStyle(name='Body', parent=styles['Normal'], fontName='Helvetica', fontSize=10, leading=14, spaceAfter=4)
+    story = []
+    budget = ReportImageBudget()
+    for line in get_report_data(ticket_data, with_images=True):
+        if line.startswith("IMAGES:"): story.extend(_pdf_images(line, budget, body_style))
+        elif line.startswith("TITLE:"): story.append(Paragraph(line.replace("TITLE:", "").strip(), title_style))
+        elif line.startswith("SUBTITLE:"): story.append(Paragraph(line.replace("SUBTITLE:", "").strip(), subtitle_style))
+        elif line.strip() == "": story.append(Spacer(1, 0.1*inch))
+        else: story.append(Paragraph(line.replace("<br>", "&nbsp;<br/>&nbsp;"), body_style))
+    doc.build(story)
+    buffer.seek(0)
+    return buffer
+
+def _pdf_images(line, budget, body_style):
+    """Miniaturas em grade de 3 colunas; a imagem só é lida do disco quando a página é desenhada."""
+    paths = budget.thumbnails(line.replace("IMAGES:", "").split())
+    cells = [PDFImage(path, width=2 * inch, height=1.6 * inch, kind='proportional') for path in paths if path]
+    story = []
+    if cells:
+        rows = [cells[n:n + 3] for n in range(0, len(cells), 3)]
+        story.append(Table(rows, colWidths=[2.1 * inch] * 3, hAlign='LEFT'))
+    if len(cells) < len(paths):
+        story.append(Paragraph(f"({len(paths) - len(cells)} foto(s) fora do relatório)", body_style))
+    return story
+
+@timed("report.docx")
+def create_docx_report(ticket_data):
+    document = Document()
+    budget = ReportImageBudget()
+    for line in get_report_data(ticket_data, with_images=True):
+        if line.startswith("IMAGES:"):
+            paths = budget.thumbnails(line.replace("IMAGES:", "").split())
+            for path in filter(None, paths):
+                document.add_picture(path, width=Inches(2))
+            missing = paths.count(None)
+            if missing:
+                document.add_paragraph(f"({missing} foto(s) fora do relatório)")
+        elif line.startswith("TITLE:"):
+            p = document.add_paragraph(); p.add_run(line.replace("TITLE:", "").strip()).bold = True; p.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        elif line.startswith("SUBTITLE:"):
+            p = document.add_paragraph(); p.add_run(line.replace("SUBTITLE:", "").strip()).bold = True
+        else: document.add_paragraph(line)
+    buffer = io.BytesIO(); document.save(buffer); buffer.seek(0)
+    return buffer
@@ -0,0 +1,38 @@
+# --- Servidor ASGI do App (Streamlit + cookie de sessão do administrador) ---
+#   uvicorn serve:app --host 0.0.0.0 --port 8501
+#
+# Serve o mesmo app.py do `streamlit run`, com duas rotas a mais para a sessão do painel
+# administrativo sobreviver a recargas e a reconexões em outra réplica:
+#   GET /admin/session?code=   troca o código de uso único do login pelo cookie HttpOnly
+#   GET /admin/logout          apaga o cookie (o token já foi revogado no servidor)
+# Com `streamlit run app.py` as rotas não existem e o token fica só no estado da sessão.
+
+import os
+
+os.environ["CHECKLIST_ADMIN_COOKIE"] = "1"  # antes de importar admin_auth
+
+import streamlit as st
+from starlette.responses import RedirectResponse
+from starlette.routing import Route
+
+from admin_auth import SESSION_COOKIE, SESSION_HOURS, redeem_cookie_handoff
+
+APP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+def _app_root(request, route):
+    return request.url.path[:-len(route)] + "/"
+
+async def admin_session(request):
+    token = redeem_cookie_handoff(request.query_params.get('code'))
+    response = RedirectResponse(_app_root(request, "/admin/session") + ("?pagina=admin" if token else ""), status_code=303)
+    if token:
+        response.set_cookie(SESSION_COOKIE, token, max_age=int(SESSION_HOURS * 3600), path="/",
+                            httponly=True, samesite='strict', secure=request.url.scheme == 'https')
+    return response
+
+async def admin_logout(request):
+    response = RedirectResponse(_app_root(request, "/admin/logout"), status_code=303)
+    response.delete_cookie(SESSION_COOKIE, path="/")
+    return response
+
+app = st.App(APP_FILE, routes=[Route("/admin/session", admin_session), Route("/admin/logout", admin_logout)])
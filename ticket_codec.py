@@ -0,0 +1,146 @@
+# --- Codificação Compacta dos Chamados no Disco ---
+# Cada chamado vira um registro posicional [ticket_id, gerais, racks, extras]:
+#   gerais  valores de TICKET_FIELDS na ordem fixa (None = campo ausente)
+#   racks   uma lista por rack com os valores de RACK_FIELDS; 'Sim'/'Não' viram 1/0 e as
+#           quantidades já convertidas ('rack_tamanho_num'...) ficam como inteiros
+#   extras  {chave: valor} para qualquer outro campo (ex.: chaves de botões do formulário)
+# Assim os nomes longos como 'rack_tomadas_disponiveis_12' não se repetem no arquivo e a
+# decodificação devolve exatamente o dicionário original.
+
+import gzip
+import json
+import os
+import re
+
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+RECORD_FORMAT = os.environ.get("CHECKLIST_RECORD_FORMAT", "json")          # 'json' ou 'msgpack'
+COLD_COMPRESSION = os.environ.get("CHECKLIST_COLD_COMPRESSION", "gzip")    # 'gzip' ou 'zstd'
+
+# Posições gravadas no disco: não reordene nem remova, apenas acrescente no final.
+# Campos de outros modelos de checklist (templates/) vão para 'extras'.
+TICKET_FIELDS = [
+    'agencia', 'endereco', 'cidade_uf', 'num_racks',
+    'ap_quantidade', 'ap_setor', 'ap_condicoes', 'ap_distancia',
+    'archived_at', 'template', 'template_version',
+    'cidade', 'uf',
+]
+RACK_FIELDS = [
+    'rack_local', 'rack_tamanho', 'rack_us_disponiveis', 'rack_reguas', 'rack_tomadas_disponiveis',
+    'rack_ampliacao_reguas', 'rack_estado', 'rack_organizado', 'rack_identificado',
+    'rack_tamanho_num', 'rack_us_disponiveis_num', 'rack_reguas_num', 'rack_tomadas_disponiveis_num',
+]
+RACK_RADIO_FIELDS = ['rack_ampliacao_reguas', 'rack_estado', 'rack_organizado', 'rack_identificado']
+_RACK_POSITIONS = {field: n for n, field in enumerate(RACK_FIELDS)}
+_RADIO_POSITIONS = {_RACK_POSITIONS[field] for field in RACK_RADIO_FIELDS}
+_RACK_KEY = re.compile(r'^(%s)_(\d+)$' % '|'.join(sorted(RACK_FIELDS, key=len, reverse=True)))
+_YES_NO = {'Sim': 1, 'Não': 0}
+_YES_NO_DECODE = {1: 'Sim', 0: 'Não'}
+
+# --- Registro Posicional ---
+def encode_ticket(ticket_id, data):
+    general = [data.get(field) for field in TICKET_FIELDS]
+    racks = []
+    extras = {}
+    general_keys = set(TICKET_FIELDS)
+    for key, value in data.items():
+        if key in general_keys:
+            if value is None:
+                extras[key] = value
+            continue
+        match = _RACK_KEY.match(key)
+        if not match or not isinstance(value, (str, int)) or isinstance(value, bool):
+            extras[key] = value
+            continue
+        position = _RACK_POSITIONS[match.group(1)]
+        rack_number = int(match.group(2))
+        if rack_number < 1 or match.group(2) != str(rack_number):
+            extras[key] = value
+            continue
+        while len(racks) < rack_number:
+            racks.append([None] * len(RACK_FIELDS))
+        if position in _RADIO_POSITIONS:
+            if not isinstance(value, str):
+                extras[key] = value
+                continue
+            value = _YES_NO.get(value, value)
+        racks[rack_number - 1][position] = value
+    return [ticket_id, general, racks, extras]
+
+_rack_keys_cache = {}
+_RACK_KEYS_CACHED = 1000
+
+def _rack_keys(rack_number):
+    """Nomes das chaves do rack N ('rack_local_N', ...), gerados uma única vez por número.
+
+    Decodificações simultâneas (sessões, API, aquecimento) podem gerar a mesma tupla duas vezes;
+    `setdefault` faz todas usarem a primeira, e cada número só enxerga as suas chaves.
+    """
+    keys = _rack_keys_cache.get(rack_number)
+    if keys is None:
+        keys = tuple(f'{field}_{rack_number}' for field in RACK_FIELDS)
+        if rack_number <= _RACK_KEYS_CACHED:
+            keys = _rack_keys_cache.setdefault(rack_number, keys)
+    return keys
+
+def decode_ticket(record):
+    """Inverso de `encode_ticket`: devolve (ticket_id, dados)."""
+    ticket_id, general, racks, extras = record
+    data = {field: value for field, value in zip(TICKET_FIELDS, general) if value is not None}
+    for rack_number, rack in enumerate(racks, start=1):
+        for position, (key, value) in enumerate(zip(_rack_keys(rack_number), rack)):
+            if value is None:
+                continue
+            if position in _RADIO_POSITIONS and value.__class__ is int:
+                value = _YES_NO_DECODE[value]
+            data[key] = value
+    data.update(extras)
+    return ticket_id, data
+
+# --- Serialização ---
+def dumps_record(ticket_id, data, fmt=None):
+    record = encode_ticket(ticket_id, data)
+    if (fmt or RECORD_FORMAT) == 'msgpack':
+        if msgpack is None:
+            raise RuntimeError("CHECKLIST_RECORD_FORMAT=msgpack requer o pacote 'msgpack' (pip install msgpack)")
+        return msgpack.packb(record, use_bin_type=True)
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b"\n"
+
+def loads_record(payload, fmt):
+    if fmt == 'msgpack':
+        return decode_ticket(msgpack.unpackb(payload, raw=False))
+    return decode_ticket(json.loads(payload))
+
+def iter_records(blob, fmt):
+    """Percorre uma sequência de registros concatenados (partição selada já descomprimida)."""
+    if fmt == 'msgpack':
+        unpacker = msgpack.Unpacker(raw=False)
+        unpacker.feed(blob)
+        for record in unpacker:
+            yield decode_ticket(record)
+        return
+    for line in blob.splitlines():
+        if line:
+            yield decode_ticket(json.loads(line))
+
+# --- Compressão das Partições Seladas ---
+def compress(payload, method=None):
+    if (method or COLD_COMPRESSION) == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("CHECKLIST_COLD_COMPRESSION=zstd requer o pacote 'zstandard' (pip install zstandard)")
+        return zstandard.ZstdCompressor(level=9).compress(payload)
+    return gzip.compress(payload, compresslevel=6)
+
+def decompress(payload, method):
+    if method == 'zstd':
+        return zstandard.ZstdDecompressor().decompress(payload)
+    return gzip.decompress(payload)
@@ -0,0 +1,130 @@
+import csv
+import io
+import json
+
+from checklist_schema import GENERAL_FIELDS, RACK_FIELDS, RACK_NUMERIC_FIELDS, AP_FIELDS
+from ticket_store import iter_completed_tickets, list_ticket_summaries
+
+# --- Layouts e Formatos de Exportação ---
+LAYOUTS = ('wide', 'long')
+FORMATS = ('csv', 'jsonl', 'xlsx', 'json')
+STREAMING_FORMATS = ('csv', 'jsonl', 'json')
+MIME_TYPES = {
+    'csv': "text/csv",
+    'jsonl': "application/x-ndjson",
+    'xlsx': "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    'json': "application/json",
+}
+LOCATION_COLUMNS = ['cidade', 'uf']
+LONG_COLUMNS = ['ticket_id', 'archived_at', 'template', 'template_version'] + GENERAL_FIELDS + LOCATION_COLUMNS + ['num_racks'] + AP_FIELDS + ['rack_numero'] + RACK_FIELDS + RACK_NUMERIC_FIELDS
+
+def _num_racks(data):
+    try:
+        return max(int(data.get('num_racks', 1)), 1)
+    except (TypeError, ValueError):
+        return 1
+
+def wide_columns(max_racks):
+    columns = ['ticket_id', 'archived_at', 'template', 'template_version'] + GENERAL_FIELDS + LOCATION_COLUMNS + ['num_racks']
+    for i in range(1, max_racks + 1):
+        columns.extend(f'{field}_{i}' for field in RACK_FIELDS + RACK_NUMERIC_FIELDS)
+    return columns + AP_FIELDS
+
+def export_columns(layout):
+    """Colunas do layout; no 'wide' o maior número de racks vem dos resumos do índice."""
+    if layout == 'long':
+        return LONG_COLUMNS
+    max_racks = max((summary['num_racks'] for _, summary in list_ticket_summaries()), default=1)
+    return wide_columns(max_racks)
+
+# --- Geradores de Linhas ---
+def iter_wide_rows():
+    for ticket_id, data in iter_completed_tickets():
+        row = {'ticket_id': ticket_id}
+        row.update(data)
+        yield row
+
+def iter_long_rows():
+    """Uma linha por rack, repetindo os dados gerais e do AP da agência."""
+    for ticket_id, data in iter_completed_tickets():
+        base = {'ticket_id': ticket_id, 'archived_at': data.get('archived_at', ''), 'num_racks': _num_racks(data),
+                'template': data.get('template', ''), 'template_version': data.get('template_version', '')}
+        base.update({field: data.get(field, '') for field in GENERAL_FIELDS + LOCATION_COLUMNS + AP_FIELDS})
+        for i in range(1, base['num_racks'] + 1):
+            row = dict(base, rack_numero=i)
+            row.update({field: data.get(f'{field}_{i}', '') for field in RACK_FIELDS + RACK_NUMERIC_FIELDS})
+            yield row
+
+def iter_export_rows(layout):
+    if layout not in LAYOUTS:
+        raise ValueError(f"Layout de exportação desconhecido: {layout}")
+    return iter_long_rows() if layout == 'long' else iter_wide_rows()
+
+# --- Serialização em Blocos ---
+def iter_json_chunks(tickets_per_chunk=100):
+    """Histórico legível no mesmo formato do antigo completed_checklists.json ({id: dados}, indentado).
+
+    O disco guarda registros compactos; esta é a visão para leitura humana. Ignora o layout.
+    """
+    buffer = io.StringIO()
+    buffer.write("{")
+    count = 0
+    for count, (ticket_id, data) in enumerate(iter_completed_tickets(), start=1):
+        separator = "\n" if count == 1 else ",\n"
+        body = json.dumps(data, ensure_ascii=False, indent=4).replace("\n", "\n    ")
+        buffer.write(f"{separator}    {json.dumps(ticket_id, ensure_ascii=False)}: {body}")
+        if count % tickets_per_chunk == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    buffer.write("\n}\n" if count else "}\n")
+    yield buffer.getvalue().encode('utf-8')
+
+def iter_export_chunks(fmt, layout, rows_per_chunk=500):
+    """Gera a exportação CSV/JSONL/JSON em blocos de bytes, com memória constante."""
+    if fmt == 'json':
+        yield from iter_json_chunks()
+        return
+    if fmt not in STREAMING_FORMATS:
+        raise ValueError(f"Formato sem suporte a streaming: {fmt}")
+    columns = export_columns(layout)
+    buffer = io.StringIO()
+    writer = None
+    if fmt == 'csv':
+        buffer.write('\ufeff')  # BOM para o Excel reconhecer UTF-8
+        writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction='ignore')
+        writer.writeheader()
+
+    for count, row in enumerate(iter_export_rows(layout), start=1):
+        if writer:
+            writer.writerow(row)
+        else:
+            buffer.write(json.dumps({col: row.get(col, '') for col in columns}, ensure_ascii=False) + "\n")
+        if count % rows_per_chunk == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+def write_xlsx(fileobj, layout):
+    """Grava a planilha em modo write-only do openpyxl, que não mantém as linhas em memória."""
+    from openpyxl import Workbook
+
+    columns = export_columns(layout)
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Checklists")
+    sheet.append(columns)
+    for row in iter_export_rows(layout):
+        sheet.append([row.get(col, '') for col in columns])
+    workbook.save(fileobj)
+
+def write_export(fileobj, fmt, layout):
+    """Escreve a exportação completa num arquivo binário aberto."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato de exportação desconhecido: {fmt}")
+    if fmt == 'xlsx':
+        write_xlsx(fileobj, layout)
+    else:
+        for chunk in iter_export_chunks(fmt, layout):
+            fileobj.write(chunk)
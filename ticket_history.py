@@ -0,0 +1,38 @@
+# --- Histórico de Versões dos Chamados ---
+# O histórico guarda só a versão mais recente de cada chamado, completa (leitura direta,
+# como antes). Quando um chamado é rearquivado, a versão substituída vira uma diferença
+# reversa campo a campo — o que aplicar à versão nova para voltar à anterior — gravada no
+# arquivo de histórico da partição (ver ticket_store). O espaço cresce apenas com os
+# campos que mudaram, e qualquer versão é refeita aplicando as diferenças da mais nova
+# para a mais antiga.
+
+# Campos que não contam como alteração: rearquivar um chamado idêntico não cria versão.
+VOLATILE_FIELDS = ('archived_at',)
+
+def same_content(data, other):
+    """Verdadeiro se os dois chamados só diferem nos campos voláteis (ex.: data de arquivamento)."""
+    keys = (data.keys() | other.keys()).difference(VOLATILE_FIELDS)
+    return all(data.get(key) == other.get(key) for key in keys)
+
+def reverse_diff(newer, older):
+    """Diferença que, aplicada a `newer`, reproduz `older`: {'set': {campo: valor}, 'unset': [campos]}."""
+    diff = {'set': {key: value for key, value in older.items() if key not in newer or newer[key] != value}}
+    unset = [key for key in newer if key not in older]
+    if unset:
+        diff['unset'] = unset
+    return diff
+
+def apply_diff(data, diff):
+    older = dict(data)
+    for key in diff.get('unset', ()):
+        older.pop(key, None)
+    older.update(diff.get('set', {}))
+    return older
+
+def changed_fields(data, other):
+    """Campos com valores diferentes entre dois chamados, como (campo, valor em data, valor em other)."""
+    return [
+        (key, data.get(key), other.get(key))
+        for key in sorted(data.keys() | other.keys())
+        if data.get(key) != other.get(key)
+    ]
@@ -0,0 +1,134 @@
+import csv
+import json
+import re
+import time
+import unicodedata
+
+from checklist_schema import DEFAULT_TEMPLATE_ID, GENERAL_FIELDS, MAX_ITEMS, RACK_TEXT_FIELDS, RACK_RADIO_FIELDS, AP_FIELDS, get_template
+from ticket_store import normalize_ticket_id, save_completed_tickets
+
+TICKET_ID_COLUMNS = ('ticket_id', 'chamado')
+_COUNT = re.compile(r"^\d+(?:\.0*)?$")  # "3" ou "3.0" (planilhas)
+
+class RowValidationError(ValueError):
+    """Linha de importação que não pode ser convertida num chamado válido."""
+
+# --- Leitura em Streaming ---
+def iter_csv_rows(path):
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        for row in csv.DictReader(f):
+            yield row
+
+def iter_jsonl_rows(path):
+    """Linhas JSONL ainda como texto: a decodificação fica em `normalize_row`, para que uma
+    linha malformada vá para o dead-letter em vez de interromper a importação."""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield line.rstrip("\n")
+
+def iter_rows(path):
+    """Lê CSV ou JSONL linha a linha, escolhendo o leitor pela extensão do arquivo."""
+    if path.lower().endswith(('.jsonl', '.ndjson')):
+        return iter_jsonl_rows(path)
+    return iter_csv_rows(path)
+
+# --- Validação e Normalização ---
+def _clean_text(value):
+    if value is None:
+        return ''
+    return str(value).strip()
+
+def _normalize_yes_no(value, field):
+    text = unicodedata.normalize('NFKD', _clean_text(value)).encode('ascii', 'ignore').decode().lower()
+    if text in ('sim', 's'):
+        return "Sim"
+    if text in ('nao', 'n', ''):
+        return "Não"
+    raise RowValidationError(f"Valor inválido para '{field}': {value!r} (use Sim/Não)")
+
+def normalize_row(row):
+    """Converte uma linha importada (dicionário do CSV ou texto JSONL) em (ticket_id, dados) no
+    formato do formulário de checklist (modelo padrão)."""
+    if isinstance(row, str):
+        try:
+            row = json.loads(row)
+        except ValueError as e:
+            raise RowValidationError(f"JSON inválido: {e}")
+    if not isinstance(row, dict):
+        raise RowValidationError(f"Registro não é um objeto JSON: {type(row).__name__}")
+    raw_id = next((row[col] for col in TICKET_ID_COLUMNS if _clean_text(row.get(col))), None)
+    if raw_id is None:
+        raise RowValidationError("Código do chamado ausente")
+    ticket_id = normalize_ticket_id(raw_id)
+
+    text = _clean_text(row.get('num_racks')) or '1'
+    if not _COUNT.match(text):
+        raise RowValidationError(f"Quantidade de racks inválida: {row.get('num_racks')!r}")
+    num_racks = int(text.split('.')[0])
+    if not 1 <= num_racks <= MAX_ITEMS:
+        raise RowValidationError(f"Quantidade de racks deve estar entre 1 e {MAX_ITEMS}: {num_racks}")
+
+    data = {field: _clean_text(row.get(field)) for field in GENERAL_FIELDS}
+    data['num_racks'] = num_racks
+    for i in range(1, num_racks + 1):
+        for field in RACK_TEXT_FIELDS:
+            data[f'{field}_{i}'] = _clean_text(row.get(f'{field}_{i}'))
+        for field in RACK_RADIO_FIELDS:
+            data[f'{field}_{i}'] = _normalize_yes_no(row.get(f'{field}_{i}'), f'{field}_{i}')
+    for field in AP_FIELDS:
+        data[field] = _clean_text(row.get(field))
+    template = get_template(DEFAULT_TEMPLATE_ID)
+    data['template'] = template.id
+    data['template_version'] = template.version
+    errors = template.validate(data)
+    if errors:
+        raise RowValidationError("; ".join(errors.values()))
+    return ticket_id, template.parse_numbers(data)
+
+# --- Pipeline de Importação ---
+def import_tickets(rows, batch_size=500, dead_letter_path=None, progress=None):
+    """Valida as linhas e arquiva em lotes; linhas rejeitadas vão para o arquivo de dead-letter (JSONL).
+
+    Um chamado que reaparece no arquivo fica com a primeira linha: as repetições são rejeitadas,
+    para que nenhuma sobrescreva outra nem conte duas vezes como importada.
+
+    Retorna um dicionário com as contagens de linhas importadas/rejeitadas e a taxa em linhas/s.
+    """
+    started = time.perf_counter()
+    imported = rejected = 0
+    batch = {}
+    first_lines = {}  # ticket_id -> linha em que apareceu
+    dead_letter = open(dead_letter_path, 'w', encoding='utf-8') if dead_letter_path else None
+    try:
+        for line_number, row in enumerate(rows, start=1):
+            try:
+                ticket_id, data = normalize_row(row)
+                if ticket_id in first_lines:
+                    raise RowValidationError(f"Chamado {ticket_id} repetido (já importado da linha {first_lines[ticket_id]})")
+            except RowValidationError as e:
+                rejected += 1
+                if dead_letter:
+                    dead_letter.write(json.dumps({'linha': line_number, 'erro': str(e), 'registro': row}, ensure_ascii=False) + "\n")
+                continue
+            first_lines[ticket_id] = line_number
+            batch[ticket_id] = data
+            if len(batch) >= batch_size:
+                save_completed_tickets(batch)
+                imported += len(batch)
+                batch = {}
+                if progress:
+                    progress(imported, rejected, time.perf_counter() - started)
+        save_completed_tickets(batch)
+        imported += len(batch)
+    finally:
+        if dead_letter:
+            dead_letter.close()
+
+    elapsed = time.perf_counter() - started
+    return {
+        'importados': imported,
+        'rejeitados': rejected,
+        'segundos': elapsed,
+        'linhas_por_segundo': (imported + rejected) / elapsed if elapsed > 0 else 0.0,
+    }
@@ -0,0 +1,151 @@
+from collections import Counter
+
+from checklist_schema import DEFAULT_TEMPLATE_ID, get_template, numeric_key, parse_count, template_for
+from locations import location_label, normalize_location
+from perf_metrics import timed
+
+# --- Agregações do Histórico ---
+STATUS_KEYS = {
+    'estado': '✅ Rack em bom estado',
+    'organizado': '🗂️ Rack organizado',
+    'identificado': '🏷️ Equipamentos identificados'
+}
+SUMMARY_FIELDS = ('agencia', 'cidade_uf', 'num_racks')
+
+def summarize_ticket(ticket_data):
+    """Resumo compacto de um chamado: colunas de listagem e contagens Sim/Não por status de rack.
+
+    É o que o índice do histórico guarda por chamado, para que listagem e estatísticas
+    não precisem abrir os chamados completos. Os campos de contagem e de status vêm da
+    seção 'stats' do modelo do chamado; modelos sem ela não somam racks. A capacidade livre
+    de versões publicadas antes dela (caixa_rack_ap v1) usa os campos da versão mais recente
+    do mesmo modelo, lidos do texto digitado.
+    """
+    template = template_for(ticket_data)
+    num_racks = template.item_count(ticket_data, template.count_field) if template.count_field else 0
+    status = {}
+    for key, field in template.status_fields.items():
+        values = [ticket_data.get(f'{field}_{i}', 'Não') for i in range(1, num_racks + 1)]
+        status[key] = [values.count('Sim'), values.count('Não')]
+    # Cidade/UF canônicos gravados no arquivamento; chamados anteriores são normalizados aqui.
+    if 'uf' in ticket_data:
+        cidade, uf = ticket_data.get('cidade', ''), ticket_data['uf']
+    else:
+        cidade, uf = normalize_location(ticket_data.get('cidade_uf', ''))
+    summary = {
+        'agencia': ticket_data.get('agencia', ''),
+        'cidade_uf': location_label(cidade, uf),
+        'cidade': cidade,
+        'uf': uf,
+        'num_racks': num_racks,
+        'status': status,
+    }
+    capacity_fields = template.capacity_fields or get_template(template.id).capacity_fields
+    if capacity_fields:
+        summary['racks'] = [_rack_capacity(ticket_data, capacity_fields, i) for i in range(1, num_racks + 1)]
+    if template.id != DEFAULT_TEMPLATE_ID:
+        summary['template'] = template.ref
+    return summary
+
+def _rack_capacity(ticket_data, fields, i):
+    """[Us livres, tomadas livres, permite ampliação (1/0)] de um rack; None quando não informado.
+
+    Usa os inteiros gravados na entrada e, para chamados anteriores a eles, converte o texto.
+    """
+    values = []
+    for name in ('free_u', 'free_outlets'):
+        number = ticket_data.get(numeric_key(fields[name], i))
+        values.append(number if number is not None else parse_count(ticket_data.get(f'{fields[name]}_{i}')))
+    values.append(1 if ticket_data.get(f"{fields['expandable']}_{i}") == 'Sim' else 0)
+    return values
+
+@timed("stats.compute")
+def compute_stats_from_summaries(summaries):
+    """Calcula numa única passada as métricas exibidas na aba de estatísticas.
+
+    `capacity_by_city` soma, por cidade, [racks com capacidade, Us livres, tomadas livres];
+    `uf_counts` e `cities_by_uf` ({UF: {cidade: chamados}}) são os totais por estado e o
+    detalhamento por cidade ('' quando a UF ou a cidade não foi identificada).
+    """
+    total_tickets = 0
+    total_racks = 0
+    location_counts = Counter()
+    uf_counts = Counter()
+    cities_by_uf = {}
+    status_counts = {key: {'Sim': 0, 'Não': 0} for key in STATUS_KEYS}
+    capacity_by_city = {}
+
+    for summary in summaries:
+        total_tickets += 1
+        total_racks += summary['num_racks']
+        if summary['cidade_uf']:
+            location_counts[summary['cidade_uf']] += 1
+            uf = summary.get('uf', '')
+            uf_counts[uf] += 1
+            cities = cities_by_uf.setdefault(uf, {})
+            cities[summary.get('cidade', '')] = cities.get(summary.get('cidade', ''), 0) + 1
+        if summary.get('racks'):
+            city = capacity_by_city.setdefault(summary['cidade_uf'], [0, 0, 0])
+            for free_u, free_outlets, _ in summary['racks']:
+                city[0] += 1
+                city[1] += free_u or 0
+                city[2] += free_outlets or 0
+        for key, (sim, nao) in summary['status'].items():
+            if key not in status_counts:
+                continue
+            status_counts[key]['Sim'] += sim
+            status_counts[key]['Não'] += nao
+
+    return {
+        'total_tickets': total_tickets,
+        'total_racks': total_racks,
+        'avg_racks': total_racks / total_tickets if total_tickets else 0.0,
+        'location_counts': dict(location_counts.most_common()),
+        'uf_counts': dict(uf_counts.most_common()),
+        'cities_by_uf': cities_by_uf,
+        'status_counts': status_counts,
+        'capacity_by_city': capacity_by_city,
+    }
+
+def compute_ticket_stats(tickets):
+    """Mesmas métricas a partir de chamados completos (qualquer iterável de dicionários de chamado)."""
+    return compute_stats_from_summaries(summarize_ticket(ticket_data) for ticket_data in tickets)
+
+def merge_ticket_stats(parts):
+    """Soma estatísticas já calculadas, como os agregados pré-computados das partições seladas."""
+    total_tickets = 0
+    total_racks = 0
+    location_counts = Counter()
+    uf_counts = Counter()
+    cities_by_uf = {}
+    status_counts = {key: {'Sim': 0, 'Não': 0} for key in STATUS_KEYS}
+    capacity_by_city = {}
+
+    for part in parts:
+        total_tickets += part['total_tickets']
+        total_racks += part['total_racks']
+        location_counts.update(part['location_counts'])
+        # Agregados selados antes da normalização não têm os totais por UF (rode `cli.py reindex`).
+        uf_counts.update(part.get('uf_counts', {}))
+        for uf, cities in part.get('cities_by_uf', {}).items():
+            merged = cities_by_uf.setdefault(uf, {})
+            for city_name, count in cities.items():
+                merged[city_name] = merged.get(city_name, 0) + count
+        for city_name, counts in part.get('capacity_by_city', {}).items():
+            city = capacity_by_city.setdefault(city_name, [0, 0, 0])
+            for n, value in enumerate(counts):
+                city[n] += value
+        for key, counts in part['status_counts'].items():
+            status_counts[key]['Sim'] += counts['Sim']
+            status_counts[key]['Não'] += counts['Não']
+
+    return {
+        'total_tickets': total_tickets,
+        'total_racks': total_racks,
+        'avg_racks': total_racks / total_tickets if total_tickets else 0.0,
+        'location_counts': dict(location_counts.most_common()),
+        'uf_counts': dict(uf_counts.most_common()),
+        'cities_by_uf': cities_by_uf,
+        'status_counts': status_counts,
+        'capacity_by_city': capacity_by_city,
+    }
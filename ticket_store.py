@@ -0,0 +1,497 @@
+import datetime
+import gzip
+import json
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from change_feed import OP_CREATED, OP_UPDATED, append_changes
+from perf_metrics import timed
+from locations import with_location
+from ticket_history import apply_diff, reverse_diff, same_content
+from ticket_codec import COLD_COMPRESSION, RECORD_FORMAT, compress, decompress, dumps_record, iter_records, loads_record
+from ticket_stats import compute_stats_from_summaries, merge_ticket_stats, summarize_ticket
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos
+    fcntl = None
+
+# --- Local do histórico (compartilhado entre réplicas via CHECKLIST_DATA_DIR) ---
+DATA_DIR = os.environ.get("CHECKLIST_DATA_DIR", ".")
+COMPLETED_FILE = os.path.join(DATA_DIR, "completed_checklists.json")  # formato antigo, migrado para ARCHIVE_DIR
+GENERATION_FILE = os.path.join(DATA_DIR, "completed_checklists.generation")
+LOCK_FILE = os.path.join(DATA_DIR, "completed_checklists.lock")
+ARCHIVE_DIR = os.path.join(DATA_DIR, "archive")
+MANIFEST_FILE = os.path.join(ARCHIVE_DIR, "manifest.json")
+
+# Partições mensais mais recentes ficam "quentes" (registros compactos indexados, regraváveis);
+# as mais antigas são seladas e comprimidas, com agregados pré-computados (ver ticket_codec).
+HOT_MONTHS = int(os.environ.get("CHECKLIST_HOT_MONTHS", "3"))
+UNDATED_PARTITION = "0000-00"
+COLD_CACHE_SIZE = 2
+
+# --- Normalização de Identificadores ---
+def normalize_ticket_id(raw_id):
+    """Converte '12345', 'clar-12345' ou ' Clar-12345 ' para o formato 'CLAR-12345'."""
+    formatted_id = str(raw_id).strip().upper()
+    if formatted_id.isdigit():
+        formatted_id = f"CLAR-{formatted_id}"
+    elif not formatted_id.startswith("CLAR-"):
+        formatted_id = f"CLAR-{formatted_id}"
+    return formatted_id
+
+# --- Coordenação entre Processos ---
+@contextmanager
+def _store_lock():
+    """Trava exclusiva no histórico, válida entre todos os processos que usam o mesmo DATA_DIR."""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    with open(LOCK_FILE, 'a') as lock:
+        if fcntl:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+def store_generation():
+    """Contador incrementado a cada gravação; as réplicas o comparam para invalidar seus caches."""
+    try:
+        with open(GENERATION_FILE, 'r', encoding='utf-8') as f:
+            return int(f.read().strip() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+def _bump_generation():
+    _atomic_write(GENERATION_FILE, str(store_generation() + 1).encode('utf-8'))
+
+def store_version():
+    """Identificador da versão atual do histórico: a geração mais o carimbo do manifesto,
+    para que edições manuais também sejam percebidas."""
+    try:
+        stat = os.stat(MANIFEST_FILE)
+    except FileNotFoundError:
+        return f"{store_generation()}-0"
+    return f"{store_generation()}-{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+# --- Arquivos das Partições ---
+def _atomic_write(path, payload):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+def _hot_path(key):
+    return os.path.join(ARCHIVE_DIR, f"{key}.records")
+
+def _cold_path(key):
+    return os.path.join(ARCHIVE_DIR, f"{key}.cold")
+
+def _index_path(key):
+    return os.path.join(ARCHIVE_DIR, f"{key}.index.json")
+
+# Partições gravadas antes da codificação compacta (índice sem 'format'): objeto JSON
+# {ticket_id: dados} quando quentes e JSONL com gzip quando seladas. Continuam legíveis
+# e são convertidas na próxima vez que a partição for regravada.
+def _legacy_hot_path(key):
+    return os.path.join(ARCHIVE_DIR, f"{key}.json")
+
+def _legacy_cold_path(key):
+    return os.path.join(ARCHIVE_DIR, f"{key}.jsonl.gz")
+
+def _history_path(key):
+    return os.path.join(ARCHIVE_DIR, f"{key}.history.jsonl")
+
+def _read_json(path, default=None):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return default
+
+def _read_partition_index(key):
+    return _read_json(_index_path(key), {'sealed': False, 'format': RECORD_FORMAT, 'data_size': 0, 'tickets': {}})
+
+def _remove_if_exists(*paths):
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+def partition_key(data):
+    """Mês ('AAAA-MM') em que o chamado foi arquivado; chamados antigos sem data vão para '0000-00'."""
+    archived_at = data.get('archived_at') or ''
+    return archived_at[:7] if len(archived_at) >= 7 else UNDATED_PARTITION
+
+def _write_hot_partition(key, tickets):
+    """Grava a partição como registros compactos concatenados e o índice com a posição em bytes
+    e o resumo de cada chamado, para que ler um chamado não exija decodificar a partição.
+
+    Os dados são trocados antes do índice: um índice novo nunca aponta para o arquivo antigo.
+    Quem leu o índice antigo e abre o arquivo novo é pego pela conferência de tamanho e do
+    ticket_id de cada registro (ver _read_hot_entry).
+    """
+    entries = {}
+    path = _hot_path(key)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        for ticket_id, data in tickets.items():
+            payload = dumps_record(ticket_id, data)
+            entries[ticket_id] = [f.tell(), len(payload), summarize_ticket(data)]
+            f.write(payload)
+        data_size = f.tell()
+    os.replace(tmp_path, path)
+    index = {'sealed': False, 'format': RECORD_FORMAT, 'data_size': data_size, 'tickets': entries}
+    _atomic_write(_index_path(key), json.dumps(index, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+    _remove_if_exists(_legacy_hot_path(key))
+    return index
+
+def _write_cold_partition(key, tickets):
+    """Sela a partição: registros compactos comprimidos e índice com os resumos e os agregados da partição."""
+    summaries = {ticket_id: summarize_ticket(data) for ticket_id, data in tickets.items()}
+    blob = b"".join(dumps_record(ticket_id, data) for ticket_id, data in tickets.items())
+    _atomic_write(_cold_path(key), compress(blob))
+    index = {
+        'sealed': True,
+        'format': RECORD_FORMAT,
+        'compression': COLD_COMPRESSION,
+        'tickets': {ticket_id: [None, None, summary] for ticket_id, summary in summaries.items()},
+        'aggregates': compute_stats_from_summaries(summaries.values()),
+    }
+    _atomic_write(_index_path(key), json.dumps(index, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+    _remove_if_exists(_hot_path(key), _legacy_hot_path(key), _legacy_cold_path(key))
+    return index
+
+def _read_hot_entry(f, entry, fmt, ticket_id):
+    """Dados do chamado na posição indicada pelo índice; ValueError se ali estiver outro
+    chamado (índice e arquivo de gravações diferentes)."""
+    f.seek(entry[0])
+    payload = f.read(entry[1])
+    if fmt is None:
+        return json.loads(payload.decode('utf-8'))
+    stored_id, data = loads_record(payload, fmt)
+    if stored_id != ticket_id:
+        raise ValueError(f"{ticket_id}: posição do índice contém {stored_id}")
+    return data
+
+def _iter_cold_partition(key, index):
+    fmt = index.get('format')
+    if fmt is None:
+        with gzip.open(_legacy_cold_path(key), 'rt', encoding='utf-8') as f:
+            for line in f:
+                record = json.loads(line)
+                yield record['ticket_id'], record['data']
+        return
+    with open(_cold_path(key), 'rb') as f:
+        blob = decompress(f.read(), index.get('compression', 'gzip'))
+    yield from iter_records(blob, fmt)
+
+def _iter_hot_partition(key, index, retry=True):
+    fmt = index.get('format')
+    path = _hot_path(key) if fmt else _legacy_hot_path(key)
+    done = set()
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == index['data_size']:
+            try:
+                for ticket_id, entry in index['tickets'].items():
+                    data = _read_hot_entry(f, entry, fmt, ticket_id)
+                    done.add(ticket_id)
+                    yield ticket_id, data
+                return
+            except ValueError:
+                if not retry:
+                    raise
+    if retry:  # regravada depois da leitura do índice; os chamados já entregues não se repetem
+        for ticket_id, data in _iter_partition(key, _read_partition_index(key), retry=False):
+            if ticket_id not in done:
+                yield ticket_id, data
+
+def _iter_partition(key, index, retry=True):
+    if index.get('sealed'):
+        return _iter_cold_partition(key, index)
+    return _iter_hot_partition(key, index, retry)
+
+_cold_cache = OrderedDict()
+_cold_cache_lock = threading.Lock()
+
+def _load_cold_partition(key, index):
+    """Descomprime uma partição selada sob demanda, mantendo as últimas em cache."""
+    path = _cold_path(key) if index.get('format') else _legacy_cold_path(key)
+    stamp = os.stat(path).st_mtime_ns
+    with _cold_cache_lock:
+        cached = _cold_cache.get(key)
+        if cached and cached[0] == stamp:
+            _cold_cache.move_to_end(key)
+            return cached[1]
+    tickets = dict(_iter_cold_partition(key, index))
+    with _cold_cache_lock:
+        _cold_cache[key] = (stamp, tickets)
+        if len(_cold_cache) > COLD_CACHE_SIZE:
+            _cold_cache.popitem(last=False)
+    return tickets
+
+def _load_partition(key):
+    index = _read_json(_index_path(key))
+    return dict(_iter_partition(key, index)) if index else {}
+
+def _write_partition(key, tickets, sealed):
+    return _write_cold_partition(key, tickets) if sealed else _write_hot_partition(key, tickets)
+
+# --- Manifesto e Migração ---
+def _read_manifest():
+    return _read_json(MANIFEST_FILE)
+
+def _write_manifest(manifest):
+    _atomic_write(MANIFEST_FILE, json.dumps(manifest, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+def _migrate_legacy_file():
+    """Distribui o arquivo único antigo (COMPLETED_FILE) pelas partições mensais.
+
+    Deve ser chamada com `_store_lock()` adquirida.
+    """
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    legacy = _read_json(COMPLETED_FILE, {}) if os.path.exists(COMPLETED_FILE) else {}
+    partitions = {}
+    for ticket_id, data in legacy.items():
+        partitions.setdefault(partition_key(data), {})[ticket_id] = data
+    manifest = {'tickets': {}, 'sealed': [], 'versions': {}}
+    for key, tickets in partitions.items():
+        _write_hot_partition(key, tickets)
+        manifest['tickets'].update(dict.fromkeys(tickets, key))
+    _seal_due_partitions(manifest, partitions)
+    _write_manifest(manifest)
+    if os.path.exists(COMPLETED_FILE):
+        os.replace(COMPLETED_FILE, f"{COMPLETED_FILE}.migrated")
+    _bump_generation()
+    return manifest
+
+def _ensure_manifest():
+    manifest = _read_manifest()
+    if manifest is None:
+        with _store_lock():
+            manifest = _read_manifest() or _migrate_legacy_file()
+    return manifest
+
+# --- Selagem das Partições Antigas ---
+def _seal_cutoff(today=None):
+    today = today or datetime.date.today()
+    month_index = today.year * 12 + today.month - 1 - (HOT_MONTHS - 1)
+    return f"{month_index // 12:04d}-{month_index % 12 + 1:02d}"
+
+def _seal_due_partitions(manifest, loaded=None):
+    """Sela as partições anteriores à janela quente. Deve ser chamada com `_store_lock()` adquirida."""
+    cutoff = _seal_cutoff()
+    hot_keys = set(manifest['tickets'].values()) - set(manifest['sealed'])
+    for key in sorted(k for k in hot_keys if k < cutoff):
+        tickets = (loaded or {}).get(key)
+        _write_cold_partition(key, tickets if tickets is not None else _load_partition(key))
+        manifest['sealed'].append(key)
+
+def seal_old_partitions():
+    """Sela as partições fora da janela quente; retorna as chaves seladas."""
+    _ensure_manifest()
+    with _store_lock():
+        manifest = _read_manifest()
+        before = set(manifest['sealed'])
+        _seal_due_partitions(manifest)
+        sealed_now = sorted(set(manifest['sealed']) - before)
+        if sealed_now:
+            _write_manifest(manifest)
+            _bump_generation()
+    return sealed_now
+
+# --- Funções de Persistência ---
+def save_completed_ticket(ticket_id, data):
+    save_completed_tickets({ticket_id: data})
+
+@timed("store.save")
+def save_completed_tickets(tickets):
+    """Arquiva vários chamados ({id: dados}) regravando apenas as partições que eles tocam.
+
+    Um chamado fica na partição do mês em que foi arquivado pela primeira vez; rearquivá-lo
+    regrava essa partição (mesmo selada) em vez de duplicá-lo em outra, e a versão anterior
+    vai para o histórico de versões como diferença (ver ticket_history). Rearquivar um
+    chamado idêntico não grava nada. 'cidade' e 'uf' são normalizados aqui (ver locations).
+    Cada chamado gravado gera um evento no feed de alterações (ver change_feed).
+    """
+    if not tickets:
+        return
+    now = datetime.datetime.now().isoformat(timespec='seconds')
+    _ensure_manifest()
+    with _store_lock():
+        manifest = _read_manifest()
+        versions = manifest.setdefault('versions', {})
+        by_partition = {}
+        for ticket_id, data in tickets.items():
+            data = with_location(data if data.get('archived_at') else dict(data, archived_at=now))
+            key = manifest['tickets'].get(ticket_id) or partition_key(data)
+            by_partition.setdefault(key, {})[ticket_id] = data
+
+        loaded = {}
+        changes = []
+        for key, changed in by_partition.items():
+            partition = _load_partition(key)
+            history = []
+            for ticket_id, data in list(changed.items()):
+                previous = partition.get(ticket_id)
+                if previous is None:
+                    changes.append((OP_CREATED, ticket_id, data))
+                    continue
+                if same_content(previous, data):
+                    del changed[ticket_id]
+                    continue
+                version = versions.get(ticket_id, 1)
+                history.append({'ticket_id': ticket_id, 'version': version, 'replaced_at': now, 'diff': reverse_diff(data, previous)})
+                versions[ticket_id] = version + 1
+                changes.append((OP_UPDATED, ticket_id, data))
+            if not changed:
+                continue
+            _append_history(key, history)
+            partition.update(changed)
+            _write_partition(key, partition, key in manifest['sealed'])
+            manifest['tickets'].update(dict.fromkeys(changed, key))
+            loaded[key] = partition
+        if not changes:
+            return
+        _seal_due_partitions(manifest, loaded)
+        _write_manifest(manifest)
+        append_changes(changes)
+        _bump_generation()
+
+def rewrite_partitions(transform=None):
+    """Regrava todas as partições, recalculando índices e agregados; `transform(dados)`,
+    se informada, é aplicada a cada chamado (preenchimento retroativo de campos derivados).
+
+    Partições em formato antigo são convertidas no caminho. Os chamados que a transformação
+    alterou geram eventos "atualizado" no feed. Retorna o número de chamados.
+    """
+    _ensure_manifest()
+    count = 0
+    changes = []
+    with _store_lock():
+        manifest = _read_manifest()
+        for key in sorted(set(manifest['tickets'].values())):
+            tickets = _load_partition(key)
+            if transform:
+                transformed = {ticket_id: transform(data) for ticket_id, data in tickets.items()}
+                changes.extend((OP_UPDATED, ticket_id, data) for ticket_id, data in transformed.items() if data != tickets[ticket_id])
+                tickets = transformed
+            _write_partition(key, tickets, key in manifest['sealed'])
+            count += len(tickets)
+        _write_manifest(manifest)
+        append_changes(changes)
+        _bump_generation()
+    return count
+
+# --- Histórico de Versões ---
+def _append_history(key, entries):
+    """Acrescenta as versões substituídas ao histórico da partição. Deve ser chamada com `_store_lock()` adquirida."""
+    if not entries:
+        return
+    lines = "".join(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + "\n" for entry in entries)
+    with open(_history_path(key), 'ab') as f:
+        f.write(lines.encode('utf-8'))
+
+def ticket_version_count(ticket_id):
+    """Quantas versões o chamado tem (1 se nunca foi rearquivado, 0 se não existe)."""
+    archive = _get_archive()
+    if ticket_id not in archive['tickets']:
+        return 0
+    return archive['versions'].get(ticket_id, 1)
+
+def load_ticket_versions(ticket_id):
+    """Todas as versões do chamado como {versão: dados}, refeitas a partir da mais recente."""
+    latest = load_ticket(ticket_id)
+    if latest is None:
+        return {}
+    key = _get_archive()['tickets'][ticket_id]
+    diffs = {}
+    try:
+        with open(_history_path(key), 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.endswith("\n") and f'"{ticket_id}"' in line:
+                    entry = json.loads(line)
+                    if entry['ticket_id'] == ticket_id:
+                        diffs[entry['version']] = entry['diff']
+    except FileNotFoundError:
+        pass
+    version = max(diffs, default=0) + 1
+    versions = {version: latest}
+    data = latest
+    for older in sorted(diffs, reverse=True):
+        data = versions[older] = apply_diff(data, diffs[older])
+    return dict(sorted(versions.items()))
+
+@timed("store.load")
+def load_completed_tickets():
+    """Histórico completo como {ticket_id: dados}. Prefira `iter_completed_tickets` ou `load_ticket`."""
+    return dict(iter_completed_tickets())
+
+# --- Cache por Processo ---
+_index_cache = {'version': None, 'archive': None}
+_cache_lock = threading.Lock()
+
+def _get_archive():
+    """Manifesto e índices de todas as partições, em cache até `store_version()` mudar.
+
+    Compartilhado entre sessões: não modifique.
+    """
+    _ensure_manifest()
+    version = store_version()
+    with _cache_lock:
+        if _index_cache['version'] == version:
+            return _index_cache['archive']
+    manifest = _read_manifest()
+    partitions = {key: _read_partition_index(key) for key in sorted(set(manifest['tickets'].values()))}
+    archive = {'tickets': manifest['tickets'], 'versions': manifest.get('versions', {}), 'partitions': partitions}
+    with _cache_lock:
+        _index_cache.update(version=version, archive=archive)
+    return archive
+
+def get_ticket_index():
+    """{ticket_id: resumo} de todo o histórico, lido apenas dos índices das partições."""
+    return {
+        ticket_id: entry[2]
+        for index in _get_archive()['partitions'].values()
+        for ticket_id, entry in index['tickets'].items()
+    }
+
+def list_ticket_summaries():
+    """Pares (ticket_id, resumo) lidos apenas dos índices das partições."""
+    return list(get_ticket_index().items())
+
+def archive_stats():
+    """Estatísticas do histórico; as partições seladas entram com os agregados gravados na selagem."""
+    parts = []
+    for index in _get_archive()['partitions'].values():
+        if index.get('sealed'):
+            parts.append(index['aggregates'])
+        else:
+            parts.append(compute_stats_from_summaries(entry[2] for entry in index['tickets'].values()))
+    return merge_ticket_stats(parts)
+
+@timed("store.load_ticket")
+def load_ticket(ticket_id):
+    """Lê um único chamado: seek na partição quente ou descompressão da partição selada."""
+    for _ in range(2):
+        archive = _get_archive()
+        key = archive['tickets'].get(ticket_id)
+        if key is None:
+            return None
+        index = archive['partitions'][key]
+        try:
+            if index.get('sealed'):
+                return _load_cold_partition(key, index).get(ticket_id)
+            fmt = index.get('format')
+            with open(_hot_path(key) if fmt else _legacy_hot_path(key), 'rb') as f:
+                return _read_hot_entry(f, index['tickets'][ticket_id], fmt, ticket_id)
+        except (FileNotFoundError, KeyError, IndexError, ValueError, UnicodeDecodeError):
+            with _cache_lock:
+                _index_cache['version'] = None  # partição regravada durante a leitura
+    return None
+
+def iter_completed_tickets():
+    """Percorre o histórico como pares (ticket_id, dados), uma partição e um chamado por vez."""
+    for key, index in _get_archive()['partitions'].items():
+        yield from _iter_partition(key, index)
@@ -0,0 +1,201 @@
+# --- Aquecimento na Inicialização ---
+# Depois de um deploy, o primeiro administrador pagava sozinho pela leitura dos índices do
+# histórico, pelos agregados, pela importação do pandas/plotly e pela primeira figura — e os
+# técnicos sentiam a disputa. `start_warmup()` é chamada no início de cada execução do app
+# (e na subida da API), custa só uma checagem depois da primeira vez e dispara uma thread de
+# fundo que percorre WARMUP_STEPS em ordem, sem que nenhuma requisição espere por ela.
+#
+# A última etapa gera os relatórios PDF/DOCX mais baixados (contagem em REPORT_COUNTS_FILE,
+# comum às réplicas e gravada em lote a cada COUNTS_FLUSH_S segundos) na fila de relatórios
+# com a menor prioridade; eles ficam num cache do processo, conferido pelo conteúdo do
+# chamado e pelas miniaturas já geradas, e são servidos sem passar pela fila.
+# `warmup_status()` informa o andamento (painel administrativo e GET /ready da API).
+# Desligue com CHECKLIST_WARMUP=0.
+
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+
+from attachments import photo_hashes, thumbnails_ready
+from perf_metrics import ENABLED as METRICS_ENABLED, observe
+from report_executor import EXECUTOR, PRIORITY_BACKGROUND, ExecutorSaturated
+from reports import create_docx_report, create_pdf_report
+
+DATA_DIR = os.environ.get("CHECKLIST_DATA_DIR", ".")
+REPORT_COUNTS_FILE = os.path.join(DATA_DIR, "report_downloads.json")
+WARMUP_ENABLED = os.environ.get("CHECKLIST_WARMUP", "1") != "0"
+WARMUP_REPORTS = int(os.environ.get("CHECKLIST_WARMUP_REPORTS", "12"))
+MAX_TRACKED_REPORTS = 2000
+COUNTS_FLUSH_S = 30
+
+REPORT_BUILDERS = {'pdf': create_pdf_report, 'docx': create_docx_report}
+
+STATE_IDLE = "parado"
+STATE_RUNNING = "aquecendo"
+STATE_READY = "pronto"
+STATE_DISABLED = "desligado"
+
+_status = {'estado': STATE_IDLE, 'etapa': None, 'etapas': {}, 'erros': {}, 'segundos': None}
+_status_lock = threading.Lock()
+_counts_lock = threading.Lock()
+_prerendered = {}
+_pending_counts = {}
+_counts_flushed_at = time.monotonic()
+
+# --- Relatórios Mais Baixados ---
+def report_digest(ticket_data):
+    """Identifica o conteúdo de um relatório: o do chamado e quais miniaturas das fotos já
+    existem (um PDF gerado antes delas sai sem as imagens e não pode ser reaproveitado depois)."""
+    content = json.dumps(ticket_data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(f"{content}|{thumbnails_ready(photo_hashes(ticket_data))}".encode('utf-8')).hexdigest()
+
+def _load_counts():
+    try:
+        with open(REPORT_COUNTS_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def record_report_download(ticket_id, fmt):
+    """Conta um download de PDF/DOCX em memória; o arquivo só é regravado a cada COUNTS_FLUSH_S
+    segundos (a contagem é aproximada entre réplicas, o que basta para o ranking)."""
+    with _counts_lock:
+        per_format = _pending_counts.setdefault(ticket_id, {})
+        per_format[fmt] = per_format.get(fmt, 0) + 1
+        due = time.monotonic() - _counts_flushed_at >= COUNTS_FLUSH_S
+    if due:
+        flush_report_counts()
+
+def flush_report_counts():
+    """Soma as contagens pendentes às de REPORT_COUNTS_FILE (também na saída do processo)."""
+    global _counts_flushed_at
+    with _counts_lock:
+        _counts_flushed_at = time.monotonic()
+        if not _pending_counts:
+            return
+        counts = _load_counts()
+        for ticket_id, pending in _pending_counts.items():
+            per_format = counts.setdefault(ticket_id, {})
+            for fmt, count in pending.items():
+                per_format[fmt] = per_format.get(fmt, 0) + count
+        _pending_counts.clear()
+        if len(counts) > MAX_TRACKED_REPORTS:
+            ranked = sorted(counts.items(), key=lambda item: sum(item[1].values()), reverse=True)
+            counts = dict(ranked[:MAX_TRACKED_REPORTS // 2])
+        os.makedirs(DATA_DIR, exist_ok=True)
+        tmp_path = f"{REPORT_COUNTS_FILE}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(counts, f, ensure_ascii=False)
+        os.replace(tmp_path, REPORT_COUNTS_FILE)
+
+def _flush_at_exit():
+    try:
+        flush_report_counts()
+    except OSError:
+        pass  # diretório de dados já removido (benchmarks, testes): a contagem é só um ranking
+
+atexit.register(_flush_at_exit)
+
+def popular_reports(limit):
+    """Pares (ticket_id, formato) mais baixados, do mais para o menos baixado."""
+    pairs = [(count, ticket_id, fmt) for ticket_id, per_format in _load_counts().items() for fmt, count in per_format.items()]
+    pairs.sort(key=lambda pair: pair[0], reverse=True)
+    return [(ticket_id, fmt) for _, ticket_id, fmt in pairs if fmt in REPORT_BUILDERS][:limit]
+
+def prerendered_report(ticket_id, fmt, digest):
+    """Bytes do relatório gerado no aquecimento, se o chamado não mudou desde então; senão None."""
+    ready = _prerendered.get((ticket_id, fmt))
+    return ready[1] if ready and ready[0] == digest else None
+
+# --- Etapas ---
+def _warm_index():
+    from ticket_store import get_ticket_index
+    get_ticket_index()
+
+def _warm_stats():
+    from ticket_store import archive_stats
+    archive_stats()
+
+def _warm_capacity():
+    from capacity import get_capacity_index
+    get_capacity_index()
+
+def _warm_dashboard():
+    """Importa o painel (pandas, plotly) e monta e serializa uma figura, carregando os modelos do plotly."""
+    import pandas as pd
+    import plotly.express as px
+    import admin_page  # noqa: F401
+    px.bar(pd.DataFrame({'UF': ["SP"], 'Chamados': [1]}), x='UF', y='Chamados').to_json()
+
+def _warm_reports():
+    from ticket_store import get_ticket_index, load_ticket
+    index = get_ticket_index()
+    jobs = []
+    for ticket_id, fmt in popular_reports(WARMUP_REPORTS * 2):
+        if ticket_id not in index or len(jobs) >= WARMUP_REPORTS:
+            continue
+        ticket_data = load_ticket(ticket_id)
+        if ticket_data is None:
+            continue
+        try:
+            job = EXECUTOR.submit(REPORT_BUILDERS[fmt], ticket_data, priority=PRIORITY_BACKGROUND)
+        except ExecutorSaturated:
+            break  # a fila está ocupada com pedidos de verdade
+        jobs.append((ticket_id, fmt, report_digest(ticket_data), job))
+    for ticket_id, fmt, digest, job in jobs:
+        try:
+            _prerendered[(ticket_id, fmt)] = (digest, job.future.result().getvalue())
+        except Exception as e:  # um relatório que falha não descarta os outros
+            with _status_lock:
+                _status['erros'][f"relatório {ticket_id} ({fmt})"] = f"{type(e).__name__}: {e}"
+
+WARMUP_STEPS = (
+    ('index', "índice do histórico", _warm_index),
+    ('stats', "estatísticas", _warm_stats),
+    ('capacity', "índice de capacidade", _warm_capacity),
+    ('dashboard', "painel e gráficos", _warm_dashboard),
+    ('reports', "relatórios mais baixados", _warm_reports),
+)
+
+# --- Execução ---
+def _run_steps():
+    started = time.perf_counter()
+    for key, label, step in WARMUP_STEPS:
+        with _status_lock:
+            _status['etapa'] = label
+        step_started = time.perf_counter()
+        try:
+            step()
+        except Exception as e:  # uma etapa com problema não impede as outras nem a prontidão
+            with _status_lock:
+                _status['erros'][label] = f"{type(e).__name__}: {e}"
+        elapsed = time.perf_counter() - step_started
+        if METRICS_ENABLED:
+            observe(f"warmup.{key}", elapsed)
+        with _status_lock:
+            _status['etapas'][label] = round(elapsed, 3)
+        time.sleep(0.01)  # cede o GIL às sessões entre as etapas
+    with _status_lock:
+        _status.update(estado=STATE_READY, etapa=None, segundos=round(time.perf_counter() - started, 3))
+
+def start_warmup():
+    """Dispara o aquecimento uma única vez por processo, sem esperar por ele."""
+    with _status_lock:
+        if _status['estado'] != STATE_IDLE:
+            return
+        if not WARMUP_ENABLED:
+            _status['estado'] = STATE_DISABLED
+            return
+        _status['estado'] = STATE_RUNNING
+    threading.Thread(target=_run_steps, name="warmup", daemon=True).start()
+
+def warmup_status():
+    """Cópia do andamento: estado, etapa atual, segundos por etapa concluída e erros."""
+    with _status_lock:
+        return {**_status, 'etapas': dict(_status['etapas']), 'erros': dict(_status['erros'])}
+
+def is_ready():
+    return warmup_status()['estado'] in (STATE_READY, STATE_DISABLED)